@@ -1,12 +1,18 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.translation import gettext_lazy as _
+from core.admin import AutocompleteFilter, AutocompleteFilterMixin
+from core.pagination import EstimatedCountPaginator
 from .models import User
 
 @admin.register(User)
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(AutocompleteFilterMixin, UserAdmin):
     list_display = ('username', 'email', 'first_name', 'last_name', 'user_type', 'department')
-    list_filter = ('user_type', 'department', 'is_active')
+    list_filter = ('user_type', ('department', AutocompleteFilter), 'is_active')
+    list_select_related = ('department__school',)
+    # The table is too large to COUNT(*) on every page load
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     search_fields = ('username', 'first_name', 'last_name', 'email')
     ordering = ('username',)
     
@@ -26,3 +32,10 @@ class CustomUserAdmin(UserAdmin):
             'fields': ('username', 'password1', 'password2', 'user_type', 'department'),
         }),
     )
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Keep enrollments in step when a student's department changes
+        if not change or {'department', 'user_type'} & set(form.changed_data):
+            from courses.enrollment import reconcile_student
+            reconcile_student(obj)
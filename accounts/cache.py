@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+DASHBOARD_KEY = 'dashboard:{kind}:{user_id}'
+DASHBOARD_KINDS = ('student', 'lecturer')
+
+def get_dashboard_cache():
+    return caches[getattr(settings, 'DASHBOARD_CACHE_ALIAS', 'default')]
+
+def dashboard_key(kind, user_id):
+    return DASHBOARD_KEY.format(kind=kind, user_id=user_id)
+
+def get_dashboard_context(user, kind, build):
+    """
+    Return the cached dashboard context for a user, building it with
+    build(user) on a miss. Entries are evicted by the model signals in
+    accounts.signals; DASHBOARD_CACHE_TIMEOUT bounds how long time-based
+    data (such as assignments passing their due date) can stay stale.
+    """
+    return get_dashboard_cache().get_or_set(
+        dashboard_key(kind, user.pk),
+        lambda: build(user),
+        getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300)
+    )
+
+def invalidate_dashboards(user_ids):
+    """
+    Evict the cached dashboards for the given users once the current
+    transaction commits. Evicting earlier would let a concurrent request
+    rebuild a dashboard from the old rows and cache it until it expires.
+    """
+    keys = [
+        dashboard_key(kind, user_id)
+        for user_id in set(user_ids) if user_id is not None
+        for kind in DASHBOARD_KINDS
+    ]
+    if keys:
+        transaction.on_commit(lambda: get_dashboard_cache().delete_many(keys))
@@ -84,16 +84,10 @@ class UserRegistrationForm(UserCreationForm):
         
         if commit:
             user.save()
-            # If user is a student and department has required courses, enroll them
+            # Enroll students in their department's courses
             if user.is_student() and user.department:
-                from courses.models import Enrollment
-                required_courses = user.department.required_courses.all()
-                for course in required_courses:
-                    Enrollment.objects.create(
-                        student=user,
-                        course=course,
-                        status='enrolled'
-                    )
+                from courses.enrollment import reconcile_student
+                reconcile_student(user)
         return user
 
 class ProfileEditForm(forms.ModelForm):
@@ -0,0 +1,156 @@
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import batched
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from accounts.models import User
+from courses.enrollment import reconcile_students
+from schools.models import Department
+
+COLUMNS = [
+    'username', 'email', 'first_name', 'last_name', 'user_type',
+    'department', 'registration_number', 'staff_number', 'password'
+]
+
+def hash_password(password):
+    # Blank passwords produce an unusable password, as set_unusable_password() does
+    return make_password(password or None)
+
+class Command(BaseCommand):
+    help = 'Import students and lecturers from a CSV roster.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help=f"CSV with a header row of: {', '.join(COLUMNS)}")
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Users per bulk insert (default 1000).'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Password hashing processes (defaults to the CPU count).'
+        )
+
+    def handle(self, *args, **options):
+        self.departments = dict(Department.objects.values_list('code', 'pk'))
+        # Uniqueness is checked against in-memory sets instead of a query per row
+        self.usernames = set(User.objects.values_list('username', flat=True).iterator())
+        self.registration_numbers = set(User.objects.filter(
+            registration_number__isnull=False
+        ).values_list('registration_number', flat=True).iterator())
+        self.staff_numbers = set(User.objects.filter(
+            staff_number__isnull=False
+        ).values_list('staff_number', flat=True).iterator())
+
+        started = time.perf_counter()
+        hashing_time = 0.0
+        read = created = 0
+        errors = []
+
+        try:
+            roster = open(options['csv_file'], newline='', encoding='utf-8')
+        except OSError as exc:
+            raise CommandError(f'Cannot open {options["csv_file"]}: {exc}')
+
+        workers = options['workers'] or os.cpu_count() or 1
+        with roster, ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            reader = csv.DictReader(roster)
+            missing = set(COLUMNS) - set(reader.fieldnames or [])
+            if missing:
+                raise CommandError(f"Missing columns: {', '.join(sorted(missing))}")
+
+            for batch in batched(enumerate(reader, start=2), options['batch_size']):
+                users, passwords = [], []
+                for line, row in batch:
+                    read += 1
+                    user, error = self.build_user(row)
+                    if error:
+                        errors.append(f'line {line}: {error}')
+                    else:
+                        users.append(user)
+                        passwords.append(row['password'])
+                if not users:
+                    continue
+
+                hash_started = time.perf_counter()
+                chunksize = max(1, len(passwords) // (4 * workers))
+                for user, password in zip(users, pool.map(hash_password, passwords, chunksize=chunksize)):
+                    user.password = password
+                hashing_time += time.perf_counter() - hash_started
+
+                try:
+                    with transaction.atomic():
+                        users = User.objects.bulk_create(users)
+                except IntegrityError as exc:
+                    raise CommandError(
+                        f'Import stopped after {created} users; '
+                        f'a batch conflicted with concurrent changes: {exc}'
+                    )
+                created += len(users)
+                reconcile_students(
+                    (user.pk, user.department_id) for user in users if user.is_student()
+                )
+
+        for error in errors:
+            self.stderr.write(error)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {created} of {read} users ({len(errors)} skipped) in {elapsed:.2f}s: '
+            f'{created / elapsed if elapsed else 0:.0f} users/s, '
+            f'{hashing_time:.2f}s spent hashing passwords.'
+        ))
+
+    def build_user(self, row):
+        """
+        Validate a CSV row and return an unsaved User, or an error message.
+        """
+        row = {key: (value or '').strip() for key, value in row.items() if key}
+        username = row['username']
+        user_type = row['user_type'].lower()
+        registration_number = row['registration_number'] or None
+        staff_number = row['staff_number'] or None
+
+        if not username:
+            return None, 'username is required'
+        if username in self.usernames:
+            return None, f"username '{username}' is already in use"
+        if user_type not in dict(User.USER_TYPE_CHOICES):
+            return None, f"unknown user_type '{row['user_type']}'"
+        if row['department'] not in self.departments:
+            return None, f"unknown department '{row['department']}'"
+
+        if user_type == 'student':
+            staff_number = None
+            if not registration_number:
+                return None, 'registration number is required for students'
+            if registration_number in self.registration_numbers:
+                return None, f"registration number '{registration_number}' is already in use"
+            self.registration_numbers.add(registration_number)
+        else:
+            registration_number = None
+            if not staff_number:
+                return None, 'staff number is required for lecturers'
+            if staff_number in self.staff_numbers:
+                return None, f"staff number '{staff_number}' is already in use"
+            self.staff_numbers.add(staff_number)
+
+        self.usernames.add(username)
+        return User(
+            username=username,
+            email=row['email'],
+            first_name=row['first_name'],
+            last_name=row['last_name'],
+            user_type=user_type,
+            department_id=self.departments[row['department']],
+            registration_number=registration_number,
+            staff_number=staff_number,
+        ), None
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-17 05:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_alter_user_options_alter_user_registration_number_and_more'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('schools', '0002_department_required_courses'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['department', 'user_type'], name='user_department_type_idx'),
+        ),
+    ]
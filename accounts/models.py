@@ -17,6 +17,10 @@ class User(AbstractUser):
         db_table = 'accounts_user'
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        indexes = [
+            # Students of a department, for auto-enrollment
+            models.Index(fields=['department', 'user_type'], name='user_department_type_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_full_name()} ({self.get_user_type_display()})"
@@ -29,7 +33,7 @@ class User(AbstractUser):
 
     def get_enrolled_courses(self):
         if self.is_student():
-            return [enrollment.course for enrollment in self.enrollments.all()]
+            return [enrollment.course for enrollment in self.enrollments.active()]
         return []
 
     def get_teaching_courses(self):
@@ -0,0 +1,41 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .cache import invalidate_dashboards
+
+def course_audience(course_id):
+    """
+    Return the ids of the lecturer and every enrolled student of a course.
+    """
+    from courses.models import Course, Enrollment
+
+    user_ids = list(
+        Enrollment.objects.filter(course_id=course_id).values_list('student_id', flat=True)
+    )
+    user_ids.extend(
+        Course.objects.filter(pk=course_id).values_list('lecturer_id', flat=True)
+    )
+    return user_ids
+
+def course_lecturer(**lookup):
+    from courses.models import Course
+
+    return Course.objects.filter(**lookup).values_list('lecturer_id', flat=True).first()
+
+@receiver([post_save, post_delete], sender='courses.Course')
+def invalidate_course_dashboards(sender, instance, **kwargs):
+    invalidate_dashboards(course_audience(instance.pk) + [instance.lecturer_id])
+
+@receiver([post_save, post_delete], sender='courses.Enrollment')
+def invalidate_enrollment_dashboards(sender, instance, **kwargs):
+    invalidate_dashboards([instance.student_id, course_lecturer(pk=instance.course_id)])
+
+@receiver([post_save, post_delete], sender='assignments.Assignment')
+def invalidate_assignment_dashboards(sender, instance, **kwargs):
+    invalidate_dashboards(course_audience(instance.course_id))
+
+@receiver([post_save, post_delete], sender='assignments.Submission')
+def invalidate_submission_dashboards(sender, instance, **kwargs):
+    invalidate_dashboards([
+        instance.student_id,
+        course_lecturer(assignments__pk=instance.assignment_id)
+    ])
@@ -1,3 +1,233 @@
-from django.test import TestCase
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .cache import dashboard_key, get_dashboard_cache
+from .models import User
+from schools.models import School, Department
+from courses.models import Course, Enrollment
+from assignments.models import Assignment, Submission
+
+
+class StudentDashboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.school = School.objects.create(name='Science', code='SCI')
+        cls.department = Department.objects.create(
+            name='Computer Science', code='CS', school=cls.school
+        )
+        cls.lecturer = User.objects.create_user(
+            username='lecturer', password='pass', user_type='lecturer',
+            staff_number='S001', department=cls.department
+        )
+        cls.student = User.objects.create_user(
+            username='student', password='pass', user_type='student',
+            registration_number='R001', department=cls.department
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.student)
+
+    def add_course(self, index, graded_marks=None):
+        course = Course.objects.create(
+            code=f'CS{index}', name=f'Course {index}',
+            department=self.department, lecturer=self.lecturer
+        )
+        for number in range(2):
+            assignment = Assignment.objects.create(
+                title=f'Assignment {number}', course=course, description='',
+                due_date=timezone.now() + timedelta(days=7),
+                total_marks=100, created_by=self.lecturer
+            )
+            if number == 0:
+                Submission.objects.create(
+                    assignment=assignment, student=self.student,
+                    content='answer', marks=graded_marks
+                )
+        return course
+
+    def count_dashboard_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('accounts:student_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_progress_is_annotated_per_enrollment(self):
+        course = self.add_course(1, graded_marks=80)
+        enrollment = Enrollment.objects.with_progress().get(
+            student=self.student, course=course
+        )
+        self.assertEqual(enrollment.total_assignments, 2)
+        self.assertEqual(enrollment.completed_assignments, 1)
+        self.assertEqual(enrollment.get_progress()['progress_percentage'], 50)
+        self.assertEqual(enrollment.get_average_score(), 80)
+
+    def test_query_count_is_constant_as_courses_grow(self):
+        self.add_course(1, graded_marks=70)
+        self.add_course(2)
+        baseline = self.count_dashboard_queries()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for index in range(3, 10):
+                self.add_course(index, graded_marks=60)
+        self.assertEqual(Enrollment.objects.filter(student=self.student).count(), 9)
+        self.assertEqual(self.count_dashboard_queries(), baseline)
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+})
+class DashboardCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='Science', code='SCI')
+        cls.department = Department.objects.create(
+            name='Computer Science', code='CS', school=school
+        )
+        cls.lecturer = User.objects.create_user(
+            username='lecturer', password='pass', user_type='lecturer',
+            staff_number='S001', department=cls.department
+        )
+        cls.student = User.objects.create_user(
+            username='student', password='pass', user_type='student',
+            registration_number='R001', department=cls.department
+        )
+        cls.other_student = User.objects.create_user(
+            username='other', password='pass', user_type='student',
+            registration_number='R002'
+        )
+        cls.course = Course.objects.create(
+            code='CS101', name='Programming', department=cls.department,
+            lecturer=cls.lecturer
+        )
+        cls.assignment = Assignment.objects.create(
+            title='Essay', course=cls.course, description='',
+            due_date=timezone.now() + timedelta(days=7),
+            total_marks=100, created_by=cls.lecturer
+        )
+
+    def setUp(self):
+        get_dashboard_cache().clear()
+
+    def load_dashboard(self, user, kind):
+        self.client.force_login(user)
+        response = self.client.get(reverse(f'accounts:{kind}_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def is_cached(self, user, kind):
+        return get_dashboard_cache().get(dashboard_key(kind, user.pk)) is not None
+
+    def test_dashboard_is_served_from_cache(self):
+        self.load_dashboard(self.student, 'student')
+        self.assertTrue(self.is_cached(self.student, 'student'))
+
+        with CaptureQueriesContext(connection) as context:
+            self.load_dashboard(self.student, 'student')
+        self.assertFalse(any(
+            'courses_enrollment' in query['sql'] for query in context.captured_queries
+        ))
+
+    def test_submission_evicts_only_affected_users(self):
+        self.load_dashboard(self.student, 'student')
+        self.load_dashboard(self.other_student, 'student')
+        self.load_dashboard(self.lecturer, 'lecturer')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Submission.objects.create(
+                assignment=self.assignment, student=self.student, content='answer'
+            )
+
+        self.assertFalse(self.is_cached(self.student, 'student'))
+        self.assertFalse(self.is_cached(self.lecturer, 'lecturer'))
+        self.assertTrue(self.is_cached(self.other_student, 'student'))
+        response = self.load_dashboard(self.student, 'student')
+        self.assertEqual(response.context['completed_assignments'], 1)
+
+    def test_assignment_and_enrollment_changes_evict_course_members(self):
+        self.load_dashboard(self.student, 'student')
+        self.assignment.title = 'Report'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assignment.save()
+        self.assertFalse(self.is_cached(self.student, 'student'))
+
+        self.load_dashboard(self.student, 'student')
+        self.load_dashboard(self.lecturer, 'lecturer')
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.get(student=self.student, course=self.course).delete()
+        self.assertFalse(self.is_cached(self.student, 'student'))
+        self.assertFalse(self.is_cached(self.lecturer, 'lecturer'))
+
+    def test_eviction_waits_for_commit(self):
+        self.load_dashboard(self.student, 'student')
+        with self.captureOnCommitCallbacks() as callbacks:
+            Submission.objects.create(
+                assignment=self.assignment, student=self.student, content='answer'
+            )
+            self.assertTrue(self.is_cached(self.student, 'student'))
+        for callback in callbacks:
+            callback()
+        self.assertFalse(self.is_cached(self.student, 'student'))
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'ums_dashboard_cache_tests'),
+    }
+})
+class FileBasedDashboardCacheTests(DashboardCacheTests):
+    def test_uses_file_based_cache(self):
+        self.assertEqual(type(get_dashboard_cache()).__name__, 'FileBasedCache')
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ImportUsersCommandTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='Science', code='SCI')
+        cls.department = Department.objects.create(
+            name='Computer Science', code='CS', school=school
+        )
+        cls.course = Course.objects.create(
+            code='CS101', name='Programming', department=cls.department
+        )
+        User.objects.create_user(
+            username='existing', user_type='student', registration_number='R001'
+        )
+
+    def test_import_validates_and_bulk_inserts(self):
+        rows = [
+            'username,email,first_name,last_name,user_type,department,registration_number,staff_number,password',
+            'alice,alice@example.com,Alice,A,student,CS,R100,,secret-1',
+            'bob,bob@example.com,Bob,B,lecturer,CS,,S100,secret-2',
+            'carol,carol@example.com,Carol,C,student,CS,R001,,secret-3',
+            'dave,dave@example.com,Dave,D,student,CS,R100,,secret-4',
+            'erin,erin@example.com,Erin,E,student,XX,R101,,secret-5',
+            'frank,frank@example.com,Frank,F,student,CS,R102,,',
+        ]
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as roster:
+            roster.write('\n'.join(rows) + '\n')
+        self.addCleanup(os.remove, roster.name)
+
+        out, err = StringIO(), StringIO()
+        call_command('import_users', roster.name, workers=2, batch_size=2, stdout=out, stderr=err)
+
+        self.assertIn('Imported 3 of 6 users (3 skipped)', out.getvalue())
+        self.assertIn("line 4: registration number 'R001' is already in use", err.getvalue())
+        self.assertIn("line 5: registration number 'R100' is already in use", err.getvalue())
+        self.assertIn("line 6: unknown department 'XX'", err.getvalue())
+
+        alice = User.objects.get(username='alice')
+        self.assertTrue(alice.check_password('secret-1'))
+        self.assertTrue(alice.enrollments.filter(course=self.course).exists())
+        self.assertFalse(User.objects.get(username='frank').has_usable_password())
+        self.assertEqual(User.objects.get(username='bob').staff_number, 'S100')
@@ -2,10 +2,10 @@ from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.views import LoginView
 from django.contrib import messages
-from django.db.models import Count, Q, Avg
 from django.utils import timezone
 from django.urls import reverse
 from .forms import UserRegistrationForm, CustomAuthenticationForm, ProfileEditForm
+from .cache import get_dashboard_context
 from courses.models import Course, Enrollment
 from assignments.models import Assignment, Submission
 
@@ -46,60 +46,50 @@ def edit_profile(request):
         form = ProfileEditForm(instance=request.user)
     return render(request, 'accounts/edit_profile.html', {'form': form})
 
+# Dashboards are cached right after signals evict them, so they are built
+# from the primary: a lagging replica would stay on screen until expiry
 @login_required
 def student_dashboard(request):
     if not request.user.is_student():
         messages.error(request, 'Access denied. Students only.')
         return redirect('home')
     
-    # Get student's enrollments with course data
-    enrollments = Enrollment.objects.filter(
-        student=request.user
+    context = get_dashboard_context(request.user, 'student', build_student_dashboard_context)
+    return render(request, 'accounts/student_dashboard.html', context)
+
+@login_required
+def lecturer_dashboard(request):
+    if not request.user.is_lecturer():
+        messages.error(request, 'Access denied. Lecturers only.')
+        return redirect('home')
+    
+    context = get_dashboard_context(request.user, 'lecturer', build_lecturer_dashboard_context)
+    return render(request, 'accounts/lecturer_dashboard.html', context)
+
+def build_student_dashboard_context(user):
+    # Get student's enrollments with course data and per-course progress
+    enrollments = list(Enrollment.objects.active().filter(
+        student=user
     ).select_related(
         'course',
         'course__lecturer',
-        'course__department'
-    )
-    
-    # Get all assignments from enrolled courses
-    enrolled_course_ids = enrollments.values_list('course_id', flat=True)
-    all_assignments = Assignment.objects.filter(course_id__in=enrolled_course_ids)
-    total_assignments = all_assignments.count()
+        'course__department__school'
+    ).with_progress())
     
-    # Get completed assignments (with submissions)
-    submitted_assignment_ids = request.user.submissions.values_list('assignment_id', flat=True)
-    completed_assignments = len(submitted_assignment_ids)
+    # Overall totals are summed from the per-enrollment annotations
+    total_assignments = sum(enrollment.total_assignments for enrollment in enrollments)
+    completed_assignments = sum(enrollment.completed_assignments for enrollment in enrollments)
     
     # Get pending (unsubmitted and not past due) assignments
-    pending_assignments_list = Assignment.objects.filter(
-        course_id__in=enrolled_course_ids,
+    pending_assignments_list = list(Assignment.objects.filter(
+        course__enrollments__student=user,
+        course__enrollments__status__in=Enrollment.ACTIVE_STATUSES,
         due_date__gt=timezone.now()
     ).exclude(
-        id__in=submitted_assignment_ids
+        submissions__student=user
     ).select_related(
         'course'
-    ).order_by('due_date')
-    
-    # Calculate course progress and averages
-    for enrollment in enrollments:
-        # Get all assignments for this course
-        course_assignments = all_assignments.filter(course=enrollment.course)
-        total = course_assignments.count()
-        completed = request.user.submissions.filter(
-            assignment__course=enrollment.course
-        ).count()
-        
-        # Calculate average score for graded assignments
-        avg_score = request.user.submissions.filter(
-            assignment__course=enrollment.course,
-            marks__isnull=False
-        ).aggregate(avg=Avg('marks'))['avg']
-        
-        # Attach data to enrollment object
-        enrollment.total_assignments = total
-        enrollment.completed_assignments = completed
-        enrollment.progress_percentage = (completed / total * 100) if total > 0 else 0
-        enrollment.average_score = round(avg_score, 1) if avg_score else None
+    ).order_by('due_date'))
     
     context = {
         'enrollments': enrollments,
@@ -109,38 +99,26 @@ def student_dashboard(request):
         'pending_assignments_list': pending_assignments_list
     }
     
-    return render(request, 'accounts/student_dashboard.html', context)
+    return context
 
-@login_required
-def lecturer_dashboard(request):
-    if not request.user.is_lecturer():
-        messages.error(request, 'Access denied. Lecturers only.')
-        return redirect('home')
-    
-    # Get all courses taught by the lecturer with submission stats
-    courses = Course.objects.filter(
-        lecturer=request.user
-    ).annotate(
-        student_count=Count('enrollments', distinct=True),
-        assignment_count=Count('assignments', distinct=True),
-        submission_count=Count('assignments__submissions', distinct=True),
-        ungraded_count=Count(
-            'assignments__submissions',
-            filter=Q(assignments__submissions__marks__isnull=True),
-            distinct=True
-        )
-    )
+def build_lecturer_dashboard_context(user):
+    # Get all courses taught by the lecturer with their precomputed stats
+    courses = list(Course.objects.filter(
+        lecturer=user
+    ).select_related(
+        'department__school'
+    ).with_stats())
     
     # Get all submissions for the lecturer's courses, ordered by submission date
-    recent_submissions = Submission.objects.filter(
-        assignment__course__lecturer=request.user
+    recent_submissions = list(Submission.objects.filter(
+        assignment__course__lecturer=user
     ).select_related(
         'student',
         'assignment',
         'assignment__course'
     ).order_by(
         '-submitted_at'
-    )[:10]
+    )[:10])
     
     # Calculate overall statistics
     total_students = sum(course.student_count for course in courses)
@@ -159,4 +137,4 @@ def lecturer_dashboard(request):
         }
     }
     
-    return render(request, 'accounts/lecturer_dashboard.html', context)
+    return context
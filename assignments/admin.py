@@ -1,35 +1,63 @@
 from django.contrib import admin
+from core.admin import AutocompleteFilter, AutocompleteFilterMixin
+from core.pagination import EstimatedCountPaginator
 from .models import Assignment, Submission
 
 @admin.register(Assignment)
-class AssignmentAdmin(admin.ModelAdmin):
-    list_display = ('title', 'course', 'due_date', 'total_marks', 'submission_count')
-    list_filter = ('course__department', 'due_date', 'course')
+class AssignmentAdmin(AutocompleteFilterMixin, admin.ModelAdmin):
+    list_display = (
+        'title', 'course', 'due_date', 'total_marks',
+        'submission_count', 'completion_rate', 'average_score'
+    )
+    list_filter = (
+        ('course__department', AutocompleteFilter),
+        'due_date',
+        ('course', AutocompleteFilter),
+    )
+    list_select_related = ('course',)
     search_fields = ('title', 'course__code', 'course__name')
     date_hierarchy = 'due_date'
     
     def submission_count(self, obj):
-        return obj.submissions.count()
+        return obj.submission_count
+    submission_count.admin_order_field = 'submission_count'
     submission_count.short_description = 'Submissions'
 
+    def completion_rate(self, obj):
+        return f'{obj.completion_rate:.0f}%'
+    completion_rate.admin_order_field = 'completion_rate'
+    completion_rate.short_description = 'Completion'
+
+    def average_score(self, obj):
+        if obj.average_score is None:
+            return None
+        return round(obj.average_score, 2)
+    average_score.admin_order_field = 'average_score'
+    average_score.short_description = 'Average Score'
+
     def get_queryset(self, request):
-        qs = super().get_queryset(request)
+        qs = super().get_queryset(request).with_stats()
         if not request.user.is_superuser:
             if request.user.is_lecturer():
                 return qs.filter(course__lecturer=request.user)
         return qs
 
 @admin.register(Submission)
-class SubmissionAdmin(admin.ModelAdmin):
+class SubmissionAdmin(AutocompleteFilterMixin, admin.ModelAdmin):
     list_display = ('student', 'assignment', 'submitted_at', 'marks', 'is_late')
     list_filter = (
         'submitted_at',
-        'assignment__course',
+        ('assignment__course', AutocompleteFilter),
+        ('student', AutocompleteFilter),
         ('marks', admin.EmptyFieldListFilter),  # Use EmptyFieldListFilter for nullable fields
     )
+    list_select_related = ('student', 'assignment__course')
     search_fields = ('student__username', 'assignment__title', 'assignment__course__code')
-    date_hierarchy = 'submitted_at'
     readonly_fields = ('submitted_at', 'is_late')
+    raw_id_fields = ('student', 'assignment', 'graded_by')
+    # The table is too large to COUNT(*) on every page load
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
@@ -0,0 +1,109 @@
+import mimetypes
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import quote_etag
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+def parse_range(header, size):
+    """
+    Return the (start, end) byte offsets, end inclusive, requested by a
+    single-range Range header, None to serve the whole file or 'invalid'
+    when the range cannot be satisfied. Multi-range requests are served in
+    full, which the HTTP spec allows.
+    """
+    match = RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return 'invalid'
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return 'invalid'
+    return start, end
+
+def read_range(file, start, end):
+    file.seek(start)
+    remaining = end - start + 1
+    try:
+        while remaining > 0:
+            chunk = file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+def serve_file(request, field_file, etag, filename):
+    """
+    Serve a stored file with conditional and range request support.
+
+    A matching If-None-Match answers 304 without touching the file. With
+    SENDFILE_BACKEND set to 'nginx' or 'apache' the transfer is handed to
+    the web server through X-Accel-Redirect or X-Sendfile; otherwise the
+    file is streamed by FileResponse, honouring single byte ranges.
+    """
+    etag = quote_etag(etag)
+    headers = {
+        'ETag': etag,
+        'Accept-Ranges': 'bytes',
+        # Submissions are private to the student and their lecturer
+        'Cache-Control': 'private, max-age=3600',
+    }
+    if_none_match = request.headers.get('If-None-Match', '')
+    if etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*':
+        response = HttpResponseNotModified()
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    content_type = mimetypes.guess_type(field_file.name)[0] or 'application/octet-stream'
+    disposition = f'inline; filename="{filename}"'
+    backend = getattr(settings, 'SENDFILE_BACKEND', '')
+    if backend:
+        response = HttpResponse(content_type=content_type)
+        if backend == 'nginx':
+            response['X-Accel-Redirect'] = settings.SENDFILE_URL + field_file.name
+        else:
+            response['X-Sendfile'] = field_file.path
+        response['Content-Disposition'] = disposition
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    size = field_file.size
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if 'Range' in request.headers and (if_range is None or if_range == etag):
+        byte_range = parse_range(request.headers['Range'], size)
+
+    if byte_range == 'invalid':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+    elif byte_range is not None:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            read_range(field_file.open('rb'), start, end),
+            status=206,
+            content_type=content_type
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Disposition'] = disposition
+    else:
+        response = FileResponse(field_file.open('rb'), content_type=content_type, filename=filename)
+    for name, value in headers.items():
+        response[name] = value
+    return response
@@ -1,6 +1,7 @@
 from django import forms
 from django.core.exceptions import ValidationError
 from .models import Assignment, Submission
+from .validators import validate_pdf_stream
 
 class AssignmentForm(forms.ModelForm):
     class Meta:
@@ -42,14 +43,14 @@ class SubmissionForm(forms.ModelForm):
     def clean_file(self):
         file = self.cleaned_data.get('file')
         if file:
-            # Check file size
-            if file.size > 5242880:  # 5MB
-                raise ValidationError('File size must not exceed 5MB.')
-            
             # Check file type
             if not file.name.endswith('.pdf'):
                 raise ValidationError('Only PDF files are allowed.')
 
+            # Check size and PDF structure in one streaming pass; the digest
+            # stays with this upload so storage doesn't hash it again
+            file.sha256 = validate_pdf_stream(file)
+
         return file
 
     def clean(self):
@@ -92,8 +93,50 @@ class GradingForm(forms.ModelForm):
 
     def clean_marks(self):
         marks = self.cleaned_data.get('marks')
-        if marks > self.assignment.total_marks:
+        if marks is not None and marks > self.assignment.total_marks:
             raise ValidationError(
                 f'Marks cannot exceed the total marks ({self.assignment.total_marks})'
             )
-        return marks
\ No newline at end of file
+        return marks
+
+class MarksImportForm(forms.Form):
+    csv_file = forms.FileField(
+        label='Marks CSV',
+        help_text='Columns: registration_number, marks and optionally feedback.',
+        widget=forms.FileInput(attrs={'class': 'form-control', 'accept': '.csv'})
+    )
+
+class BaseBulkGradingFormSet(forms.BaseFormSet):
+    """
+    GradingForms over a page of already loaded submissions, one per
+    submission in order, so building and validating it runs no queries.
+    """
+    def __init__(self, assignment, submissions, *args, **kwargs):
+        self.assignment = assignment
+        self.submissions = list(submissions)
+        super().__init__(*args, **kwargs)
+
+    def initial_form_count(self):
+        return len(self.submissions)
+
+    def total_form_count(self):
+        return len(self.submissions)
+
+    def get_form_kwargs(self, index):
+        return {'assignment': self.assignment, 'instance': self.submissions[index]}
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        form.fields['feedback'].widget.attrs['rows'] = 2
+
+    def graded_submissions(self):
+        """
+        Submissions given marks in a valid formset; rows left blank are
+        skipped.
+        """
+        return [
+            form.instance for form in self.forms
+            if form.cleaned_data.get('marks') is not None
+        ]
+
+BulkGradingFormSet = forms.formset_factory(GradingForm, formset=BaseBulkGradingFormSet, extra=0)
@@ -0,0 +1,172 @@
+import csv
+from collections import namedtuple
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from .models import Submission
+
+GRADED_FIELDS = ['marks', 'feedback', 'graded_by', 'graded_at']
+
+# Rows per bulk_update() statement
+UPDATE_BATCH_SIZE = 1000
+
+# Columns of a marks import; feedback may be left out
+MARKS_COLUMNS = ['registration_number', 'marks', 'feedback']
+
+# Ungraded submissions shown per page of the bulk grading formset
+BULK_GRADING_PAGE_SIZE = 50
+
+# One submission's new grade; previous_marks are the marks stored before,
+# read in the grading transaction with select_for_update()
+Grade = namedtuple('Grade', ['submission_id', 'student_id', 'previous_marks', 'marks', 'feedback'])
+
+def update_grades(grades, grader, graded_at):
+    """
+    Write the marks and feedback of `grades`, graded by `grader` at
+    `graded_at`, with one bulk_update() statement per batch.
+    """
+    Submission.objects.bulk_update(
+        [
+            Submission(
+                pk=grade.submission_id, marks=grade.marks, feedback=grade.feedback,
+                graded_by=grader, graded_at=graded_at
+            )
+            for grade in grades
+        ],
+        GRADED_FIELDS,
+        batch_size=UPDATE_BATCH_SIZE
+    )
+
+def apply_grades(assignment, grades, grader):
+    """
+    Save `grades` for submissions of `assignment` as graded by `grader`,
+    in a single transaction.
+
+    The batched UPDATEs send no post_save signals, so the CourseStats
+    counters, cached dashboards and course page fragments that
+    courses.signals and accounts.signals maintain for single saves are
+    updated here, the counters from each grade's previous marks. Those
+    must be read in the caller's transaction with select_for_update(), or
+    a grade saved in between would make the counters drift. Returns the
+    time the grades were recorded.
+    """
+    from accounts.cache import invalidate_dashboards
+    from courses.cache import bump_course_versions
+    from courses.signals import marks_deltas
+    from courses.stats import apply_stats_delta
+
+    deltas = {}
+    for grade in grades:
+        changes = list(marks_deltas(grade.previous_marks, sign=-1).items())
+        changes.extend(marks_deltas(grade.marks).items())
+        for field, delta in changes:
+            deltas[field] = deltas.get(field, 0) + delta
+
+    graded_at = timezone.now()
+    # Callers already hold a transaction, so no savepoint is needed
+    with transaction.atomic(savepoint=False):
+        update_grades(grades, grader, graded_at)
+        apply_stats_delta(assignment.course_id, **deltas)
+        invalidate_dashboards(
+            [grade.student_id for grade in grades] + [assignment.course.lecturer_id]
+        )
+        bump_course_versions([assignment.course_id])
+    return graded_at
+
+def grade_submissions(assignment, submissions, grader):
+    """
+    Save the marks and feedback set on `submissions` of `assignment` as
+    graded by `grader` with apply_grades(). Submissions deleted in the
+    meantime are skipped. Returns the number of submissions graded.
+    """
+    submissions = list(submissions)
+    if not submissions:
+        return 0
+
+    with transaction.atomic():
+        stored_marks = dict(Submission.objects.select_for_update().filter(
+            pk__in=[submission.pk for submission in submissions]
+        ).values_list('pk', 'marks'))
+        submissions = [submission for submission in submissions if submission.pk in stored_marks]
+        graded_at = apply_grades(
+            assignment,
+            [
+                Grade(submission.pk, submission.student_id, stored_marks[submission.pk],
+                      submission.marks, submission.feedback)
+                for submission in submissions
+            ],
+            grader
+        )
+    for submission in submissions:
+        submission.graded_by = grader
+        submission.graded_at = graded_at
+        submission._loaded_marks = submission.marks
+    return len(submissions)
+
+def import_marks(assignment, lines, grader):
+    """
+    Grade submissions of `assignment` from CSV text with a header row of
+    MARKS_COLUMNS, as `grader`.
+
+    The assignment's submissions are locked and read with one query keyed
+    on the student's registration number, and the valid rows are written
+    with apply_grades() in the same transaction. Invalid rows are reported
+    without stopping the import. Returns (graded, read, errors), where
+    errors is a list of (line, message) pairs.
+    """
+    reader = csv.DictReader(lines)
+    missing = set(MARKS_COLUMNS) - {'feedback'} - set(reader.fieldnames or [])
+    if missing:
+        raise ValidationError(f"Missing columns: {', '.join(sorted(missing))}")
+
+    marks_field = Submission._meta.get_field('marks')
+    total_marks = assignment.total_marks
+
+    # Hold the submissions until the grades are written, so the stored
+    # marks the CourseStats deltas start from can't change in between
+    with transaction.atomic():
+        rows = assignment.submissions.select_for_update(of=('self',)).values_list(
+            'student__registration_number', 'pk', 'student_id', 'marks', 'feedback'
+        )
+        submissions = {
+            registration_number: (pk, student_id, marks, feedback)
+            for registration_number, pk, student_id, marks, feedback in rows
+        }
+
+        grades, errors, seen = [], [], set()
+        read = 0
+        for line, row in enumerate(reader, start=2):
+            read += 1
+            registration_number = (row.get('registration_number') or '').strip()
+            marks = (row.get('marks') or '').strip()
+            if not registration_number:
+                errors.append((line, 'registration_number is required'))
+                continue
+            if registration_number in seen:
+                errors.append((line, f"registration number '{registration_number}' appears more than once"))
+                continue
+            seen.add(registration_number)
+            if registration_number not in submissions:
+                errors.append((line, f"no submission from registration number '{registration_number}'"))
+                continue
+            if not marks:
+                errors.append((line, 'marks is required'))
+                continue
+            try:
+                marks = marks_field.clean(marks, None)
+            except ValidationError as exc:
+                errors.append((line, ' '.join(exc.messages)))
+                continue
+            if marks > total_marks:
+                errors.append((line, f'marks cannot exceed the total marks ({total_marks})'))
+                continue
+
+            pk, student_id, previous_marks, feedback = submissions[registration_number]
+            if row.get('feedback') is not None:
+                feedback = row['feedback'].strip()
+            grades.append(Grade(pk, student_id, previous_marks, marks, feedback))
+
+        if grades:
+            apply_grades(assignment, grades, grader)
+    return len(grades), read, errors
@@ -0,0 +1,50 @@
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from accounts.models import User
+from assignments.grading import MARKS_COLUMNS, import_marks
+from assignments.models import Assignment
+
+class Command(BaseCommand):
+    help = 'Grade the submissions of an assignment from a CSV of marks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('assignment_id', type=int)
+        parser.add_argument('csv_file', help=f"CSV with a header row of: {', '.join(MARKS_COLUMNS)}")
+        parser.add_argument(
+            '--grader',
+            help="Username recorded as the grader (defaults to the course's lecturer)."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            assignment = Assignment.objects.select_related('course__lecturer').get(
+                pk=options['assignment_id']
+            )
+        except Assignment.DoesNotExist:
+            raise CommandError(f"Assignment {options['assignment_id']} does not exist.")
+
+        grader = assignment.course.lecturer
+        if options['grader']:
+            try:
+                grader = User.objects.get(username=options['grader'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['grader']}' does not exist.")
+
+        started = time.perf_counter()
+        try:
+            with open(options['csv_file'], newline='', encoding='utf-8-sig') as lines:
+                graded, read, errors = import_marks(assignment, lines, grader)
+        except OSError as exc:
+            raise CommandError(f'Cannot open {options["csv_file"]}: {exc}')
+        except ValidationError as exc:
+            raise CommandError(' '.join(exc.messages))
+
+        for line, error in errors:
+            self.stderr.write(f'line {line}: {error}')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Graded {graded} of {read} rows ({len(errors)} skipped) in {elapsed:.2f}s.'
+        ))
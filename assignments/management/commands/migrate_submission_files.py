@@ -0,0 +1,62 @@
+import os
+
+from django.core.management.base import BaseCommand
+from assignments.models import Submission
+from assignments.storage import submission_storage
+
+class Command(BaseCommand):
+    help = (
+        'Move submission files stored under their original per-student paths into the '
+        'content-addressed blob storage and report the bytes saved by deduplication.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only hash the files and report what would be saved.'
+        )
+
+    def handle(self, *args, **options):
+        storage = submission_storage()
+        dry_run = options['dry_run']
+        migrated = missing = 0
+        bytes_before = bytes_after = 0
+        digests = set()
+
+        legacy = Submission.objects.exclude(file='').exclude(file__isnull=True).exclude(
+            file__startswith=f'{storage.prefix}/'
+        ).order_by('pk').values_list('pk', 'file')
+        for pk, old_name in legacy.iterator():
+            if not storage.exists(old_name):
+                missing += 1
+                continue
+            size = storage.size(old_name)
+            bytes_before += size
+            extension = os.path.splitext(old_name)[1]
+
+            with storage.open(old_name) as content:
+                if dry_run:
+                    digest = storage.hash_content(content)
+                    created = digest not in digests and not storage.exists(
+                        storage.blob_name(digest, extension)
+                    )
+                    digests.add(digest)
+                else:
+                    name, created = storage.store(content, extension)
+                    digest = os.path.splitext(os.path.basename(name))[0]
+            if created:
+                bytes_after += size
+
+            if not dry_run:
+                # update() sends no signals, so the old file is released here
+                Submission.objects.filter(pk=pk).update(file=name, sha256=digest)
+                if not Submission.objects.filter(file=old_name).exists():
+                    storage.delete(old_name)
+            migrated += 1
+
+        verb = 'Would migrate' if dry_run else 'Migrated'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {migrated} files ({missing} missing): {bytes_before} bytes before, '
+            f'{bytes_after} bytes after, {bytes_before - bytes_after} bytes saved.'
+        ))
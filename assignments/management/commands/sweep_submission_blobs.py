@@ -0,0 +1,36 @@
+from itertools import batched
+
+from django.core.management.base import BaseCommand
+from assignments.models import Submission
+from assignments.storage import submission_storage
+
+class Command(BaseCommand):
+    help = (
+        'Delete submission blobs that no submission references, such as blobs left '
+        'within their grace period when their last submission was deleted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Blobs whose references are checked per query.'
+        )
+
+    def handle(self, *args, **options):
+        storage = submission_storage()
+        checked = deleted = 0
+        for batch in batched(storage.blob_names(), options['batch_size']):
+            referenced = set(Submission.objects.filter(file__in=batch).values_list('file', flat=True))
+            for name in batch:
+                checked += 1
+                if name in referenced:
+                    continue
+                # Checked again once the blob is moved aside, for uploads since
+                if storage.delete_unreferenced(name, Submission.objects.filter(file=name).exists):
+                    deleted += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} blobs, deleted {deleted} unreferenced.'
+        ))
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-17 05:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0002_remove_assignment_is_active_and_more'),
+        ('courses', '0003_coursestats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['course', 'due_date'], name='assignment_course_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['student', 'submitted_at'], name='submission_student_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(condition=models.Q(('marks__isnull', True)), fields=['assignment', 'submitted_at'], name='submission_ungraded_idx'),
+        ),
+    ]
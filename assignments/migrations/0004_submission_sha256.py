@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-17 06:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0003_assignment_assignment_course_due_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='sha256',
+            field=models.CharField(blank=True, editable=False, help_text='SHA-256 of the uploaded file', max_length=64),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.7 on 2026-10-17 06:19
+
+import assignments.models
+import assignments.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0004_submission_sha256'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='submission',
+            name='file',
+            field=models.FileField(blank=True, db_index=True, help_text='Upload your assignment file (PDF format only)', null=True, storage=assignments.storage.submission_storage, upload_to=assignments.models.submission_file_path),
+        ),
+    ]
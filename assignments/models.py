@@ -1,11 +1,51 @@
 from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models import Avg, Case, Count, F, FloatField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+from .storage import BLOB_NAME, release_blob, submission_storage
 
 def submission_file_path(instance, filename):
-    # File will be uploaded to MEDIA_ROOT/submissions/student_id/assignment_id/filename
-    return f'submissions/{instance.student.id}/{instance.assignment.id}/{filename}'
+    # Storage names files after their content and only keeps the extension
+    return filename
+
+class AssignmentQuerySet(models.QuerySet):
+    def with_stats(self):
+        """
+        Annotate each assignment with submission_count, enrolled_count,
+        completion_rate and average_score. Each figure is a correlated
+        subquery, so a whole list is annotated in one query without the row
+        multiplication of joining enrollments and submissions together.
+        """
+        from courses.models import Enrollment
+
+        submissions = Submission.objects.filter(
+            assignment=OuterRef('pk')
+        ).order_by().values('assignment')
+        enrollments = Enrollment.objects.active().filter(
+            course=OuterRef('course')
+        ).order_by().values('course')
+
+        return self.annotate(
+            submission_count=Coalesce(
+                Subquery(submissions.annotate(total=Count('pk')).values('total')), 0
+            ),
+            enrolled_count=Coalesce(
+                Subquery(enrollments.annotate(total=Count('pk')).values('total')), 0
+            ),
+            average_score=Subquery(
+                submissions.filter(marks__isnull=False).annotate(
+                    avg=Avg('marks', output_field=FloatField())
+                ).values('avg')
+            ),
+        ).annotate(
+            completion_rate=Case(
+                When(enrolled_count=0, then=Value(0.0)),
+                default=F('submission_count') * 100.0 / F('enrolled_count'),
+                output_field=FloatField()
+            )
+        )
 
 class Assignment(models.Model):
     title = models.CharField(max_length=200)
@@ -28,8 +68,14 @@ class Assignment(models.Model):
         related_name='created_assignments'
     )
 
+    objects = AssignmentQuerySet.as_manager()
+
     class Meta:
         ordering = ['-due_date']
+        indexes = [
+            # Upcoming assignments per course on the student dashboard
+            models.Index(fields=['course', 'due_date'], name='assignment_course_due_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.course.code}"
@@ -38,18 +84,26 @@ class Assignment(models.Model):
         return timezone.now() > self.due_date
 
     def get_completion_rate(self):
-        total_students = self.course.enrollments.count()
-        if total_students == 0:
-            return 0
-        submissions_count = self.submissions.count()
-        return (submissions_count / total_students) * 100
+        """
+        Percentage of enrolled students who have submitted. Uses the value
+        annotated by Assignment.objects.with_stats() when available.
+        """
+        if hasattr(self, 'completion_rate'):
+            return self.completion_rate
+        stats = type(self).objects.filter(pk=self.pk).with_stats().values('completion_rate')
+        return stats[0]['completion_rate'] if stats else 0
 
     def get_average_score(self):
-        graded_submissions = self.submissions.filter(marks__isnull=False)
-        if not graded_submissions.exists():
-            return None
-        total_marks = sum(sub.marks for sub in graded_submissions)
-        return total_marks / graded_submissions.count()
+        """
+        Average marks of the graded submissions, or None if none are graded.
+        Uses the value annotated by Assignment.objects.with_stats() when
+        available.
+        """
+        if hasattr(self, 'average_score'):
+            return self.average_score
+        return self.submissions.filter(
+            marks__isnull=False
+        ).aggregate(avg=Avg('marks', output_field=FloatField()))['avg']
 
 class Submission(models.Model):
     assignment = models.ForeignKey(
@@ -69,10 +123,18 @@ class Submission(models.Model):
     )
     file = models.FileField(
         upload_to=submission_file_path,
+        storage=submission_storage,
+        db_index=True,
         null=True,
         blank=True,
         help_text="Upload your assignment file (PDF format only)",
     )
+    sha256 = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text="SHA-256 of the uploaded file"
+    )
     submitted_at = models.DateTimeField(auto_now_add=True)
     marks = models.DecimalField(
         max_digits=5,
@@ -95,15 +157,55 @@ class Submission(models.Model):
     class Meta:
         unique_together = ['assignment', 'student']
         ordering = ['-submitted_at']
+        indexes = [
+            models.Index(fields=['student', 'submitted_at'], name='submission_student_date_idx'),
+            # Only ungraded rows, for the lecturer's pending submissions queue
+            models.Index(
+                fields=['assignment', 'submitted_at'],
+                name='submission_ungraded_idx',
+                condition=models.Q(marks__isnull=True)
+            ),
+        ]
 
     def __str__(self):
         return f"{self.student.username} - {self.assignment.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored marks so CourseStats can apply grading deltas
+        if 'marks' in field_names:
+            instance._loaded_marks = instance.marks
+        # and the stored content so grading saves skip the search index
+        if 'content' in field_names:
+            instance._loaded_content = instance.content
+        # and the stored file so replacing it releases the old blob
+        if 'file' in field_names:
+            instance._loaded_file = instance.file.name
+        return instance
+
     def save(self, *args, **kwargs):
         if self.marks is not None and not self.graded_at:
             self.graded_at = timezone.now()
+
+        replaced = getattr(self, '_loaded_file', None)
+        if self.file and not self.file._committed:
+            # A new upload: storage reuses the digest attached to it, which
+            # SubmissionForm.clean_file computed while validating the PDF
+            upload = self.file.file
+            if not getattr(upload, 'sha256', None):
+                upload.sha256 = submission_storage().hash_content(upload)
+            self.sha256 = upload.sha256
+        elif self.file.name != replaced:
+            # Written to storage directly (FieldFile.save) or cleared
+            match = BLOB_NAME.match(self.file.name or '')
+            self.sha256 = match['digest'] if match else ''
         super().save(*args, **kwargs)
 
+        if replaced and replaced != self.file.name:
+            release_blob(replaced)
+        self._loaded_file = self.file.name
+
     def is_late(self):
         return self.submitted_at > self.assignment.due_date
 
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from .storage import release_blob
+
+@receiver(post_delete, sender='assignments.Submission')
+def release_submission_file(sender, instance, **kwargs):
+    """
+    Release a deleted submission's file (see release_blob).
+    """
+    if instance.file.name:
+        release_blob(instance.file.name)
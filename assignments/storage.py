@@ -0,0 +1,118 @@
+import hashlib
+import os
+import re
+import time
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, storages
+from django.db import transaction
+
+# blobs/ab/cd/<sha256><extension>, the names store() gives files
+BLOB_NAME = re.compile(r'^blobs/([0-9a-f]{2})/([0-9a-f]{2})/(?P<digest>\1\2[0-9a-f]{60})(\.[a-z0-9]+)?$')
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that keeps one blob per distinct file content.
+
+    Files are named after the SHA-256 of their content and fanned out over
+    two directory levels (blobs/ab/cd/abcd....pdf), so saving a file that
+    is already stored writes nothing and returns the existing name. The
+    name passed to save() only contributes its extension, and a `sha256`
+    attribute on the content skips hashing it again (see Submission.save).
+    Blobs are shared
+    between submissions and removed with delete_unreferenced() once no
+    submission references them (see assignments.signals).
+    """
+    prefix = 'blobs'
+
+    def blob_name(self, digest, extension=''):
+        return f'{self.prefix}/{digest[:2]}/{digest[2:4]}/{digest}{extension.lower()}'
+
+    def hash_content(self, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    def store(self, content, extension='', digest=None):
+        """
+        Store `content` under its content hash and return (name, created).
+        `digest` skips hashing when the caller already has the SHA-256.
+        """
+        name = self.blob_name(digest or self.hash_content(content), extension)
+        try:
+            # Mark the blob as in use, so a concurrent release of its last
+            # reference leaves it alone until this upload's row commits
+            os.utime(self.path(name))
+            return name, False
+        except FileNotFoundError:
+            pass
+        # Write under a unique temporary name and rename into place, so
+        # concurrent uploads of the same content never clash
+        temporary = super()._save(f'{name}.{uuid.uuid4().hex}.part', content)
+        os.replace(self.path(temporary), self.path(name))
+        return name, True
+
+    def delete_unreferenced(self, name, is_referenced):
+        """
+        Delete the blob `name` unless `is_referenced()` is true or it was
+        stored or reused within SUBMISSION_BLOB_GRACE_PERIOD seconds.
+        Returns whether the blob was deleted.
+
+        The blob is moved aside before the checks, so an upload that reuses
+        it afterwards finds it missing and writes it again, and one that
+        reused it before has refreshed its modification time.
+        """
+        grace_period = getattr(settings, 'SUBMISSION_BLOB_GRACE_PERIOD', 600)
+        path = self.path(name)
+        tombstone = f'{path}.{uuid.uuid4().hex}.deleting'
+        try:
+            os.replace(path, tombstone)
+        except FileNotFoundError:
+            return False
+        if is_referenced() or time.time() - os.stat(tombstone).st_mtime < grace_period:
+            # Same content, so restoring over a rewritten blob is harmless
+            os.replace(tombstone, path)
+            return False
+        os.remove(tombstone)
+        return True
+
+    def blob_names(self):
+        """
+        Yield the name of every stored blob.
+        """
+        if not self.exists(self.prefix):
+            return
+        for first in self.listdir(self.prefix)[0]:
+            for second in self.listdir(f'{self.prefix}/{first}')[0]:
+                directory = f'{self.prefix}/{first}/{second}'
+                for filename in self.listdir(directory)[1]:
+                    if BLOB_NAME.match(f'{directory}/{filename}'):
+                        yield f'{directory}/{filename}'
+
+    def get_available_name(self, name, max_length=None):
+        # Blob names are derived from content in _save(), never from `name`
+        return name
+
+    def _save(self, name, content):
+        # Only a digest computed for this very content is trusted, never one
+        # taken from the name
+        return self.store(content, os.path.splitext(name)[1], getattr(content, 'sha256', None))[0]
+
+def submission_storage():
+    return storages['submissions']
+
+def release_blob(name):
+    """
+    Delete the submission blob `name` once no submission references it.
+    Content-addressed blobs are shared, so the row count is the reference
+    count; the check runs after commit so a rolled back delete keeps it.
+    Blobs still within their grace period are left for the
+    sweep_submission_blobs command.
+    """
+    from .models import Submission
+
+    transaction.on_commit(lambda: submission_storage().delete_unreferenced(
+        name, Submission.objects.filter(file=name).exists
+    ))
@@ -1,3 +1,818 @@
-from django.test import TestCase
+import hashlib
+import math
+import os
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.forms import modelform_factory
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from schools.models import School, Department
+from accounts.cache import dashboard_key, get_dashboard_cache
+from courses.cache import bump_course_versions, get_fragment_cache_alias
+from courses.models import Course, CourseStats
+from courses.stats import rebuild_course_stats
+from .grading import GRADED_FIELDS, UPDATE_BATCH_SIZE, grade_submissions, import_marks
+from .models import Assignment, Submission
+from .storage import submission_storage
+from .validators import validate_pdf_stream
+
+
+class AssignmentListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='Science', code='SCI')
+        department = Department.objects.create(
+            name='Computer Science', code='CS', school=school
+        )
+        cls.lecturer = User.objects.create_user(
+            username='lecturer', password='pass', user_type='lecturer',
+            staff_number='S001', department=department
+        )
+        cls.student = User.objects.create_user(
+            username='student', password='pass', user_type='student',
+            registration_number='R001', department=department
+        )
+        cls.other_student = User.objects.create_user(
+            username='other', password='pass', user_type='student',
+            registration_number='R002', department=department
+        )
+        course = Course.objects.create(
+            code='CS101', name='Programming', department=department,
+            lecturer=cls.lecturer
+        )
+        cls.assignments = Assignment.objects.bulk_create([
+            Assignment(
+                title=f'Assignment {index}', course=course, description='',
+                due_date=timezone.now() + timedelta(days=index - 30),
+                total_marks=100, created_by=cls.lecturer
+            )
+            for index in range(60)
+        ])
+        cls.submissions = Submission.objects.bulk_create([
+            Submission(assignment=assignment, student=cls.student, content='answer')
+            for assignment in cls.assignments[::2]
+        ])
+        # Another student's submissions must not leak into the annotations
+        Submission.objects.bulk_create([
+            Submission(assignment=assignment, student=cls.other_student, content='answer')
+            for assignment in cls.assignments
+        ])
+
+    def test_student_list_uses_constant_queries(self):
+        self.client.force_login(self.student)
+        # Session, user and the annotated assignment query
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('assignments:assignment_list'))
+        self.assertEqual(response.status_code, 200)
+
+        own_submissions = {
+            submission.assignment_id: submission.pk for submission in self.submissions
+        }
+        for assignment in response.context['assignments']:
+            self.assertEqual(assignment.has_submitted, assignment.pk in own_submissions)
+            self.assertEqual(assignment.submission_id, own_submissions.get(assignment.pk))
+            if assignment.has_submitted:
+                self.assertContains(
+                    response,
+                    reverse('assignments:submission_detail', args=[assignment.submission_id])
+                )
+
+    def test_submission_lists_are_paginated(self):
+        self.client.force_login(self.lecturer)
+        url = reverse('assignments:pending_submissions')
+        response = self.client.get(url)
+        page = response.context['page_obj']
+        self.assertEqual(len(page), 25)
+        self.assertTrue(page.has_next)
+        self.assertEqual(response.context['course_submissions'][0].pending_count, 90)
+
+        seen = [submission.pk for submission in page]
+        while page.has_next:
+            page = self.client.get(url, {'after': page.next_cursor}).context['page_obj']
+            seen.extend(submission.pk for submission in page)
+        self.assertEqual(len(seen), 90)
+        self.assertEqual(len(set(seen)), 90)
+
+        self.client.force_login(self.student)
+        response = self.client.get(reverse('assignments:my_submissions'))
+        self.assertEqual(len(response.context['submissions']), 25)
+        self.assertEqual(response.context['summary']['total'], 30)
+
+    def test_lecturer_list_annotates_stats(self):
+        self.client.force_login(self.lecturer)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('assignments:assignment_list'))
+        for assignment in response.context['assignments']:
+            self.assertEqual(assignment.enrolled_count, 2)
+            self.assertIn(assignment.get_completion_rate(), (50, 100))
+
+class AssignmentStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='Science', code='SCI')
+        department = Department.objects.create(name='Computing', code='CS', school=school)
+        cls.lecturer = User.objects.create_user(
+            username='lecturer', user_type='lecturer', staff_number='S001'
+        )
+        students = [
+            User.objects.create_user(
+                username=f'student{index}', user_type='student',
+                registration_number=f'R{index:03}', department=department
+            )
+            for index in range(4)
+        ]
+        course = Course.objects.create(
+            code='CS101', name='Programming', department=department, lecturer=cls.lecturer
+        )
+        cls.assignment = Assignment.objects.create(
+            title='Essay', course=course, description='', total_marks=100,
+            due_date=timezone.now(), created_by=cls.lecturer
+        )
+        for student, marks in zip(students, [70, 85, None]):
+            Submission.objects.create(assignment=cls.assignment, student=student, marks=marks)
+        cls.empty_assignment = Assignment.objects.create(
+            title='Quiz', course=Course.objects.create(code='CS102', name='Empty', department=department),
+            description='', total_marks=10, due_date=timezone.now(), created_by=cls.lecturer
+        )
+        cls.empty_assignment.course.enrollments.all().delete()
+
+    def test_with_stats_annotates_in_one_query(self):
+        with self.assertNumQueries(1):
+            stats = {
+                assignment.title: assignment
+                for assignment in Assignment.objects.with_stats()
+            }
+        essay = stats['Essay']
+        self.assertEqual(essay.submission_count, 3)
+        self.assertEqual(essay.enrolled_count, 4)
+        self.assertEqual(essay.completion_rate, 75)
+        self.assertEqual(essay.average_score, 77.5)
+        self.assertEqual(stats['Quiz'].completion_rate, 0)
+        self.assertIsNone(stats['Quiz'].average_score)
+
+    def test_model_methods_aggregate_in_the_database(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.assignment.get_completion_rate(), 75)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.assignment.get_average_score(), 77.5)
+        self.assertEqual(self.empty_assignment.get_completion_rate(), 0)
+        self.assertIsNone(self.empty_assignment.get_average_score())
+
+class SubmitAssignmentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='Science', code='SCI')
+        department = Department.objects.create(name='Computing', code='CS', school=school)
+        cls.lecturer = User.objects.create_user(
+            username='lecturer', user_type='lecturer', staff_number='S001'
+        )
+        cls.student = User.objects.create_user(
+            username='student', user_type='student', registration_number='R001',
+            department=department
+        )
+        cls.outsider = User.objects.create_user(
+            username='outsider', user_type='student', registration_number='R002'
+        )
+        course = Course.objects.create(
+            code='CS101', name='Programming', department=department, lecturer=cls.lecturer
+        )
+        cls.assignment = Assignment.objects.create(
+            title='Essay', course=course, description='', total_marks=100,
+            due_date=timezone.now() + timedelta(days=1), created_by=cls.lecturer
+        )
+        cls.url = reverse('assignments:submit_assignment', args=[cls.assignment.pk])
+
+    def test_checks_run_in_one_query(self):
+        self.client.force_login(self.student)
+        # Session, user and the annotated assignment
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_outsider_and_duplicate_are_rejected(self):
+        self.client.force_login(self.outsider)
+        response = self.client.post(self.url, {'content': 'answer'})
+        self.assertRedirects(response, reverse('assignments:assignment_list'), fetch_redirect_response=False)
+
+        self.client.force_login(self.student)
+        self.client.post(self.url, {'content': 'answer'})
+        response = self.client.post(self.url, {'content': 'again'})
+        self.assertEqual(
+            [str(message) for message in get_messages(response.wsgi_request)][-1],
+            'You have already submitted this assignment.'
+        )
+        self.assertEqual(Submission.objects.filter(student=self.student).count(), 1)
+
+    def test_concurrent_duplicate_is_caught_by_the_constraint(self):
+        self.client.force_login(self.student)
+
+        def submit_concurrently(assignment):
+            # Another request saves a submission after the checks have passed
+            Submission.objects.create(assignment=assignment, student=self.student, content='first')
+            return False
+
+        with mock.patch.object(Assignment, 'is_past_due', autospec=True, side_effect=submit_concurrently):
+            response = self.client.post(self.url, {'content': 'second'})
+        self.assertRedirects(
+            response, reverse('assignments:assignment_detail', args=[self.assignment.pk]),
+            fetch_redirect_response=False
+        )
+        self.assertEqual(
+            [str(message) for message in get_messages(response.wsgi_request)],
+            ['You have already submitted this assignment.']
+        )
+        self.assertEqual(Submission.objects.get(student=self.student).content, 'first')
+
+    @override_settings(SUBMISSION_BLOB_GRACE_PERIOD=0)
+    def test_concurrent_duplicate_releases_its_upload(self):
+        self.client.force_login(self.student)
+        content = b'%PDF-1.4\nsecond\nstartxref\n0\n%%EOF\n'
+        digest = hashlib.sha256(content).hexdigest()
+
+        def submit_concurrently(assignment):
+            Submission.objects.create(assignment=assignment, student=self.student, content='first')
+            return False
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            with mock.patch.object(Assignment, 'is_past_due', autospec=True, side_effect=submit_concurrently), \
+                    self.captureOnCommitCallbacks(execute=True):
+                self.client.post(self.url, {'file': SimpleUploadedFile('answer.pdf', content)})
+            self.assertFalse(submission_storage().exists(submission_storage().blob_name(digest, '.pdf')))
+
+    def test_other_integrity_errors_are_not_reported_as_duplicates(self):
+        self.client.force_login(self.student)
+        with mock.patch.object(Submission, 'save', side_effect=IntegrityError('NOT NULL constraint failed')):
+            with self.assertRaises(IntegrityError):
+                self.client.post(self.url, {'content': 'answer'})
+
+    def test_large_upload_is_streamed_to_storage(self):
+        self.client.force_login(self.student)
+        content = b'%PDF-1.4\n' + b'0' * 400000 + b'\nstartxref\n0\n%%EOF\n'
+        upload = SimpleUploadedFile('answer.pdf', content, 'application/pdf')
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            response = self.client.post(self.url, {'file': upload})
+            self.assertRedirects(
+                response, reverse('assignments:assignment_detail', args=[self.assignment.pk]),
+                fetch_redirect_response=False
+            )
+            submission = Submission.objects.get(student=self.student)
+            digest = hashlib.sha256(content).hexdigest()
+            self.assertEqual(submission.file.name, f'blobs/{digest[:2]}/{digest[2:4]}/{digest}.pdf')
+            self.assertEqual(submission.file.size, len(content))
+            self.assertEqual(submission.sha256, digest)
+
+class PDFValidationTests(TestCase):
+    def upload(self, content):
+        # Large uploads arrive as temporary files, which are read in chunks
+        upload = TemporaryUploadedFile('answer.pdf', 'application/pdf', len(content), None)
+        self.addCleanup(upload.close)
+        upload.write(content)
+        upload.chunks_read = 0
+        chunks = upload.chunks
+
+        def counting_chunks(chunk_size=None):
+            for chunk in chunks(chunk_size):
+                upload.chunks_read += 1
+                yield chunk
+        upload.chunks = counting_chunks
+        return upload
+
+    def test_valid_pdf_returns_its_digest(self):
+        content = b'%PDF-1.7\n' + b'x' * 5000 + b'\nstartxref\n123\n%%EOF\n'
+        digest = validate_pdf_stream(self.upload(content), chunk_size=1000)
+        self.assertEqual(digest, hashlib.sha256(content).hexdigest())
+
+    def test_invalid_header_stops_after_first_chunk(self):
+        upload = self.upload(b'MZ' + b'x' * 10000)
+        with self.assertRaisesMessage(ValidationError, 'not a valid PDF'):
+            validate_pdf_stream(upload, chunk_size=1000)
+        self.assertEqual(upload.chunks_read, 1)
+
+    def test_oversized_stream_stops_at_the_limit(self):
+        upload = self.upload(b'%PDF-1.4\n' + b'x' * 10000)
+        # Size reported by the client cannot be trusted, so it is checked as bytes arrive
+        upload.size = None
+        with self.assertRaisesMessage(ValidationError, 'must not exceed'):
+            validate_pdf_stream(upload, max_size=2500, chunk_size=1000)
+        self.assertEqual(upload.chunks_read, 3)
+
+    def test_truncated_pdf_is_rejected(self):
+        with self.assertRaisesMessage(ValidationError, 'incomplete or damaged'):
+            validate_pdf_stream(self.upload(b'%PDF-1.4\n' + b'x' * 100))
+
+class SubmissionStorageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='Science', code='SCI')
+        department = Department.objects.create(name='Computing', code='CS', school=school)
+        lecturer = User.objects.create_user(username='lecturer', user_type='lecturer', staff_number='S001')
+        cls.students = [
+            User.objects.create_user(
+                username=f'student{index}', user_type='student',
+                registration_number=f'R{index:03}', department=department
+            )
+            for index in range(3)
+        ]
+        course = Course.objects.create(code='CS101', name='Programming', department=department)
+        cls.assignment = Assignment.objects.create(
+            title='Essay', course=course, description='', total_marks=100,
+            due_date=timezone.now(), created_by=lecturer
+        )
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.storage = submission_storage()
+
+    def submit(self, student, content, name='answer.pdf'):
+        submission = Submission(assignment=self.assignment, student=student)
+        submission.file.save(name, ContentFile(content), save=False)
+        submission.save()
+        return submission
+
+    @override_settings(SUBMISSION_BLOB_GRACE_PERIOD=0)
+    def test_identical_files_share_one_blob(self):
+        first = self.submit(self.students[0], b'%PDF-1.4 same')
+        second = self.submit(self.students[1], b'%PDF-1.4 same', name='copy.PDF')
+        other = self.submit(self.students[2], b'%PDF-1.4 different')
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertTrue(first.file.name.startswith('blobs/'))
+        self.assertNotEqual(first.file.name, other.file.name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(self.storage.exists(second.file.name))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(self.storage.exists(second.file.name))
+        self.assertTrue(self.storage.exists(other.file.name))
+
+    def age(self, name, seconds):
+        past = time.time() - seconds
+        os.utime(self.storage.path(name), (past, past))
+
+    def test_blobs_in_grace_period_are_left_for_the_sweep(self):
+        submission = self.submit(self.students[0], b'%PDF-1.4 recent')
+        kept = self.submit(self.students[1], b'%PDF-1.4 kept')
+        name = submission.file.name
+        with self.captureOnCommitCallbacks(execute=True):
+            submission.delete()
+        self.assertTrue(self.storage.exists(name))
+
+        self.age(name, 3600)
+        self.age(kept.file.name, 3600)
+        out = StringIO()
+        call_command('sweep_submission_blobs', stdout=out)
+        self.assertIn('Checked 2 blobs, deleted 1 unreferenced.', out.getvalue())
+        self.assertFalse(self.storage.exists(name))
+        self.assertTrue(self.storage.exists(kept.file.name))
+
+    def test_reusing_a_blob_protects_it_from_a_concurrent_release(self):
+        first = self.submit(self.students[0], b'%PDF-1.4 same')
+        self.age(first.file.name, 3600)
+        # An upload of the same content whose row isn't committed yet
+        name, created = self.storage.store(ContentFile(b'%PDF-1.4 same'), '.pdf')
+        self.assertFalse(created)
+        self.assertFalse(self.storage.delete_unreferenced(name, lambda: False))
+        self.assertTrue(self.storage.exists(name))
+
+    def test_validated_digest_is_not_hashed_again(self):
+        content = b'%PDF-1.4 validated'
+        upload = ContentFile(content, name='answer.pdf')
+        upload.sha256 = hashlib.sha256(content).hexdigest()
+        submission = Submission(assignment=self.assignment, student=self.students[0], file=upload)
+        with mock.patch.object(type(self.storage), 'hash_content') as hash_content:
+            submission.save()
+        hash_content.assert_not_called()
+        self.assertEqual(submission.sha256, upload.sha256)
+        self.assertEqual(submission.file.name, self.storage.blob_name(submission.sha256, '.pdf'))
+        self.assertTrue(self.storage.exists(submission.file.name))
+
+    @override_settings(SUBMISSION_BLOB_GRACE_PERIOD=0)
+    def test_replacing_the_file_outside_the_submission_form(self):
+        old = self.submit(self.students[0], b'%PDF-1.4 old')
+        old_name = old.file.name
+        SubmissionFileForm = modelform_factory(Submission, fields=['file'])
+
+        submission = Submission.objects.get(pk=old.pk)
+        form = SubmissionFileForm(
+            {}, {'file': SimpleUploadedFile('answer.pdf', b'%PDF-1.4 new')}, instance=submission
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            form.save()
+
+        submission.refresh_from_db()
+        digest = hashlib.sha256(b'%PDF-1.4 new').hexdigest()
+        self.assertEqual(submission.sha256, digest)
+        self.assertEqual(submission.file.name, self.storage.blob_name(digest, '.pdf'))
+        with submission.file.open() as stored:
+            self.assertEqual(stored.read(), b'%PDF-1.4 new')
+        self.assertFalse(self.storage.exists(old_name))
+
+    def test_digest_in_a_blob_shaped_name_is_not_trusted(self):
+        stale = self.storage.blob_name(hashlib.sha256(b'%PDF-1.4 old').hexdigest(), '.pdf')
+        name = self.storage.save(stale, ContentFile(b'%PDF-1.4 new'))
+        self.assertEqual(name, self.storage.blob_name(hashlib.sha256(b'%PDF-1.4 new').hexdigest(), '.pdf'))
+
+    def test_command_migrates_legacy_files(self):
+        legacy = []
+        for student in self.students:
+            name = f'submissions/{student.pk}/{self.assignment.pk}/template.pdf'
+            path = self.storage.path(name)
+            os.makedirs(os.path.dirname(path))
+            with open(path, 'wb') as legacy_file:
+                legacy_file.write(b'%PDF-1.4 shared template')
+            legacy.append(Submission(assignment=self.assignment, student=student, file=name))
+        Submission.objects.bulk_create(legacy)
+
+        out = StringIO()
+        call_command('migrate_submission_files', dry_run=True, stdout=out)
+        self.assertIn('Would migrate 3 files', out.getvalue())
+        self.assertTrue(self.storage.exists(legacy[0].file.name))
+
+        out = StringIO()
+        call_command('migrate_submission_files', stdout=out)
+        self.assertIn('72 bytes before, 24 bytes after, 48 bytes saved', out.getvalue())
+        names = set(Submission.objects.values_list('file', flat=True))
+        self.assertEqual(len(names), 1)
+        self.assertTrue(self.storage.exists(names.pop()))
+        self.assertFalse(self.storage.exists(legacy[0].file.name))
+
+class DownloadSubmissionTests(TestCase):
+    content = b'%PDF-1.4\n' + bytes(range(256)) * 100 + b'\nstartxref\n0\n%%EOF\n'
+
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='Science', code='SCI')
+        department = Department.objects.create(name='Computing', code='CS', school=school)
+        cls.lecturer = User.objects.create_user(username='lecturer', user_type='lecturer', staff_number='S001')
+        cls.student = User.objects.create_user(
+            username='student', user_type='student', registration_number='R001', department=department
+        )
+        cls.other = User.objects.create_user(
+            username='other', user_type='student', registration_number='R002', department=department
+        )
+        course = Course.objects.create(
+            code='CS101', name='Programming', department=department, lecturer=cls.lecturer
+        )
+        cls.assignment = Assignment.objects.create(
+            title='Essay', course=course, description='', total_marks=100,
+            due_date=timezone.now(), created_by=cls.lecturer
+        )
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.submission = Submission(
+            assignment=self.assignment, student=self.student,
+            sha256=hashlib.sha256(self.content).hexdigest()
+        )
+        self.submission.file.save('answer.pdf', ContentFile(self.content))
+        self.url = reverse('assignments:download_submission', args=[self.submission.pk])
+        self.etag = f'"{self.submission.sha256}"'
+
+    def test_only_student_and_lecturer_can_download(self):
+        self.client.force_login(self.other)
+        self.assertRedirects(
+            self.client.get(self.url), reverse('assignments:assignment_list'),
+            fetch_redirect_response=False
+        )
+        for user in (self.student, self.lecturer):
+            self.client.force_login(user)
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(b''.join(response.streaming_content), self.content)
+            self.assertEqual(response['ETag'], self.etag)
+            self.assertEqual(response['Accept-Ranges'], 'bytes')
+            self.assertEqual(response['Content-Type'], 'application/pdf')
+
+    def test_matching_etag_is_not_modified(self):
+        self.client.force_login(self.student)
+        response = self.client.get(self.url, headers={'If-None-Match': self.etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_byte_ranges(self):
+        self.client.force_login(self.student)
+        size = len(self.content)
+        response = self.client.get(self.url, headers={'Range': 'bytes=100-199'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{size}')
+        self.assertEqual(b''.join(response.streaming_content), self.content[100:200])
+
+        response = self.client.get(self.url, headers={'Range': 'bytes=-10'})
+        self.assertEqual(b''.join(response.streaming_content), self.content[-10:])
+
+        response = self.client.get(self.url, headers={'Range': f'bytes={size}-'})
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{size}')
+
+        # A stale If-Range gets the whole file
+        response = self.client.get(self.url, headers={'Range': 'bytes=0-9', 'If-Range': '"stale"'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_sendfile_offload(self):
+        self.client.force_login(self.student)
+        with override_settings(SENDFILE_BACKEND='nginx'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.submission.file.name}')
+        self.assertEqual(response.content, b'')
+
+        with override_settings(SENDFILE_BACKEND='apache'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Sendfile'], self.submission.file.path)
+
+class BulkGradingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='Science', code='SCI')
+        department = Department.objects.create(name='Computer Science', code='CS', school=school)
+        cls.lecturer = User.objects.create_user(
+            username='lecturer', password='pass', user_type='lecturer', staff_number='S001'
+        )
+        cls.other_lecturer = User.objects.create_user(
+            username='other', password='pass', user_type='lecturer', staff_number='S002'
+        )
+        cls.course = Course.objects.create(
+            code='CS101', name='Programming', department=department, lecturer=cls.lecturer
+        )
+        cls.assignment = Assignment.objects.create(
+            title='Essay', course=cls.course, description='', total_marks=20,
+            due_date=timezone.now(), created_by=cls.lecturer
+        )
+        students = User.objects.bulk_create([
+            User(username=f'student{index}', user_type='student', registration_number=f'R{index}')
+            for index in range(120)
+        ])
+        Submission.objects.bulk_create([
+            Submission(assignment=cls.assignment, student=student, content='answer')
+            for student in students
+        ])
+        rebuild_course_stats([cls.course.pk])
+        cls.url = reverse('assignments:bulk_grade', args=[cls.assignment.pk])
+
+    def post_grades(self, submissions, marks):
+        data = {
+            'form-TOTAL_FORMS': len(submissions),
+            'form-INITIAL_FORMS': len(submissions),
+            'submission': [submission.pk for submission in submissions],
+        }
+        for index, mark in enumerate(marks):
+            data[f'form-{index}-marks'] = '' if mark is None else mark
+            data[f'form-{index}-feedback'] = f'Feedback {index}'
+        return self.client.post(self.url, data)
+
+    def test_page_lists_ungraded_submissions(self):
+        self.client.force_login(self.lecturer)
+        # Session, user, assignment and the page of submissions
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url)
+        formset = response.context['formset']
+        self.assertEqual(len(formset.forms), 50)
+        self.assertTrue(response.context['page_obj'].has_next)
+        self.assertContains(response, 'name="submission"', count=50)
+
+    def test_grades_are_saved_with_constant_queries(self):
+        self.client.force_login(self.lecturer)
+        cache = get_dashboard_cache()
+        cache.set(dashboard_key('lecturer', self.lecturer.pk), {'stale': True})
+
+        for size in (5, 50):
+            submissions = list(Submission.objects.filter(marks__isnull=True).order_by('pk')[:size])
+            # Session, user, assignment, submissions, the locked read of their
+            # stored marks, bulk update and stats update, plus the
+            # transaction's savepoint and release
+            with self.assertNumQueries(9), self.captureOnCommitCallbacks(execute=True):
+                response = self.post_grades(submissions, [15] * (size - 1) + [None])
+            self.assertRedirects(response, self.url)
+
+        graded = Submission.objects.filter(marks__isnull=False)
+        self.assertEqual(graded.count(), 53)
+        self.assertFalse(graded.exclude(graded_by=self.lecturer).exists())
+        self.assertFalse(graded.filter(graded_at__isnull=True).exists())
+        self.assertEqual(graded.filter(feedback='Feedback 0').count(), 2)
+
+        stats = CourseStats.objects.get(course=self.course)
+        self.assertEqual(stats.graded_count, 53)
+        self.assertEqual(stats.ungraded_count, 67)
+        self.assertEqual(stats.marks_total, 53 * 15)
+        self.assertIsNone(cache.get(dashboard_key('lecturer', self.lecturer.pk)))
+
+    def test_grades_saved_meanwhile_keep_stats_exact(self):
+        submissions = list(Submission.objects.filter(marks__isnull=True).order_by('pk')[:2])
+        # Graded elsewhere after the page loaded these submissions
+        concurrent = Submission.objects.get(pk=submissions[0].pk)
+        concurrent.marks = 10
+        concurrent.save()
+
+        for submission in submissions:
+            submission.marks = 15
+        grade_submissions(self.assignment, submissions, self.lecturer)
+
+        stats = CourseStats.objects.get(course=self.course)
+        self.assertEqual((stats.graded_count, stats.ungraded_count, stats.marks_total), (2, 118, 30))
+
+    def test_invalid_marks_save_nothing(self):
+        self.client.force_login(self.lecturer)
+        submissions = list(Submission.objects.order_by('pk')[:3])
+        response = self.post_grades(submissions, [10, 25, 5])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.context['formset'].errors[1]['marks'],
+            ['Marks cannot exceed the total marks (20.00)']
+        )
+        self.assertFalse(Submission.objects.filter(marks__isnull=False).exists())
+
+    def test_only_course_lecturer_can_grade(self):
+        self.client.force_login(self.other_lecturer)
+        response = self.post_grades(list(Submission.objects.order_by('pk')[:1]), [10])
+        self.assertRedirects(
+            response, reverse('assignments:assignment_detail', args=[self.assignment.pk]),
+            fetch_redirect_response=False
+        )
+        self.assertFalse(Submission.objects.filter(marks__isnull=False).exists())
+
+class MarksImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='Science', code='SCI')
+        department = Department.objects.create(name='Computer Science', code='CS', school=school)
+        cls.lecturer = User.objects.create_user(
+            username='lecturer', password='pass', user_type='lecturer', staff_number='S001'
+        )
+        course = Course.objects.create(
+            code='CS101', name='Programming', department=department, lecturer=cls.lecturer
+        )
+        cls.assignment = Assignment.objects.create(
+            title='Exam', course=course, description='', total_marks=50,
+            due_date=timezone.now(), created_by=cls.lecturer
+        )
+        cls.students = User.objects.bulk_create([
+            User(username=f'student{index}', user_type='student', registration_number=f'R{index}')
+            for index in range(5)
+        ])
+        User.objects.create_user(username='absent', user_type='student', registration_number='R99')
+        Submission.objects.bulk_create([
+            Submission(assignment=cls.assignment, student=student) for student in cls.students
+        ])
+        rebuild_course_stats([course.pk])
+        cls.url = reverse('assignments:upload_marks', args=[cls.assignment.pk])
+
+    def upload(self, text):
+        return self.client.post(self.url, {
+            'csv_file': SimpleUploadedFile('marks.csv', text.encode(), content_type='text/csv')
+        })
+
+    def test_valid_rows_are_applied_and_errors_reported(self):
+        self.client.force_login(self.lecturer)
+        response = self.upload(
+            'registration_number,marks,feedback\n'
+            'R0,45,Excellent\n'
+            'R1,51,Too high\n'
+            'R2,abc,\n'
+            'R99,30,No submission\n'
+            'R0,10,Duplicate\n'
+            ',20,\n'
+            'R3,-1,\n'
+            'R4,12.5,\n'
+        )
+        self.assertEqual(response.status_code, 200)
+        result = response.context['result']
+        self.assertEqual((result['graded'], result['read']), (2, 8))
+        self.assertEqual([line for line, _ in result['errors']], [3, 4, 5, 6, 7, 8])
+        self.assertIn('cannot exceed the total marks (50.00)', result['errors'][0][1])
+        self.assertIn("no submission from registration number 'R99'", result['errors'][2][1])
+
+        graded = {
+            submission.student.registration_number: submission
+            for submission in Submission.objects.filter(marks__isnull=False).select_related('student')
+        }
+        self.assertEqual(sorted(graded), ['R0', 'R4'])
+        self.assertEqual(graded['R0'].marks, 45)
+        self.assertEqual(graded['R0'].feedback, 'Excellent')
+        self.assertEqual(graded['R0'].graded_by, self.lecturer)
+        self.assertIsNotNone(graded['R4'].graded_at)
+        self.assertEqual(graded['R4'].marks, Decimal('12.5'))
+
+        stats = CourseStats.objects.get(course=self.assignment.course)
+        self.assertEqual((stats.graded_count, stats.ungraded_count), (2, 3))
+        self.assertEqual(stats.marks_total, Decimal('57.5'))
+
+    def test_missing_columns_are_rejected(self):
+        self.client.force_login(self.lecturer)
+        response = self.upload('student,score\nR0,10\n')
+        self.assertFormError(response.context['form'], 'csv_file', 'Missing columns: marks, registration_number')
+        self.assertFalse(Submission.objects.filter(marks__isnull=False).exists())
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as marks:
+            marks.write('registration_number,marks\nR1,20\nR7,20\n')
+        self.addCleanup(os.remove, marks.name)
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_marks', self.assignment.pk, marks.name, stdout=stdout, stderr=stderr)
+        self.assertIn('Graded 1 of 2 rows (1 skipped)', stdout.getvalue())
+        self.assertIn("line 3: no submission from registration number 'R7'", stderr.getvalue())
+        submission = Submission.objects.get(student__registration_number='R1')
+        self.assertEqual((submission.marks, submission.graded_by), (20, self.lecturer))
+
+    def test_ten_thousand_rows_use_batched_queries(self):
+        students = User.objects.bulk_create([
+            User(username=f'bulk{index}', user_type='student', registration_number=f'B{index}')
+            for index in range(10000)
+        ])
+        Submission.objects.bulk_create([
+            Submission(assignment=self.assignment, student=student) for student in students
+        ])
+        text = 'registration_number,marks,feedback\n' + ''.join(
+            f'B{index},{index % 50},Row {index}\n' for index in range(10000)
+        )
+        assignment = Assignment.objects.select_related('course').get(pk=self.assignment.pk)
+        # The submissions lookup, bulk_update's batches (smaller than
+        # UPDATE_BATCH_SIZE where the backend limits query parameters) and
+        # the CourseStats update, plus the transaction's savepoint and release
+        batch_size = min(UPDATE_BATCH_SIZE, connection.ops.bulk_batch_size(
+            ['pk', 'pk'] + GRADED_FIELDS, students
+        ))
+        with self.assertNumQueries(4 + math.ceil(10000 / batch_size)):
+            graded, read, errors = import_marks(assignment, StringIO(text), self.lecturer)
+        self.assertEqual((graded, read, errors), (10000, 10000, []))
+        self.assertEqual(Submission.objects.filter(feedback='Row 9999', marks=49).count(), 1)
+        self.assertEqual(CourseStats.objects.get(course=assignment.course).graded_count, 10000)
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+})
+class AssignmentDetailCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='Science', code='SCI')
+        department = Department.objects.create(name='Computer Science', code='CS', school=school)
+        cls.lecturer = User.objects.create_user(
+            username='lecturer', password='pass', user_type='lecturer', staff_number='S001'
+        )
+        cls.course = Course.objects.create(
+            code='CS101', name='Programming', department=department, lecturer=cls.lecturer
+        )
+        cls.assignment = Assignment.objects.create(
+            title='Essay', course=cls.course, description='', total_marks=20,
+            due_date=timezone.now(), created_by=cls.lecturer
+        )
+        cls.url = reverse('assignments:assignment_detail', args=[cls.assignment.pk])
+
+    def setUp(self):
+        caches[get_fragment_cache_alias()].clear()
+        self.client.force_login(self.lecturer)
+
+    def add_submissions(self, count, start=0):
+        students = User.objects.bulk_create([
+            User(username=f'student{index}', user_type='student', registration_number=f'R{index}')
+            for index in range(start, start + count)
+        ])
+        Submission.objects.bulk_create([
+            Submission(assignment=self.assignment, student=student, content='answer')
+            for student in students
+        ])
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_course_versions([self.course.pk])
+
+    def test_cache_miss_runs_constant_queries(self):
+        for count, start in [(2, 0), (30, 2)]:
+            self.add_submissions(count, start)
+            # Session, user, assignment and the submissions with their students
+            with self.assertNumQueries(4):
+                response = self.client.get(self.url)
+            self.assertContains(response, f'R{start + count - 1}')
+
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'R31')
+
+    def test_bulk_grading_refreshes_cached_table(self):
+        self.add_submissions(2)
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            import_marks(self.assignment, ['registration_number,marks', 'R1,15'], self.lecturer)
+        response = self.client.get(self.url)
+        self.assertContains(response, '15.00/20')
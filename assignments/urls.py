@@ -11,7 +11,10 @@ urlpatterns = [
     path('<int:pk>/delete/', views.delete_assignment, name='delete_assignment'),
     path('<int:pk>/submit/', views.submit_assignment, name='submit_assignment'),
     path('submission/<int:pk>/', views.submission_detail, name='submission_detail'),
+    path('submission/<int:pk>/download/', views.download_submission, name='download_submission'),
     path('submission/<int:pk>/grade/', views.grade_submission, name='grade_submission'),
+    path('<int:pk>/grade/', views.bulk_grade, name='bulk_grade'),
+    path('<int:pk>/marks/upload/', views.upload_marks, name='upload_marks'),
     path('my-submissions/', views.my_submissions, name='my_submissions'),
     path('pending-submissions/', views.pending_submissions, name='pending_submissions'),
 ]
\ No newline at end of file
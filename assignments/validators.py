@@ -0,0 +1,44 @@
+import hashlib
+import re
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+PDF_HEADER = re.compile(rb'^%PDF-\d\.\d')
+# Readers look for the trailer in the last kilobyte of the file
+TRAILER_WINDOW = 1024
+
+def validate_pdf_stream(file, max_size=None, chunk_size=64 * 1024):
+    """
+    Validate an uploaded PDF in a single pass over file.chunks() and return
+    its SHA-256 hex digest.
+
+    The header is checked on the first chunk and the size is checked as
+    bytes arrive, so invalid or oversized uploads stop being read early.
+    Only the current chunk and the trailing window are held in memory,
+    whatever the file size.
+    """
+    max_size = max_size or settings.MAX_UPLOAD_SIZE
+    if file.size is not None and file.size > max_size:
+        raise ValidationError(f'File size must not exceed {max_size // 1048576}MB.')
+
+    digest = hashlib.sha256()
+    head = b''
+    tail = b''
+    size = 0
+    for chunk in file.chunks(chunk_size):
+        size += len(chunk)
+        if size > max_size:
+            raise ValidationError(f'File size must not exceed {max_size // 1048576}MB.')
+        if len(head) < 16:
+            head += chunk[:16 - len(head)]
+            if len(head) >= 8 and not PDF_HEADER.match(head):
+                raise ValidationError('The file is not a valid PDF document.')
+        digest.update(chunk)
+        tail = (tail + chunk)[-TRAILER_WINDOW:]
+
+    if not PDF_HEADER.match(head):
+        raise ValidationError('The file is not a valid PDF document.')
+    if b'startxref' not in tail or b'%%EOF' not in tail:
+        raise ValidationError('The PDF document is incomplete or damaged.')
+    return digest.hexdigest()
@@ -1,33 +1,52 @@
+import csv
+import io
+import os
+
 from django.shortcuts import render, redirect, get_object_or_404
+from django.core.exceptions import ValidationError
+from django.http import Http404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
-from django.db.models import Q
+from django.db import IntegrityError, transaction
+from django.db.models import Q, Avg, Count, Exists, FloatField, OuterRef, Subquery
+from django.db.models.functions import Cast
 from .models import Assignment, Submission
-from .forms import AssignmentForm, SubmissionForm, GradingForm
-from courses.models import Course
+from .forms import AssignmentForm, SubmissionForm, GradingForm, BulkGradingFormSet, MarksImportForm
+from .grading import BULK_GRADING_PAGE_SIZE, grade_submissions, import_marks
+from .downloads import serve_file
+from .storage import release_blob
+from courses.cache import fragment_context
+from courses.models import Course, Enrollment
+from core.pagination import paginate_keyset
+from core.routers import read_from_replica
 
 @login_required
+@read_from_replica
 def assignment_list(request):
     if request.user.is_student():
+        # Annotate submission status so the list renders without per-row queries
+        own_submissions = Submission.objects.filter(
+            assignment=OuterRef('pk'),
+            student=request.user
+        )
         assignments = Assignment.objects.filter(
-            course__enrollments__student=request.user
-        ).select_related('course', 'course__lecturer')
-        
-        # Add submission status to each assignment
-        for assignment in assignments:
-            assignment.has_submitted = Submission.objects.filter(
-                assignment=assignment,
-                student=request.user
-            ).exists()
+            course__enrollments__student=request.user,
+            course__enrollments__status__in=Enrollment.ACTIVE_STATUSES
+        ).select_related('course', 'course__lecturer').annotate(
+            has_submitted=Exists(own_submissions),
+            submission_id=Subquery(own_submissions.values('pk')[:1])
+        )
             
     else:
         assignments = Assignment.objects.filter(
             course__lecturer=request.user
-        ).select_related('course')
+        ).select_related('course').with_stats()
     
+    page = paginate_keyset(request, assignments)
     return render(request, 'assignments/assignment_list.html', {
-        'assignments': assignments
+        'assignments': page,
+        'page_obj': page
     })
 
 @login_required
@@ -52,6 +71,11 @@ def assignment_detail(request, pk):
     else:
         context['can_view'] = True  # Lecturers can view all submissions
     
+    if context['is_lecturer']:
+        # Evaluated by the template only when the cached table misses
+        context['submissions'] = assignment.submissions.select_related('student')
+        context.update(fragment_context(assignment.course_id))
+    
     return render(request, 'assignments/assignment_detail.html', context)
 
 @login_required
@@ -108,15 +132,28 @@ def delete_assignment(request, pk):
 
 @login_required
 def submit_assignment(request, pk):
-    assignment = get_object_or_404(Assignment, pk=pk)
+    # Enrollment and duplicate checks are folded into the assignment query
+    assignment = get_object_or_404(
+        Assignment.objects.select_related('course').annotate(
+            is_enrolled=Exists(Enrollment.objects.active().filter(
+                course=OuterRef('course'),
+                student=request.user
+            )),
+            has_submitted=Exists(Submission.objects.filter(
+                assignment=OuterRef('pk'),
+                student=request.user
+            ))
+        ),
+        pk=pk
+    )
     
     # Check if student is enrolled in the course
-    if not assignment.course.enrollments.filter(student=request.user).exists():
+    if not assignment.is_enrolled:
         messages.error(request, 'You are not enrolled in this course.')
         return redirect('assignments:assignment_list')
     
     # Check if student has already submitted
-    if Submission.objects.filter(assignment=assignment, student=request.user).exists():
+    if assignment.has_submitted:
         messages.error(request, 'You have already submitted this assignment.')
         return redirect('assignments:assignment_detail', pk=pk)
     
@@ -130,7 +167,20 @@ def submit_assignment(request, pk):
             submission = form.save(commit=False)
             submission.assignment = assignment
             submission.student = request.user
-            submission.save()
+            try:
+                # The unique constraint settles concurrent double submissions
+                with transaction.atomic():
+                    submission.save()
+            except IntegrityError:
+                # Only a submission saved first by a concurrent request means
+                # a duplicate; anything else is a real error
+                if not Submission.objects.filter(assignment=assignment, student=request.user).exists():
+                    raise
+                # The upload was already written to storage
+                if submission.file.name:
+                    release_blob(submission.file.name)
+                messages.error(request, 'You have already submitted this assignment.')
+                return redirect('assignments:assignment_detail', pk=pk)
             messages.success(request, 'Assignment submitted successfully.')
             return redirect('assignments:assignment_detail', pk=pk)
     else:
@@ -158,6 +208,30 @@ def submission_detail(request, pk):
         'submission': submission
     })
 
+@login_required
+def download_submission(request, pk):
+    submission = get_object_or_404(
+        Submission.objects.select_related('assignment__course'),
+        pk=pk
+    )
+    
+    # Same rules as submission_detail
+    if not (request.user.pk == submission.student_id or 
+            request.user.pk == submission.assignment.course.lecturer_id):
+        messages.error(request, 'You do not have permission to view this submission.')
+        return redirect('assignments:assignment_list')
+    
+    if not submission.file:
+        raise Http404('This submission has no file.')
+    
+    # Blob names and digests never change for the same content
+    etag = submission.sha256 or submission.file.name
+    filename = f'submission-{submission.pk}{os.path.splitext(submission.file.name)[1]}'
+    try:
+        return serve_file(request, submission.file, etag, filename)
+    except FileNotFoundError:
+        raise Http404('The submitted file is missing from storage.')
+
 @login_required
 def grade_submission(request, pk):
     submission = get_object_or_404(
@@ -187,6 +261,79 @@ def grade_submission(request, pk):
     })
 
 @login_required
+def bulk_grade(request, pk):
+    assignment = get_object_or_404(
+        Assignment.objects.select_related('course', 'course__lecturer'),
+        pk=pk
+    )
+
+    if request.user != assignment.course.lecturer:
+        messages.error(request, 'You do not have permission to grade this assignment.')
+        return redirect('assignments:assignment_detail', pk=pk)
+
+    page = None
+    if request.method == 'POST':
+        # Each row posts its submission id, in the order of the formset
+        submission_ids = [int(pk) for pk in request.POST.getlist('submission') if pk.isdigit()]
+        found = assignment.submissions.select_related('student').in_bulk(submission_ids)
+        if len(found) != len(submission_ids):
+            messages.error(request, 'Some submissions are no longer available. Please grade the page again.')
+            return redirect('assignments:bulk_grade', pk=pk)
+        submissions = [found[pk] for pk in submission_ids]
+        formset = BulkGradingFormSet(assignment, submissions, request.POST)
+        if formset.is_valid():
+            graded = grade_submissions(assignment, formset.graded_submissions(), request.user)
+            messages.success(request, f'{graded} submission{"s" if graded != 1 else ""} graded successfully.')
+            return redirect('assignments:bulk_grade', pk=pk)
+    else:
+        ungraded = assignment.submissions.filter(
+            marks__isnull=True
+        ).select_related('student').order_by('submitted_at')
+        page = paginate_keyset(request, ungraded, BULK_GRADING_PAGE_SIZE)
+        formset = BulkGradingFormSet(assignment, page)
+
+    return render(request, 'assignments/bulk_grade.html', {
+        'assignment': assignment,
+        'formset': formset,
+        'page_obj': page
+    })
+
+@login_required
+def upload_marks(request, pk):
+    assignment = get_object_or_404(
+        Assignment.objects.select_related('course', 'course__lecturer'),
+        pk=pk
+    )
+
+    if request.user != assignment.course.lecturer:
+        messages.error(request, 'You do not have permission to grade this assignment.')
+        return redirect('assignments:assignment_detail', pk=pk)
+
+    result = None
+    if request.method == 'POST':
+        form = MarksImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            # Decode the upload as it is read instead of loading it whole
+            lines = io.TextIOWrapper(form.cleaned_data['csv_file'].file, encoding='utf-8-sig', newline='')
+            try:
+                graded, read, errors = import_marks(assignment, lines, request.user)
+            except (ValidationError, UnicodeDecodeError, csv.Error) as exc:
+                form.add_error('csv_file', exc.messages if isinstance(exc, ValidationError) else str(exc))
+            else:
+                result = {'graded': graded, 'read': read, 'errors': errors}
+                if graded:
+                    messages.success(request, f'Imported marks for {graded} of {read} rows.')
+    else:
+        form = MarksImportForm()
+
+    return render(request, 'assignments/upload_marks.html', {
+        'assignment': assignment,
+        'form': form,
+        'result': result
+    })
+
+@login_required
+@read_from_replica
 def my_submissions(request):
     if not request.user.is_student():
         messages.error(request, 'Only students can view their submissions.')
@@ -197,11 +344,25 @@ def my_submissions(request):
         'assignment__course'
     ).order_by('-submitted_at')
     
+    # Summary covers every submission, not just the current page
+    summary = request.user.submissions.aggregate(
+        total=Count('pk'),
+        graded=Count('marks'),
+        average_score=Avg(
+            Cast('marks', FloatField()) * 100 /
+            Cast('assignment__total_marks', FloatField())
+        )
+    )
+    
+    page = paginate_keyset(request, submissions)
     return render(request, 'assignments/my_submissions.html', {
-        'submissions': submissions
+        'submissions': page,
+        'page_obj': page,
+        'summary': summary
     })
 
 @login_required
+@read_from_replica
 def pending_submissions(request):
     if not request.user.is_lecturer():
         messages.error(request, 'Only lecturers can view pending submissions.')
@@ -216,6 +377,19 @@ def pending_submissions(request):
         'assignment__course'
     ).order_by('submitted_at')
     
+    # Per-course pending counts for the summary cards
+    course_submissions = Course.objects.filter(
+        lecturer=request.user
+    ).annotate(
+        pending_count=Count(
+            'assignments__submissions',
+            filter=Q(assignments__submissions__marks__isnull=True)
+        )
+    ).filter(pending_count__gt=0)
+    
+    page = paginate_keyset(request, submissions)
     return render(request, 'assignments/pending_submissions.html', {
-        'submissions': submissions
+        'submissions': page,
+        'page_obj': page,
+        'course_submissions': course_submissions
     })
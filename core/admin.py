@@ -1,3 +1,65 @@
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.utils import get_last_value_from_parameters
+from django.contrib.admin.views.main import PAGE_VAR
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.utils.translation import gettext_lazy as _
 
-# Register your models here.
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    Related-field list filter that picks its value with the admin's select2
+    autocomplete instead of listing every related object, so the sidebar
+    only ever loads the selected one. The related model's admin must define
+    search_fields, and the ModelAdmin must include AutocompleteFilterMixin
+    for the widget's media.
+    """
+    template = 'admin/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f'{field_path}__{field.target_field.name}__exact'
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.lookup_val = get_last_value_from_parameters(self.used_parameters, self.lookup_kwarg)
+        self.admin_site = model_admin.admin_site
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def widget(self, changelist):
+        field = forms.ModelChoiceField(
+            queryset=self.field.remote_field.model._default_manager.all(),
+            widget=AutocompleteSelect(self.field, self.admin_site, attrs={
+                'class': 'autocomplete-filter',
+                'data-query-string': changelist.get_query_string(remove=[self.lookup_kwarg, PAGE_VAR]),
+                'style': 'width: 100%',
+            }),
+            required=False
+        )
+        return field.widget.render(self.lookup_kwarg, self.lookup_val)
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.lookup_val is None,
+            'query_string': changelist.get_query_string(remove=[self.lookup_kwarg]),
+            'display': _('All'),
+            'widget': self.widget(changelist),
+        }
+
+class AutocompleteFilterMixin:
+    """
+    Add the select2 media used by AutocompleteFilter to a ModelAdmin.
+    """
+    @property
+    def media(self):
+        return super().media + forms.Media(
+            js=[
+                'admin/js/vendor/jquery/jquery.js',
+                'admin/js/vendor/select2/select2.full.js',
+                'admin/js/jquery.init.js',
+                'admin/js/autocomplete.js',
+                'js/autocomplete_filter.js',
+            ],
+            css={'screen': [
+                'admin/css/vendor/select2/select2.css',
+                'admin/css/autocomplete.css',
+            ]}
+        )
@@ -0,0 +1,319 @@
+import statistics
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import OperationalError, connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import URLResolver, get_resolver, reverse
+from django.utils import timezone
+from accounts.models import User
+from assignments.models import Assignment, Submission
+from courses.enrollment import department_student_ids
+from courses.models import Course
+
+BENCHMARKED_NAMESPACES = ('accounts', 'courses', 'assignments', 'schools')
+
+# Views that change data on GET would skew repeated runs
+SKIPPED_URLS = {
+    'accounts:logout',
+    'courses:enroll_course',
+    'courses:drop_course',
+    # Synthetic submissions have no stored file to download
+    'assignments:download_submission',
+}
+
+@contextmanager
+def throwaway_database(name=None):
+    """
+    Run the block against a freshly migrated test database that is
+    destroyed afterwards, so benchmarks never touch real data.
+
+    SQLite test databases live in memory unless a file `name` is given;
+    concurrency benchmarks need a file so every thread sees the same data.
+    """
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    old_test_name = connection.settings_dict['TEST'].get('NAME')
+    if name is not None:
+        connection.settings_dict['TEST']['NAME'] = name
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        connection.settings_dict['TEST']['NAME'] = old_test_name
+        teardown_test_environment()
+
+def named_urls(namespaces=BENCHMARKED_NAMESPACES):
+    """
+    Return (url_name, parameter_names) for every named URL in the given
+    namespaces.
+    """
+    urls = []
+    for resolver in get_resolver().url_patterns:
+        if not isinstance(resolver, URLResolver) or resolver.namespace not in namespaces:
+            continue
+        for pattern in resolver.url_patterns:
+            if not pattern.name:
+                continue
+            url_name = f'{resolver.namespace}:{pattern.name}'
+            if url_name not in SKIPPED_URLS:
+                urls.append((url_name, list(pattern.pattern.converters)))
+    return urls
+
+def sample_objects():
+    """
+    Pick a lecturer, one of their courses, a student enrolled in it and
+    related rows to fill in URL parameters.
+    """
+    course = Course.objects.filter(
+        lecturer__isnull=False,
+        enrollments__isnull=False,
+        assignments__submissions__isnull=False
+    ).select_related('department__school', 'lecturer').first()
+    if course is None:
+        raise ValueError('The database has no course with enrollments and submissions.')
+    submission = Submission.objects.filter(
+        assignment__course=course
+    ).select_related('assignment', 'student').first()
+    return {
+        'lecturer': course.lecturer,
+        'student': submission.student,
+        'course': course,
+        'assignment': submission.assignment,
+        'submission': submission,
+        'department': course.department,
+        'school': course.department.school,
+    }
+
+def url_kwargs(url_name, parameters, objects):
+    namespace, name = url_name.split(':')
+    if namespace == 'schools':
+        target = objects['department' if name.startswith('department') else 'school']
+    elif namespace == 'assignments' and 'course_id' not in parameters:
+        target = objects['submission' if 'submission' in name else 'assignment']
+    else:
+        target = objects['course']
+    return {parameter: target.pk for parameter in parameters}
+
+def measure(client, url, repeat):
+    """
+    Request a URL `repeat` times and return its query count, latency
+    percentiles and response size. Caches are cleared before every request
+    so the uncached code path is what gets measured.
+    """
+    timings = []
+    status = None
+    for _ in range(repeat):
+        for cache in caches.all():
+            cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = client.get(url)
+            if response.streaming:
+                size = sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                size = len(response.content)
+            timings.append((time.perf_counter() - started) * 1000)
+        # Keep the first failing status rather than a later successful one
+        if status is None or is_success(status):
+            status = response.status_code
+
+    timings.sort()
+    return {
+        'status': status,
+        'queries': len(queries.captured_queries),
+        'p50_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+        'bytes': size,
+    }
+
+def run_benchmark(repeat=5):
+    """
+    Request every benchmarked URL as both a student and a lecturer and
+    return the measurements keyed by '<url name>@<role>'.
+    """
+    objects = sample_objects()
+    results = {}
+    for role in ('student', 'lecturer'):
+        client = Client(raise_request_exception=False)
+        client.force_login(objects[role])
+        for url_name, parameters in named_urls():
+            url = reverse(url_name, kwargs=url_kwargs(url_name, parameters, objects))
+            results[f'{url_name}@{role}'] = measure(client, url, repeat)
+    return results
+
+def is_success(status):
+    return 200 <= status < 400
+
+def server_errors(results, baseline=None):
+    """
+    Return a human readable line for every result whose URL answered with
+    a 5xx status, so errors aren't reported as timings. Errors the baseline
+    already records with the same status are known and left out.
+    """
+    baseline = baseline or {}
+    return [
+        f"{key}: status {result['status']}"
+        for key, result in sorted(results.items())
+        if result['status'] >= 500 and baseline.get(key, {}).get('status') != result['status']
+    ]
+
+def compare_to_baseline(results, baseline, latency_tolerance=0.5, size_tolerance=0.1):
+    """
+    Return a list of human readable regressions of `results` against
+    `baseline`. The status must not change and query counts must not grow
+    at all; latency and response size may grow by the given fractions
+    before they count as regressions.
+    """
+    regressions = []
+    for key, expected in sorted(baseline.items()):
+        actual = results.get(key)
+        if actual is None:
+            continue
+        if 'status' in expected and actual['status'] != expected['status']:
+            regressions.append(f"{key}: status {actual['status']} (baseline {expected['status']})")
+        if actual['queries'] > expected['queries']:
+            regressions.append(f"{key}: {actual['queries']} queries (baseline {expected['queries']})")
+        if actual['p95_ms'] > expected['p95_ms'] * (1 + latency_tolerance):
+            regressions.append(f"{key}: p95 {actual['p95_ms']}ms (baseline {expected['p95_ms']}ms)")
+        if actual['bytes'] > expected['bytes'] * (1 + size_tolerance):
+            regressions.append(f"{key}: {actual['bytes']} bytes (baseline {expected['bytes']})")
+    return regressions
+
+def hot_path_indexes():
+    """
+    Return (model, index) for the indexes declared for the hot filter paths.
+    """
+    return [
+        (model, index)
+        for model in (User, Course, Assignment, Submission)
+        for index in model._meta.indexes
+    ]
+
+@contextmanager
+def without_indexes(indexes):
+    """
+    Drop the given indexes for the duration of the block and recreate them
+    afterwards.
+    """
+    with connection.schema_editor() as editor:
+        for model, index in indexes:
+            editor.remove_index(model, index)
+    try:
+        yield
+    finally:
+        with connection.schema_editor() as editor:
+            for model, index in indexes:
+                editor.add_index(model, index)
+
+def hot_queries(objects):
+    """
+    The querysets behind the hottest filters, shaped like the views run
+    them (first page of paginated lists).
+    """
+    lecturer, student = objects['lecturer'], objects['student']
+    return {
+        'pending_submissions': Submission.objects.filter(
+            assignment__course__lecturer=lecturer, marks__isnull=True
+        ).order_by('submitted_at', 'pk')[:26],
+        'my_submissions': Submission.objects.filter(
+            student=student
+        ).order_by('-submitted_at', '-pk')[:26],
+        'upcoming_assignments': Assignment.objects.filter(
+            course__enrollments__student=student, due_date__gt=timezone.now()
+        ).exclude(submissions__student=student).order_by('due_date'),
+        'active_department_courses': Course.objects.filter(
+            department=objects['department'], is_active=True
+        ).order_by(),
+        'department_students': department_student_ids(objects['department'].pk),
+    }
+
+def explain_hot_queries(objects, repeat=5):
+    """
+    Return the query plan and median execution time of every hot query.
+    """
+    results = {}
+    for name, queryset in hot_queries(objects).items():
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(queryset.all())
+            timings.append((time.perf_counter() - started) * 1000)
+        results[name] = {
+            'plan': queryset.explain(),
+            'median_ms': round(statistics.median(timings), 2),
+        }
+    return results
+
+def submission_burst(concurrency=200, assignments=1, file_size=0):
+    """
+    POST submissions from `concurrency` threads released at the same
+    moment, as at a deadline. Every thread submits to each of the first
+    `assignments` assignments in turn, so more than one assignment
+    measures sustained throughput rather than a single burst. With
+    `file_size` (bytes) each submission also uploads a PDF of that size.
+
+    Needs a file database holding at least `concurrency` students enrolled
+    in the course of those assignments. Returns the elapsed time,
+    successful submissions and "database is locked" failures.
+    """
+    targets = list(Assignment.objects.order_by('pk')[:assignments])
+    Assignment.objects.filter(pk__in=[target.pk for target in targets]).update(
+        due_date=timezone.now() + timedelta(days=1)
+    )
+    Submission.objects.filter(assignment__in=targets).delete()
+    students = list(User.objects.filter(
+        enrollments__course=targets[0].course_id
+    ).order_by('pk')[:concurrency])
+    if len(students) < concurrency:
+        raise ValueError(f'Only {len(students)} students are enrolled in {targets[0].course}.')
+
+    urls = [reverse('assignments:submit_assignment', args=[target.pk]) for target in targets]
+    trailer = b'\nstartxref\n0\n%%EOF\n'
+    pdf = b'%PDF-1.4\n' + b'0' * max(file_size - 9 - len(trailer), 0) + trailer
+    clients = []
+    for student in students:
+        client = Client()
+        client.force_login(student)
+        clients.append(client)
+    barrier = threading.Barrier(concurrency + 1)
+
+    def submit(client):
+        outcomes = []
+        barrier.wait()
+        for url in urls:
+            data = {'content': 'Submitted at the deadline'}
+            if file_size:
+                data['file'] = SimpleUploadedFile('answer.pdf', pdf, 'application/pdf')
+            try:
+                response = client.post(url, data)
+                outcomes.append('ok' if response.status_code == 302 else f'status {response.status_code}')
+            except OperationalError as exc:
+                outcomes.append('locked' if 'locked' in str(exc) else 'error')
+        connections.close_all()
+        return outcomes
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(submit, client) for client in clients]
+        barrier.wait()
+        started = time.perf_counter()
+        outcomes = [outcome for future in futures for outcome in future.result()]
+        elapsed = time.perf_counter() - started
+
+    succeeded, locked = outcomes.count('ok'), outcomes.count('locked')
+    return {
+        'requests': len(outcomes),
+        'seconds': round(elapsed, 3),
+        'succeeded': succeeded,
+        'locked': locked,
+        'other_failures': len(outcomes) - succeeded - locked,
+        'saved': Submission.objects.filter(assignment__in=targets).count(),
+        'submissions_per_second': round(succeeded / elapsed, 1),
+    }
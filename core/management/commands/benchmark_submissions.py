@@ -0,0 +1,59 @@
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from core.benchmark import submission_burst, throwaway_database
+from core.synthetic import generate_university
+
+class Command(BaseCommand):
+    help = (
+        'Simulate simultaneous submit_assignment POSTs against a throwaway SQLite file '
+        'database and report throughput and "database is locked" errors.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=200,
+            help='Simultaneous submissions (default 200).'
+        )
+        parser.add_argument(
+            '--assignments',
+            type=int,
+            default=1,
+            help='Assignments each student submits to in turn; more than one measures sustained load.'
+        )
+        parser.add_argument(
+            '--file-size',
+            type=int,
+            default=0,
+            help='Size in KB of the PDF uploaded with each submission (default none).'
+        )
+        parser.add_argument(
+            '--no-pragmas',
+            action='store_true',
+            help='Disable SQLITE_PRAGMAS to measure the untuned baseline.'
+        )
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency']
+
+        with tempfile.TemporaryDirectory() as directory:
+            # Uploads land in the temporary directory too
+            overrides = {'MEDIA_ROOT': os.path.join(directory, 'media')}
+            if options['no_pragmas']:
+                overrides['SQLITE_PRAGMAS'] = {}
+            with override_settings(**overrides), throwaway_database(os.path.join(directory, 'benchmark.sqlite3')):
+                generate_university(
+                    schools=1, departments_per_school=1, lecturers=1, students=concurrency,
+                    courses=1, assignments_per_course=options['assignments'], submission_rate=0
+                )
+                result = submission_burst(concurrency, options['assignments'], options['file_size'] * 1024)
+
+        self.stdout.write(
+            f"{result['succeeded']}/{result['requests']} submissions in {result['seconds']}s "
+            f"({result['submissions_per_second']} submissions/s), {result['locked']} locked, "
+            f"{result['other_failures']} other failures, {result['saved']} rows saved."
+        )
@@ -0,0 +1,94 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from core.benchmark import (
+    compare_to_baseline, run_benchmark, server_errors, throwaway_database
+)
+from core.synthetic import generate_university
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database with a synthetic university, request every '
+        'named URL as a student and a lecturer, and compare query counts, latency '
+        'and response sizes against a JSON baseline. A status that differs from the '
+        'baseline, or a server error the baseline does not record, fails the run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schools', type=int, default=2)
+        parser.add_argument('--departments-per-school', type=int, default=2)
+        parser.add_argument('--lecturers', type=int, default=10)
+        parser.add_argument('--students', type=int, default=200)
+        parser.add_argument('--courses', type=int, default=20)
+        parser.add_argument('--assignments-per-course', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=5, help='Requests per URL and role.')
+        parser.add_argument('--baseline', help='JSON baseline to compare against.')
+        parser.add_argument(
+            '--update-baseline',
+            action='store_true',
+            help='Write the results to --baseline instead of comparing.'
+        )
+        parser.add_argument('--output', help='Also write the results to this JSON file.')
+        parser.add_argument(
+            '--latency-tolerance',
+            type=float,
+            default=0.5,
+            help='Allowed fractional p95 latency growth over the baseline (default 0.5).'
+        )
+
+    def handle(self, *args, **options):
+        if options['update_baseline'] and not options['baseline']:
+            raise CommandError('--update-baseline requires --baseline.')
+
+        with throwaway_database():
+            counts = generate_university(
+                schools=options['schools'],
+                departments_per_school=options['departments_per_school'],
+                lecturers=options['lecturers'],
+                students=options['students'],
+                courses=options['courses'],
+                assignments_per_course=options['assignments_per_course'],
+                seed=options['seed'],
+            )
+            self.stdout.write('Seeded ' + ', '.join(f'{count} {name}' for name, count in counts.items()))
+            results = run_benchmark(repeat=options['repeat'])
+
+        for key, result in sorted(results.items()):
+            self.stdout.write(
+                f"{key:<45} {result['status']:>3} {result['queries']:>4} queries "
+                f"p50 {result['p50_ms']:>8.2f}ms p95 {result['p95_ms']:>8.2f}ms {result['bytes']:>8} bytes"
+            )
+
+        if options['output']:
+            self.write_json(options['output'], results)
+        if options['update_baseline']:
+            self.write_json(options['baseline'], results)
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}."))
+            errors = server_errors(results)
+            if errors:
+                self.stdout.write(self.style.WARNING(
+                    'Recorded with server errors:\n' + '\n'.join(errors)
+                ))
+            return
+        if not options['baseline']:
+            errors = server_errors(results)
+            if errors:
+                raise CommandError('Server errors:\n' + '\n'.join(errors))
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as baseline_file:
+                    baseline = json.load(baseline_file)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read baseline {options['baseline']}: {exc}")
+            regressions = compare_to_baseline(
+                results, baseline, latency_tolerance=options['latency_tolerance']
+            ) + server_errors(results, baseline)
+            if regressions:
+                raise CommandError('Benchmark regressions:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+
+    def write_json(self, path, results):
+        with open(path, 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+            output.write('\n')
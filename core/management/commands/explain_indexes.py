@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from core.benchmark import (
+    explain_hot_queries, hot_path_indexes, sample_objects, throwaway_database, without_indexes
+)
+from core.synthetic import generate_university
+
+class Command(BaseCommand):
+    help = (
+        'Generate a synthetic university in a throwaway test database and print the '
+        'query plan and timing of the hot filter queries with and without the hot path indexes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=5000)
+        parser.add_argument('--courses', type=int, default=200)
+        parser.add_argument('--lecturers', type=int, default=100)
+        parser.add_argument('--assignments-per-course', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=5, help='Executions per query (default 5).')
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            counts = generate_university(
+                schools=5,
+                departments_per_school=4,
+                lecturers=options['lecturers'],
+                students=options['students'],
+                courses=options['courses'],
+                assignments_per_course=options['assignments_per_course'],
+                seed=options['seed'],
+            )
+            self.stdout.write('Seeded ' + ', '.join(f'{count} {name}' for name, count in counts.items()))
+
+            objects = sample_objects()
+            indexes = hot_path_indexes()
+            with without_indexes(indexes):
+                before = explain_hot_queries(objects, options['repeat'])
+            after = explain_hot_queries(objects, options['repeat'])
+
+        for name in before:
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{name}: {before[name]['median_ms']}ms -> {after[name]['median_ms']}ms"
+            ))
+            self.stdout.write('  before:')
+            for line in before[name]['plan'].splitlines():
+                self.stdout.write(f'    {line}')
+            self.stdout.write('  after:')
+            for line in after[name]['plan'].splitlines():
+                self.stdout.write(f'    {line}')
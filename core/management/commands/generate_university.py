@@ -0,0 +1,80 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from core.synthetic import generate_university
+from schools.models import School
+
+class Command(BaseCommand):
+    help = (
+        'Fill an empty database with a deterministic synthetic university '
+        '(schools, departments, users, courses, enrollments, assignments and submissions).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schools', type=int, default=10)
+        parser.add_argument('--departments-per-school', type=int, default=5)
+        parser.add_argument('--lecturers', type=int, default=1000)
+        parser.add_argument('--students', type=int, default=50000)
+        parser.add_argument('--courses', type=int, default=2000)
+        parser.add_argument('--assignments-per-course', type=int, default=10)
+        parser.add_argument(
+            '--submission-rate',
+            type=float,
+            default=0.8,
+            help='Probability that a student submits a given assignment (default 0.8).'
+        )
+        parser.add_argument(
+            '--graded-rate',
+            type=float,
+            default=0.6,
+            help='Probability that a submission is graded (default 0.6).'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--password',
+            default='password',
+            help='Password shared by every generated user.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows inserted per bulk_create call (default 5000).'
+        )
+
+    def handle(self, *args, **options):
+        if School.objects.exists():
+            raise CommandError('The database already contains schools; run this against an empty database.')
+        if options['schools'] < 1 or options['departments_per_school'] < 1:
+            raise CommandError('At least one school and one department per school are required.')
+        if options['lecturers'] < 1:
+            raise CommandError('At least one lecturer is required to own the courses and assignments.')
+
+        started = time.perf_counter()
+
+        def progress(table, count):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {count} {table} inserted')
+
+        counts = generate_university(
+            schools=options['schools'],
+            departments_per_school=options['departments_per_school'],
+            lecturers=options['lecturers'],
+            students=options['students'],
+            courses=options['courses'],
+            assignments_per_course=options['assignments_per_course'],
+            submission_rate=options['submission_rate'],
+            graded_rate=options['graded_rate'],
+            seed=options['seed'],
+            password=options['password'],
+            batch_size=options['batch_size'],
+            progress=progress,
+        )
+
+        elapsed = time.perf_counter() - started
+        for table, count in counts.items():
+            self.stdout.write(f'{table:<12} {count:>10}')
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {total} rows in {elapsed:.1f}s ({total / max(elapsed, 0.001):.0f} rows/s).'
+        ))
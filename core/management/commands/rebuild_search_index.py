@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from core.search import rebuild_search_index
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search entries for courses, assignments and submissions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Entries written per upsert (default 2000).'
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild_search_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {written} objects.'))
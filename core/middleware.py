@@ -0,0 +1,161 @@
+import json
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('core.requests')
+
+# Upper bounds of the histogram buckets; the last bucket is open-ended
+DURATION_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+# Placeholder lists of different lengths are the same query shape
+IN_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+WHITESPACE = re.compile(r'\s+')
+
+def fingerprint(sql):
+    """
+    Normalise a SQL statement so repeated executions of the same query
+    shape (an N+1 loop, for example) share one fingerprint.
+    """
+    return WHITESPACE.sub(' ', IN_LIST.sub('(...)', sql)).strip()
+
+class QueryRecorder:
+    """
+    Database execute wrapper that counts and times every query and tracks
+    how often each query fingerprint was executed.
+    """
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self):
+        return {sql: count for sql, count in self.fingerprints.items() if count > 1}
+
+class RequestStats:
+    """
+    In-memory per-URL-name histograms of request duration and query count.
+    Each worker process keeps its own copy.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def record(self, view_name, duration_ms, queries, duplicate_queries):
+        with self.lock:
+            stats = self.views.get(view_name)
+            if stats is None:
+                stats = self.views[view_name] = {
+                    'requests': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'total_queries': 0,
+                    'max_queries': 0,
+                    'duplicate_queries': 0,
+                    'duration_histogram': [0] * (len(DURATION_BUCKETS_MS) + 1),
+                    'query_histogram': [0] * (len(QUERY_BUCKETS) + 1),
+                }
+            stats['requests'] += 1
+            stats['total_ms'] += duration_ms
+            stats['max_ms'] = max(stats['max_ms'], duration_ms)
+            stats['total_queries'] += queries
+            stats['max_queries'] = max(stats['max_queries'], queries)
+            stats['duplicate_queries'] += duplicate_queries
+            stats['duration_histogram'][bisect_left(DURATION_BUCKETS_MS, duration_ms)] += 1
+            stats['query_histogram'][bisect_left(QUERY_BUCKETS, queries)] += 1
+
+    def snapshot(self):
+        """
+        Return the histograms with bucket labels and per-view averages.
+        """
+        duration_labels = [f'<={bound}ms' for bound in DURATION_BUCKETS_MS] + [f'>{DURATION_BUCKETS_MS[-1]}ms']
+        query_labels = [f'<={bound}' for bound in QUERY_BUCKETS] + [f'>{QUERY_BUCKETS[-1]}']
+        with self.lock:
+            views = {}
+            for view_name, stats in self.views.items():
+                views[view_name] = {
+                    'requests': stats['requests'],
+                    'mean_ms': round(stats['total_ms'] / stats['requests'], 2),
+                    'max_ms': round(stats['max_ms'], 2),
+                    'mean_queries': round(stats['total_queries'] / stats['requests'], 2),
+                    'max_queries': stats['max_queries'],
+                    'duplicate_queries': stats['duplicate_queries'],
+                    'duration_histogram': dict(zip(duration_labels, stats['duration_histogram'])),
+                    'query_histogram': dict(zip(query_labels, stats['query_histogram'])),
+                }
+        return views
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+
+request_stats = RequestStats()
+
+class RequestInstrumentationMiddleware:
+    """
+    Measure wall time, SQL query count, SQL time and duplicate queries for
+    every request.
+
+    Enabled by the REQUEST_INSTRUMENTATION setting. Results are sent back
+    in a Server-Timing header, logged as one JSON line on the
+    'core.requests' logger and aggregated per URL name in request_stats.
+    Queries run while a streaming response is iterated are not counted.
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        duration_ms = (time.perf_counter() - started) * 1000
+        sql_ms = recorder.duration * 1000
+
+        match = request.resolver_match
+        view_name = match.view_name if match else '<unresolved>'
+        duplicates = recorder.duplicates()
+        duplicate_queries = sum(duplicates.values()) - len(duplicates)
+
+        response['Server-Timing'] = (
+            f'total;dur={duration_ms:.1f}, '
+            f'sql;dur={sql_ms:.1f};desc="{recorder.count} queries"'
+        )
+        request_stats.record(view_name, duration_ms, recorder.count, duplicate_queries)
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': view_name,
+            'status': response.status_code,
+            'duration_ms': round(duration_ms, 2),
+            'sql_queries': recorder.count,
+            'sql_ms': round(sql_ms, 2),
+            'duplicate_queries': duplicate_queries,
+            'duplicates': [
+                {'sql': sql, 'count': count}
+                for sql, count in sorted(duplicates.items(), key=lambda item: -item[1])
+            ],
+        }))
+        return response
@@ -0,0 +1,101 @@
+# Generated by Django 5.1.7 on 2026-10-17 06:21
+
+from itertools import batched
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+SQLITE_INDEX = [
+    # External content FTS5 table over core_searchentry, kept in sync by triggers
+    "CREATE VIRTUAL TABLE core_searchindex USING fts5("
+    "title, body, content='core_searchentry', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER core_searchentry_ai AFTER INSERT ON core_searchentry BEGIN "
+    "INSERT INTO core_searchindex(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    "CREATE TRIGGER core_searchentry_ad AFTER DELETE ON core_searchentry BEGIN "
+    "INSERT INTO core_searchindex(core_searchindex, rowid, title, body) "
+    "VALUES ('delete', old.id, old.title, old.body); END",
+    "CREATE TRIGGER core_searchentry_au AFTER UPDATE ON core_searchentry BEGIN "
+    "INSERT INTO core_searchindex(core_searchindex, rowid, title, body) "
+    "VALUES ('delete', old.id, old.title, old.body); "
+    "INSERT INTO core_searchindex(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+]
+
+POSTGRESQL_INDEX = [
+    "ALTER TABLE core_searchentry ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(body, '')), 'B')) STORED",
+    "CREATE INDEX core_searchentry_vector_idx ON core_searchentry USING GIN (search_vector)",
+]
+
+def create_full_text_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {'sqlite': SQLITE_INDEX, 'postgresql': POSTGRESQL_INDEX}.get(vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+def drop_full_text_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS core_searchindex')
+
+def index_existing_rows(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    Assignment = apps.get_model('assignments', 'Assignment')
+    Submission = apps.get_model('assignments', 'Submission')
+    SearchEntry = apps.get_model('core', 'SearchEntry')
+
+    # Streamed in batches like core.search.rebuild_search_index
+    courses = Course.objects.order_by('pk').values_list('pk', 'code', 'name', 'description')
+    for batch in batched(courses.iterator(chunk_size=BATCH_SIZE), BATCH_SIZE):
+        SearchEntry.objects.bulk_create([
+            SearchEntry(kind='course', object_id=pk, course_id=pk, title=f'{code} {name}', body=description)
+            for pk, code, name, description in batch
+        ])
+    assignments = Assignment.objects.order_by('pk').values_list('pk', 'course_id', 'title', 'description')
+    for batch in batched(assignments.iterator(chunk_size=BATCH_SIZE), BATCH_SIZE):
+        SearchEntry.objects.bulk_create([
+            SearchEntry(kind='assignment', object_id=pk, course_id=course_id, title=title, body=description)
+            for pk, course_id, title, description in batch
+        ])
+    submissions = Submission.objects.order_by('pk').values_list(
+        'pk', 'assignment__course_id', 'student_id', 'assignment__title', 'content'
+    )
+    for batch in batched(submissions.iterator(chunk_size=BATCH_SIZE), BATCH_SIZE):
+        SearchEntry.objects.bulk_create([
+            SearchEntry(
+                kind='submission', object_id=pk, course_id=course_id, owner_id=student_id,
+                title=title, body=content
+            )
+            for pk, course_id, student_id, title, content in batch
+        ])
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('assignments', '0005_submission_content_addressed_storage'),
+        ('courses', '0004_course_course_active_department_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('course', 'Course'), ('assignment', 'Assignment'), ('submission', 'Submission')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('course_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('owner_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('title', models.CharField(blank=True, max_length=200)),
+                ('body', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Search entries',
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_full_text_index, drop_full_text_index),
+        migrations.RunPython(index_existing_rows, migrations.RunPython.noop),
+    ]
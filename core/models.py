@@ -1,3 +1,32 @@
 from django.db import models
 
-# Create your models here.
+class SearchEntry(models.Model):
+    """
+    One searchable document per course, assignment or submission.
+
+    Rows are kept in sync by core.signals. The full-text index itself lives
+    outside the ORM: an FTS5 table fed by triggers on SQLite, or a
+    generated tsvector column with a GIN index on PostgreSQL (see the
+    0001 migration and core.search).
+    """
+    KIND_CHOICES = [
+        ('course', 'Course'),
+        ('assignment', 'Assignment'),
+        ('submission', 'Submission'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    # Plain ids used for permission filtering, not foreign keys, so index
+    # rows never block or cascade deletes of the objects they describe
+    course_id = models.PositiveBigIntegerField(null=True, blank=True)
+    owner_id = models.PositiveBigIntegerField(null=True, blank=True)
+    title = models.CharField(max_length=200, blank=True)
+    body = models.TextField(blank=True)
+
+    class Meta:
+        unique_together = ['kind', 'object_id']
+        verbose_name_plural = 'Search entries'
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.object_id}: {self.title}"
@@ -0,0 +1,250 @@
+import base64
+import binascii
+import datetime
+import decimal
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Paginator
+from django.db import DatabaseError, connections
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+
+# Below this many rows an exact COUNT(*) is cheap enough to keep
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+class InvalidCursor(Exception):
+    pass
+
+class KeysetPage:
+    """
+    A single page of results returned by KeysetPaginator.
+    """
+    def __init__(self, object_list, has_next, has_previous, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+class KeysetPaginator:
+    """
+    Seek-based paginator that pages through a queryset using its ordering.
+
+    Rather than OFFSET, each page is fetched with a WHERE clause comparing
+    against the ordering values of the last (or first) row of the previous
+    page, so every page costs the same as the first one. The ordering is
+    taken from the queryset's order_by() or, failing that, the model's
+    Meta.ordering; relation fields are expanded to the related model's
+    ordering and the primary key is appended as a tie-breaker. Ordering
+    fields are expected to be non-nullable.
+    """
+    def __init__(self, queryset, per_page=None):
+        self.queryset = queryset
+        self.per_page = per_page or getattr(settings, 'PAGINATE_BY', 25)
+        self.keys = self.get_keys(queryset)
+
+    @staticmethod
+    def get_keys(queryset):
+        query = queryset.query
+        if query.order_by:
+            ordering = query.order_by
+        elif query.default_ordering:
+            ordering = queryset.model._meta.ordering
+        else:
+            ordering = []
+
+        keys = []
+        for name in ordering:
+            if not isinstance(name, str) or name == '?':
+                raise ValueError(f'Cannot paginate by keyset on ordering {name!r}.')
+            keys.extend(_expand_ordering(queryset.model, name))
+
+        pk_name = queryset.model._meta.pk.name
+        if not any(path in ('pk', pk_name) for path, _ in keys):
+            descending = keys[-1][1] if keys else False
+            keys.append((pk_name, descending))
+        return keys
+
+    def get_page(self, after=None, before=None):
+        """
+        Return the page following the `after` cursor, the page preceding the
+        `before` cursor, or the first page. Invalid cursors fall back to the
+        first page.
+        """
+        try:
+            if before:
+                return self._page(decode_cursor(before, len(self.keys)), reverse=True)
+            if after:
+                return self._page(decode_cursor(after, len(self.keys)))
+        except (InvalidCursor, ValidationError, ValueError, TypeError):
+            # Tampered cursors whose values don't fit the ordering fields
+            pass
+        return self._page(None)
+
+    def _page(self, values, reverse=False):
+        aliases = [f'keyset_{index}' for index in range(len(self.keys))]
+        queryset = self.queryset.annotate(**{
+            alias: F(path) for alias, (path, _) in zip(aliases, self.keys)
+        })
+        queryset = queryset.order_by(*(
+            f'-{path}' if descending != reverse else path
+            for path, descending in self.keys
+        ))
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, reverse))
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+
+        def cursor(row):
+            return encode_cursor([getattr(row, alias) for alias in aliases]) if row else None
+
+        first, last = (rows[0], rows[-1]) if rows else (None, None)
+        if reverse:
+            return KeysetPage(rows, True, has_more, cursor(last), cursor(first))
+        return KeysetPage(rows, has_more, values is not None, cursor(last), cursor(first))
+
+    def _seek(self, values, reverse):
+        condition = Q()
+        for index, (path, descending) in enumerate(self.keys):
+            lookup = 'lt' if descending != reverse else 'gt'
+            clause = Q(**{f'{path}__{lookup}': values[index]})
+            for (equal_path, _), value in zip(self.keys[:index], values):
+                clause &= Q(**{equal_path: value})
+            condition |= clause
+        return condition
+
+def paginate_keyset(request, queryset, per_page=None):
+    """
+    Return the KeysetPage selected by the request's `after`/`before` parameters.
+    """
+    return KeysetPaginator(queryset, per_page).get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before')
+    )
+
+def _expand_ordering(model, name, prefix='', descending=False):
+    if name.startswith('-'):
+        name, descending = name[1:], not descending
+
+    field = None
+    current = model
+    for part in name.split('__'):
+        field = current._meta.pk if part == 'pk' else current._meta.get_field(part)
+        if field.is_relation:
+            current = field.related_model
+
+    if field.is_relation:
+        # Order by the related model's own ordering, as Django does
+        ordering = current._meta.ordering or [current._meta.pk.name]
+        keys = []
+        for related_name in ordering:
+            keys.extend(_expand_ordering(
+                current, related_name, f'{prefix}{name}__', descending
+            ))
+        return keys
+    return [(f'{prefix}{name}', descending)]
+
+def _encode_value(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+def encode_cursor(values):
+    data = json.dumps([_encode_value(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, length):
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(data)
+    except (binascii.Error, ValueError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursor(cursor)
+    return values
+
+def estimated_count(queryset):
+    """
+    Return the planner's row estimate for an unfiltered queryset's table,
+    or None when the queryset is filtered or no statistics are available.
+    SQLite only has statistics once ANALYZE has run.
+    """
+    query = queryset.query
+    if query.where or query.distinct or query.combinator or query.is_sliced:
+        return None
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [table])
+        elif connection.vendor == 'sqlite':
+            try:
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+            except DatabaseError:
+                return None
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    # sqlite_stat1.stat starts with the table's row count
+    estimate = int(str(row[0]).split()[0])
+    return estimate if estimate >= 0 else None
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for very large tables that takes the total from table
+    statistics instead of a COUNT(*) scanning every row, when the queryset
+    is unfiltered and the table holds at least ESTIMATED_COUNT_THRESHOLD
+    rows. The page count is then approximate, so the last page may be
+    short; a page that comes back empty or missing falls back to an exact
+    COUNT and is clamped to the real last page.
+    """
+    estimated = False
+
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        if estimate is None or estimate < ESTIMATED_COUNT_THRESHOLD:
+            return super().count
+        self.estimated = True
+        return estimate
+
+    def page(self, number):
+        try:
+            page = super().page(number)
+        except EmptyPage:
+            if not self.estimated:
+                raise
+            page = None
+        if not self.estimated or page:
+            return page
+        # Statistics gathered before mass deletes overstate the row count
+        self.estimated = False
+        self.count = self.object_list.count()
+        self.__dict__.pop('num_pages', None)
+        return self.get_page(number)
+
+    def get_elided_page_range(self, number=1, *args, **kwargs):
+        # The admin passes on the requested number even if page() clamped it
+        return super().get_elided_page_range(min(int(number), self.num_pages), *args, **kwargs)
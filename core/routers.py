@@ -0,0 +1,54 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+replica_reads = ContextVar('replica_reads', default=False)
+
+# Session and user rows must be read back right after they are written
+PRIMARY_ONLY_APPS = {'sessions', 'auth', 'accounts', 'contenttypes', 'admin'}
+
+@contextmanager
+def use_replica():
+    """
+    Route ORM reads inside the block to the read replica, if one is
+    configured. Writes always go to the default database.
+    """
+    token = replica_reads.set(True)
+    try:
+        yield
+    finally:
+        replica_reads.reset(token)
+
+def read_from_replica(view_func):
+    """
+    Decorator for read-only views whose queries can be served by the
+    replica. Apply it below @login_required so the user is loaded from
+    the primary.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view_func(request, *args, **kwargs)
+        with use_replica():
+            return view_func(request, *args, **kwargs)
+    return wrapper
+
+class ReplicaRouter:
+    """
+    Send reads made under use_replica() to settings.REPLICA_DATABASE and
+    everything else to the default database.
+    """
+    def db_for_read(self, model, **hints):
+        replica = getattr(settings, 'REPLICA_DATABASE', None)
+        if replica and replica_reads.get() and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            return replica
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds a copy of the same data
+        return True
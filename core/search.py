@@ -0,0 +1,149 @@
+import re
+from itertools import batched
+
+from django.db import connection, transaction
+from django.urls import reverse
+from .models import SearchEntry
+
+FTS_TABLE = 'core_searchindex'
+RESULT_LIMIT = 20
+WORD = re.compile(r'\w+')
+
+# Update fields for the single-statement upsert of an entry
+ENTRY_FIELDS = ['course_id', 'owner_id', 'title', 'body']
+
+RESULT_URLS = {
+    'course': 'courses:course_detail',
+    'assignment': 'assignments:assignment_detail',
+    'submission': 'assignments:submission_detail',
+}
+
+def course_document(course):
+    return SearchEntry(
+        kind='course', object_id=course.pk, course_id=course.pk,
+        title=f'{course.code} {course.name}', body=course.description
+    )
+
+def assignment_document(assignment):
+    return SearchEntry(
+        kind='assignment', object_id=assignment.pk, course_id=assignment.course_id,
+        title=assignment.title, body=assignment.description
+    )
+
+def submission_document(submission):
+    assignment = submission.assignment
+    return SearchEntry(
+        kind='submission', object_id=submission.pk, course_id=assignment.course_id,
+        owner_id=submission.student_id, title=assignment.title, body=submission.content
+    )
+
+def save_entries(entries):
+    """
+    Insert or update entries with one upsert statement.
+    """
+    SearchEntry.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=ENTRY_FIELDS
+    )
+
+def remove_entry(kind, object_id):
+    SearchEntry.objects.filter(kind=kind, object_id=object_id).delete()
+
+def rebuild_search_index(batch_size=2000):
+    """
+    Rebuild every search entry from the course, assignment and submission
+    tables, for data written without signals (bulk_create, imports).
+    Returns the number of entries written.
+
+    The rebuild runs in one transaction, so searches keep seeing the old
+    entries until the new ones are committed.
+    """
+    from assignments.models import Assignment, Submission
+    from courses.models import Course
+
+    written = 0
+    with transaction.atomic():
+        SearchEntry.objects.all().delete()
+        for batch in batched(Course.objects.order_by('pk').iterator(chunk_size=batch_size), batch_size):
+            save_entries([course_document(course) for course in batch])
+            written += len(batch)
+        for batch in batched(Assignment.objects.order_by('pk').iterator(chunk_size=batch_size), batch_size):
+            save_entries([assignment_document(assignment) for assignment in batch])
+            written += len(batch)
+        submissions = Submission.objects.order_by('pk').select_related('assignment').only(
+            'student_id', 'content', 'assignment__title', 'assignment__course_id'
+        )
+        for batch in batched(submissions.iterator(chunk_size=batch_size), batch_size):
+            save_entries([submission_document(submission) for submission in batch])
+            written += len(batch)
+    return written
+
+def match_expression(query):
+    """
+    Turn free text into an FTS5 query: every word must match, the last one
+    as a prefix so results appear while typing. Quoting each word keeps
+    FTS5 operators in user input from being interpreted.
+    """
+    words = WORD.findall(query.lower())
+    if not words:
+        return None
+    return ' '.join([f'"{word}"' for word in words[:-1]] + [f'"{words[-1]}"*'])
+
+def permission_clause(user):
+    """
+    SQL restricting entries (aliased e) to what `user` may open: every
+    course, plus assignments of enrolled courses and their own submissions
+    for students, or assignments and submissions of the courses they teach
+    for lecturers.
+    """
+    if user.is_student():
+        return (
+            "(e.kind = 'course'"
+            " OR (e.kind = 'assignment' AND e.course_id IN"
+            " (SELECT course_id FROM courses_enrollment WHERE student_id = %s AND status <> 'dropped'))"
+            " OR (e.kind = 'submission' AND e.owner_id = %s))"
+        ), [user.pk, user.pk]
+    return (
+        "(e.kind = 'course'"
+        " OR (e.kind IN ('assignment', 'submission') AND e.course_id IN"
+        " (SELECT id FROM courses_course WHERE lecturer_id = %s)))"
+    ), [user.pk]
+
+def search(user, query, limit=RESULT_LIMIT):
+    """
+    Return the `limit` best matching entries `user` may see, best first,
+    as dicts with kind, object_id, title, body, rank and url.
+    """
+    clause, params = permission_clause(user)
+    if connection.vendor == 'postgresql':
+        if not query.strip():
+            return []
+        sql = (
+            'SELECT e.kind, e.object_id, e.title, e.body, ts_rank(e.search_vector, q) AS rank'
+            " FROM core_searchentry e, websearch_to_tsquery('english', %s) q"
+            f' WHERE e.search_vector @@ q AND {clause}'
+            ' ORDER BY rank DESC LIMIT %s'
+        )
+        params = [query, *params, limit]
+    else:
+        expression = match_expression(query)
+        if expression is None:
+            return []
+        # bm25 weights the title column ten times higher than the body
+        sql = (
+            f'SELECT e.kind, e.object_id, e.title, e.body, bm25({FTS_TABLE}, 10.0, 1.0) AS rank'
+            f' FROM {FTS_TABLE} JOIN core_searchentry e ON e.id = {FTS_TABLE}.rowid'
+            f' WHERE {FTS_TABLE} MATCH %s AND {clause}'
+            ' ORDER BY rank LIMIT %s'
+        )
+        params = [expression, *params, limit]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    for result in results:
+        result['url'] = reverse(RESULT_URLS[result['kind']], args=[result['object_id']])
+    return results
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .search import (
+    assignment_document, course_document, remove_entry, save_entries, submission_document
+)
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """
+    Apply SQLITE_PRAGMAS to every new SQLite connection. WAL lets readers
+    carry on while a submission is being written, and busy_timeout makes
+    writers wait for the lock instead of failing with "database is locked".
+    """
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+@receiver(post_save, sender='courses.Course')
+def index_course(sender, instance, **kwargs):
+    save_entries([course_document(instance)])
+
+@receiver(post_save, sender='assignments.Assignment')
+def index_assignment(sender, instance, **kwargs):
+    save_entries([assignment_document(instance)])
+
+@receiver(post_save, sender='assignments.Submission')
+def index_submission(sender, instance, created, update_fields, **kwargs):
+    # Grading saves don't touch the content, so the entry is still current
+    if update_fields is not None and 'content' not in update_fields:
+        return
+    if not created and getattr(instance, '_loaded_content', None) == instance.content:
+        return
+    save_entries([submission_document(instance)])
+    instance._loaded_content = instance.content
+
+@receiver(post_delete, sender='courses.Course')
+@receiver(post_delete, sender='assignments.Assignment')
+@receiver(post_delete, sender='assignments.Submission')
+def unindex_object(sender, instance, **kwargs):
+    remove_entry(sender._meta.model_name, instance.pk)
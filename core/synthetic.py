@@ -0,0 +1,147 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+from itertools import batched
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from accounts.models import User
+from assignments.models import Assignment, Submission
+from courses.models import Course, Enrollment
+from courses.stats import rebuild_course_stats
+from .search import rebuild_search_index
+from schools.models import School, Department
+
+def bulk_insert(model, rows, batch_size, progress=None):
+    """
+    Consume an iterable of unsaved instances in batches and insert each
+    batch with one bulk_create, so large tables never sit in memory.
+    Returns the number of rows inserted.
+    """
+    count = 0
+    for batch in batched(rows, batch_size):
+        model.objects.bulk_create(batch)
+        count += len(batch)
+        if progress:
+            progress(model._meta.verbose_name_plural, count)
+    return count
+
+def generate_university(*, schools=2, departments_per_school=2, lecturers=4, students=50,
+                        courses=8, assignments_per_course=3, submission_rate=0.7,
+                        graded_rate=0.5, seed=0, password='password', batch_size=5000,
+                        progress=None):
+    """
+    Populate an empty database with a synthetic university and return the
+    number of rows created per model.
+
+    Every student is enrolled in all courses of their department, as the
+    auto-enrollment would do, and submits each assignment with probability
+    submission_rate; submissions are graded with probability graded_rate.
+    Rows are streamed into batched bulk_create calls, so Course.save()
+    auto-enrollment and signals are bypassed and CourseStats and the search
+    index are rebuilt at the end. The same seed always produces the same data.
+
+    `progress`, if given, is called with (table name, rows inserted so far)
+    after every batch.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    # Hashing is deliberately slow, so every user shares one precomputed hash
+    password_hash = make_password(password)
+
+    with transaction.atomic():
+        school_rows = School.objects.bulk_create([
+            School(name=f'School {index}', code=f'SCH{index}')
+            for index in range(schools)
+        ])
+        department_rows = Department.objects.bulk_create([
+            Department(name=f'Department {index}', code=f'DEP{index}', school=school_rows[index % schools])
+            for index in range(schools * departments_per_school)
+        ])
+        department_ids = [department.pk for department in department_rows]
+
+        lecturer_ids = [
+            lecturer.pk for lecturer in User.objects.bulk_create([
+                User(
+                    username=f'lecturer{index}', password=password_hash, user_type='lecturer',
+                    first_name='Lecturer', last_name=str(index), staff_number=f'STF{index:06}',
+                    department_id=department_ids[index % len(department_ids)]
+                )
+                for index in range(lecturers)
+            ], batch_size=batch_size)
+        ]
+
+        student_count = bulk_insert(User, (
+            User(
+                username=f'student{index}', password=password_hash, user_type='student',
+                first_name='Student', last_name=str(index), registration_number=f'REG{index:07}',
+                department_id=department_ids[index % len(department_ids)]
+            )
+            for index in range(students)
+        ), batch_size, progress)
+        # Only ids are kept in memory; the instances above are discarded per batch
+        students_by_department = {}
+        for student_id, department_id in User.objects.filter(
+            user_type='student', username__startswith='student'
+        ).order_by('pk').values_list('pk', 'department_id').iterator(chunk_size=batch_size):
+            students_by_department.setdefault(department_id, []).append(student_id)
+
+        course_rows = [
+            (course.pk, course.code, course.department_id, course.lecturer_id)
+            for course in Course.objects.bulk_create([
+                Course(
+                    code=f'C{index:05}', name=f'Course {index}',
+                    department_id=department_ids[index % len(department_ids)],
+                    lecturer_id=lecturer_ids[index % lecturers]
+                )
+                for index in range(courses)
+            ], batch_size=batch_size)
+        ]
+
+        enrollment_count = bulk_insert(Enrollment, (
+            Enrollment(student_id=student_id, course_id=course_id, status='enrolled')
+            for course_id, _, department_id, _ in course_rows
+            for student_id in students_by_department.get(department_id, [])
+        ), batch_size, progress)
+
+        assignment_rows = []
+        for course_id, code, department_id, lecturer_id in course_rows:
+            for number in range(assignments_per_course):
+                assignment = Assignment(
+                    title=f'{code} Assignment {number}', course_id=course_id,
+                    description='Synthetic assignment', total_marks=Decimal(100),
+                    due_date=now + timedelta(days=rng.randint(-60, 60)),
+                    created_by_id=lecturer_id
+                )
+                assignment_rows.append((assignment, department_id, lecturer_id))
+        Assignment.objects.bulk_create([row[0] for row in assignment_rows], batch_size=batch_size)
+
+        def submissions():
+            for assignment, department_id, lecturer_id in assignment_rows:
+                for student_id in students_by_department.get(department_id, []):
+                    if rng.random() >= submission_rate:
+                        continue
+                    marks = None
+                    if rng.random() < graded_rate:
+                        marks = Decimal(rng.randint(0, 100))
+                    yield Submission(
+                        assignment_id=assignment.pk, student_id=student_id, content='Synthetic answer',
+                        marks=marks, graded_by_id=lecturer_id if marks is not None else None,
+                        graded_at=now if marks is not None else None
+                    )
+
+        submission_count = bulk_insert(Submission, submissions(), batch_size, progress)
+        rebuild_course_stats()
+        rebuild_search_index(batch_size)
+
+    return {
+        'schools': len(school_rows),
+        'departments': len(department_rows),
+        'lecturers': len(lecturer_ids),
+        'students': student_count,
+        'courses': len(course_rows),
+        'enrollments': enrollment_count,
+        'assignments': len(assignment_rows),
+        'submissions': submission_count,
+    }
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+class TestRunner(DiscoverRunner):
+    """
+    Run tests with replica reads turned off and every cache in local
+    memory.
+
+    The replica only mirrors the test database through a second
+    connection, which test cases don't open and which can't see their
+    uncommitted rows. The configured caches are shared between processes
+    and outlive the run, so entries keyed on primary keys would leak from
+    one run into the next.
+    """
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.test_settings = override_settings(
+            REPLICA_DATABASE=None,
+            CACHES={
+                alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+                for alias in settings.CACHES
+            }
+        )
+        self.test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.test_settings.disable()
+        super().teardown_test_environment(**kwargs)
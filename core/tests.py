@@ -1,3 +1,554 @@
-from django.test import TestCase
+from datetime import timedelta
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+from io import StringIO
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.contrib.sessions.models import Session
+from django.test.utils import CaptureQueriesContext
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from schools.models import School, Department
+from courses.models import Course, Enrollment
+from assignments.models import Assignment, Submission
+from .middleware import QueryRecorder, request_stats
+from .search import rebuild_search_index, search
+from .routers import ReplicaRouter, read_from_replica, replica_reads, use_replica
+from .signals import configure_sqlite_connection
+from university_management.database import databases_from_env
+from .benchmark import (
+    compare_to_baseline, explain_hot_queries, run_benchmark, sample_objects, server_errors
+)
+from .pagination import EstimatedCountPaginator, KeysetPaginator
+from .synthetic import generate_university
+
+
+class KeysetPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Duplicate names exercise the primary key tie-breaker
+        cls.schools = School.objects.bulk_create([
+            School(name=f'School {index // 3}', code=f'S{index}')
+            for index in range(23)
+        ])
+
+    def walk_forward(self, paginator):
+        rows, page = [], paginator.get_page()
+        rows.extend(page)
+        while page.has_next:
+            page = paginator.get_page(after=page.next_cursor)
+            rows.extend(page)
+        return rows, page
+
+    def test_pages_follow_model_ordering(self):
+        paginator = KeysetPaginator(School.objects.all(), per_page=5)
+        rows, last_page = self.walk_forward(paginator)
+        expected = list(School.objects.order_by('name', 'pk'))
+        self.assertEqual(rows, expected)
+        self.assertEqual(len(last_page), 3)
+        self.assertTrue(last_page.has_previous)
+
+        previous = paginator.get_page(before=last_page.previous_cursor)
+        self.assertEqual(list(previous), expected[15:20])
+        self.assertTrue(previous.has_next)
+
+    def test_descending_datetime_ordering(self):
+        department = Department.objects.create(
+            name='Computer Science', code='CS', school=self.schools[0]
+        )
+        lecturer = User.objects.create_user(
+            username='lecturer', user_type='lecturer', staff_number='S001'
+        )
+        course = Course.objects.create(code='CS101', name='Programming', department=department)
+        due = timezone.now()
+        Assignment.objects.bulk_create([
+            Assignment(
+                title=f'Assignment {index}', course=course, description='',
+                due_date=due + timedelta(microseconds=index % 4),
+                total_marks=100, created_by=lecturer
+            )
+            for index in range(11)
+        ])
+        paginator = KeysetPaginator(Assignment.objects.all(), per_page=4)
+        rows, _ = self.walk_forward(paginator)
+        self.assertEqual(rows, list(Assignment.objects.order_by('-due_date', '-pk')))
+
+    def test_relation_ordering_is_expanded(self):
+        keys = KeysetPaginator(Course.objects.all()).keys
+        self.assertEqual(keys, [
+            ('department__school__name', False),
+            ('department__name', False),
+            ('code', False),
+            ('id', False),
+        ])
+
+    def test_deep_pages_cost_one_query(self):
+        paginator = KeysetPaginator(School.objects.all(), per_page=5)
+        page = paginator.get_page()
+        while page.has_next:
+            with self.assertNumQueries(1):
+                page = paginator.get_page(after=page.next_cursor)
+
+    def test_invalid_cursor_returns_first_page(self):
+        paginator = KeysetPaginator(School.objects.all(), per_page=5)
+        page = paginator.get_page(after='not-a-cursor')
+        self.assertEqual(list(page), list(School.objects.order_by('name', 'pk')[:5]))
+        self.assertFalse(page.has_previous)
+
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.counts = generate_university(students=8, courses=4, lecturers=2, seed=1)
+
+    def test_generator_is_deterministic_and_consistent(self):
+        self.assertEqual(Course.objects.count(), self.counts['courses'])
+        self.assertEqual(Assignment.objects.count(), 12)
+        course = Course.objects.with_stats().first()
+        self.assertEqual(course.student_count, course.enrollments.count())
+
+    def test_run_benchmark_detects_regressions(self):
+        results = run_benchmark(repeat=1)
+        self.assertIn('courses:course_detail@student', results)
+        self.assertIn('assignments:pending_submissions@lecturer', results)
+        self.assertNotIn('accounts:logout@student', results)
+        self.assertEqual(compare_to_baseline(results, results), [])
+
+        baseline = {key: dict(result) for key, result in results.items()}
+        baseline['courses:my_courses@student']['queries'] -= 1
+        regressions = compare_to_baseline(results, baseline)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith('courses:my_courses@student'))
+
+        self.assertNotIn('assignments:download_submission@student', results)
+        baseline = {key: dict(result) for key, result in results.items()}
+        baseline['courses:my_courses@student']['status'] = 404
+        self.assertEqual(compare_to_baseline(results, baseline), [
+            f"courses:my_courses@student: status {results['courses:my_courses@student']['status']} (baseline 404)"
+        ])
+
+        statuses = {'a@student': 200, 'b@student': 404, 'c@lecturer': 500, 'd@lecturer': 503}
+        results = {key: {'status': status} for key, status in statuses.items()}
+        self.assertEqual(server_errors(results), ['c@lecturer: status 500', 'd@lecturer: status 503'])
+        self.assertEqual(server_errors(results, {'c@lecturer': {'status': 500}}), ['d@lecturer: status 503'])
+
+    def test_hot_queries_use_the_hot_path_indexes(self):
+        plans = {
+            name: result['plan']
+            for name, result in explain_hot_queries(sample_objects(), repeat=1).items()
+        }
+        self.assertIn('submission_ungraded_idx', plans['pending_submissions'])
+        self.assertIn('submission_student_date_idx', plans['my_submissions'])
+        self.assertIn('assignment_course_due_idx', plans['upcoming_assignments'])
+        self.assertIn('course_active_department_idx', plans['active_department_courses'])
+        self.assertIn('user_department_type_idx', plans['department_students'])
+
+class SyntheticDataTests(TestCase):
+    def snapshot(self, **options):
+        with transaction.atomic():
+            generate_university(**options)
+            rows = list(Submission.objects.order_by(
+                'assignment__title', 'student__username'
+            ).values_list('assignment__title', 'student__username', 'marks'))
+            transaction.set_rollback(True)
+        return rows
+
+    def test_same_seed_generates_same_data(self):
+        options = {'students': 12, 'courses': 4, 'batch_size': 7}
+        first = self.snapshot(seed=3, **options)
+        self.assertEqual(self.snapshot(seed=3, **options), first)
+        self.assertNotEqual(self.snapshot(seed=4, **options), first)
+
+    def test_command_reports_counts_and_requires_empty_database(self):
+        out = StringIO()
+        call_command(
+            'generate_university', students=10, courses=3, lecturers=2,
+            assignments_per_course=2, batch_size=4, stdout=out
+        )
+        self.assertIn('Generated', out.getvalue())
+        self.assertEqual(User.objects.filter(user_type='student').count(), 10)
+        self.assertEqual(Course.objects.with_stats().get(code='C00000').assignment_count, 2)
+        with self.assertRaises(CommandError):
+            call_command('generate_university', stdout=StringIO())
+
+    def test_command_requires_a_lecturer(self):
+        with self.assertRaisesMessage(CommandError, 'At least one lecturer'):
+            call_command('generate_university', lecturers=0, stdout=StringIO())
+        self.assertFalse(School.objects.exists())
+
+@override_settings(REQUEST_INSTRUMENTATION=True)
+class RequestInstrumentationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate_university(students=4, courses=2, lecturers=1)
+        cls.student = User.objects.filter(user_type='student').first()
+        cls.staff = User.objects.create_user(
+            username='admin', user_type='lecturer', staff_number='ADM', is_staff=True
+        )
+
+    def setUp(self):
+        request_stats.reset()
+
+    def test_duplicate_queries_share_a_fingerprint(self):
+        recorder = QueryRecorder()
+        execute = lambda sql, params, many, context: None
+        recorder(execute, 'SELECT * FROM t WHERE id IN (%s, %s,\n %s)', [1, 2, 3], False, {})
+        recorder(execute, 'SELECT * FROM t WHERE id IN (%s, %s)', [4, 5], False, {})
+        recorder(execute, 'SELECT * FROM u', [], False, {})
+        self.assertEqual(recorder.count, 3)
+        self.assertEqual(recorder.duplicates(), {'SELECT * FROM t WHERE id IN (...)': 2})
+
+    def test_requests_are_timed_logged_and_aggregated(self):
+        self.client.force_login(self.student)
+        with self.assertLogs('core.requests', 'INFO') as logs:
+            response = self.client.get(reverse('assignments:assignment_list'))
+        self.assertRegex(response['Server-Timing'], r'^total;dur=[\d.]+, sql;dur=[\d.]+;desc="\d+ queries"$')
+
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['view'], 'assignments:assignment_list')
+        self.assertEqual(line['status'], 200)
+        self.assertEqual(line['sql_queries'], 3)
+
+        stats = request_stats.snapshot()['assignments:assignment_list']
+        self.assertEqual(stats['requests'], 1)
+        self.assertEqual(stats['max_queries'], 3)
+        self.assertEqual(sum(stats['query_histogram'].values()), 1)
+
+    def test_log_lines_reach_a_handler(self):
+        logger = logging.getLogger('core.requests')
+        self.assertTrue(logger.isEnabledFor(logging.INFO))
+        self.assertTrue(logger.handlers)
+
+    def test_statistics_endpoint_is_staff_only(self):
+        url = reverse('request_statistics')
+        with self.assertLogs('core.requests', 'INFO'):
+            self.client.force_login(self.student)
+            self.assertEqual(self.client.get(url).status_code, 302)
+
+            self.client.force_login(self.staff)
+            self.client.get(reverse('courses:teaching_courses'))
+            views = self.client.get(url).json()['views']
+        self.assertEqual(views['courses:teaching_courses']['requests'], 1)
+
+    @override_settings(REQUEST_INSTRUMENTATION=False)
+    def test_disabled_by_default(self):
+        self.client.force_login(self.student)
+        response = self.client.get(reverse('assignments:assignment_list'))
+        self.assertNotIn('Server-Timing', response)
+
+class SQLiteTuningTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_are_applied_to_new_connections(self):
+        # synchronous=NORMAL is 1; the test connection was opened after app loading
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('busy_timeout'), 20000)
+
+        default_cache_size = self.pragma('cache_size')
+        with override_settings(SQLITE_PRAGMAS={'cache_size': -1024}):
+            configure_sqlite_connection(sender=None, connection=connection)
+        self.assertEqual(self.pragma('cache_size'), -1024)
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA cache_size = {default_cache_size}')
+
+    def test_wal_is_written_to_the_database_file(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        name = os.path.join(directory.name, 'db.sqlite3')
+        sqlite_connection = sqlite3.connect(name)
+        fake = SimpleNamespace(vendor='sqlite', settings_dict={'NAME': name}, connection=sqlite_connection)
+        with override_settings(SQLITE_PRAGMAS={'journal_mode': 'WAL'}):
+            configure_sqlite_connection(sender=None, connection=fake)
+        sqlite_connection.close()
+
+        # A later connection without the pragma still finds the file in WAL mode
+        sqlite_connection = sqlite3.connect(name)
+        self.addCleanup(sqlite_connection.close)
+        self.assertEqual(sqlite_connection.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+
+class DatabaseConfigurationTests(SimpleTestCase):
+    def test_sqlite_is_the_default(self):
+        databases = databases_from_env(default_name='db.sqlite3', environ={})
+        self.assertEqual(list(databases), ['default'])
+        self.assertEqual(databases['default']['ENGINE'], 'django.db.backends.sqlite3')
+        self.assertEqual(databases['default']['NAME'], 'db.sqlite3')
+
+    def test_postgresql_pool_and_replica(self):
+        databases = databases_from_env(environ={
+            'DB_ENGINE': 'postgresql', 'DB_NAME': 'university', 'DB_HOST': 'primary',
+            'DB_POOL': 'true', 'DB_POOL_MAX_SIZE': '20',
+            'DB_REPLICA_NAME': 'university', 'DB_REPLICA_HOST': 'replica',
+        })
+        primary, replica = databases['default'], databases['replica']
+        self.assertEqual(primary['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual(primary['OPTIONS']['pool'], {'min_size': 2, 'max_size': 20})
+        # Pooling and persistent connections are mutually exclusive
+        self.assertEqual(primary['CONN_MAX_AGE'], 0)
+        self.assertEqual(replica['HOST'], 'replica')
+        self.assertEqual(replica['OPTIONS']['pool']['max_size'], 20)
+        self.assertEqual(replica['TEST'], {'MIRROR': 'default'})
+
+    def test_second_sqlite_file_as_replica(self):
+        databases = databases_from_env(default_name='db.sqlite3', environ={'DB_REPLICA_NAME': 'replica.sqlite3'})
+        self.assertEqual(databases['replica']['NAME'], 'replica.sqlite3')
+        self.assertEqual(databases['replica']['ENGINE'], 'django.db.backends.sqlite3')
+
+    def test_unknown_engine_is_rejected(self):
+        with self.assertRaises(ValueError):
+            databases_from_env(environ={'DB_ENGINE': 'oracle'})
+
+class ReplicaRouterTests(SimpleTestCase):
+    router = ReplicaRouter()
+
+    @override_settings(REPLICA_DATABASE='replica')
+    def test_reads_go_to_replica_only_when_requested(self):
+        self.assertIsNone(self.router.db_for_read(Course))
+        with use_replica():
+            self.assertEqual(self.router.db_for_read(Course), 'replica')
+            self.assertIsNone(self.router.db_for_read(Session))
+            self.assertEqual(self.router.db_for_write(Course), 'default')
+
+    @override_settings(REPLICA_DATABASE=None)
+    def test_no_replica_configured(self):
+        with use_replica():
+            self.assertIsNone(self.router.db_for_read(Course))
+
+    def test_decorator_only_applies_to_safe_methods(self):
+        view = read_from_replica(lambda request: replica_reads.get())
+        factory = RequestFactory()
+        self.assertTrue(view(factory.get('/')))
+        self.assertFalse(view(factory.post('/')))
+        self.assertFalse(replica_reads.get())
+
+    @override_settings(REPLICA_DATABASE='replica')
+    def test_users_are_read_from_the_primary(self):
+        with use_replica():
+            self.assertIsNone(self.router.db_for_read(User))
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='Science', code='SCI')
+        department = Department.objects.create(name='Computing', code='CS', school=school)
+        cls.lecturer = User.objects.create_user(username='lecturer', user_type='lecturer', staff_number='S001')
+        cls.other_lecturer = User.objects.create_user(username='other', user_type='lecturer', staff_number='S002')
+        cls.student = User.objects.create_user(
+            username='student', user_type='student', registration_number='R001', department=department
+        )
+        cls.classmate = User.objects.create_user(
+            username='classmate', user_type='student', registration_number='R002', department=department
+        )
+        cls.course = Course.objects.create(
+            code='CS101', name='Algorithms', department=department, lecturer=cls.lecturer,
+            description='Sorting, graphs and dynamic programming'
+        )
+        cls.other_course = Course.objects.create(
+            code='BIO1', name='Biology', department=Department.objects.create(
+                name='Biology', code='BIO', school=school
+            ),
+            lecturer=cls.other_lecturer, description='Cells and graphs of populations'
+        )
+        cls.assignment = Assignment.objects.create(
+            title='Graph traversal', course=cls.course, description='Implement breadth first search',
+            total_marks=100, due_date=timezone.now(), created_by=cls.lecturer
+        )
+        cls.hidden_assignment = Assignment.objects.create(
+            title='Population graphs', course=cls.other_course, description='',
+            total_marks=100, due_date=timezone.now(), created_by=cls.other_lecturer
+        )
+        cls.submission = Submission.objects.create(
+            assignment=cls.assignment, student=cls.student, content='My graph walker uses a queue'
+        )
+        cls.classmate_submission = Submission.objects.create(
+            assignment=cls.assignment, student=cls.classmate, content='A graph walker with recursion'
+        )
+
+    def found(self, user, query):
+        return [(result['kind'], result['object_id']) for result in search(user, query)]
+
+    def test_results_are_filtered_by_permission(self):
+        self.assertCountEqual(self.found(self.student, 'graph'), [
+            ('course', self.course.pk),
+            ('course', self.other_course.pk),
+            ('assignment', self.assignment.pk),
+            ('submission', self.submission.pk),
+        ])
+        self.assertCountEqual(self.found(self.lecturer, 'walker'), [
+            ('submission', self.submission.pk),
+            ('submission', self.classmate_submission.pk),
+        ])
+        self.assertEqual(self.found(self.other_lecturer, 'walker'), [])
+
+    def test_title_matches_rank_first_and_prefixes_match(self):
+        results = self.found(self.student, 'travers')
+        self.assertEqual(results[0], ('assignment', self.assignment.pk))
+        self.assertEqual(self.found(self.student, 'algorithms')[0], ('course', self.course.pk))
+
+    def test_index_follows_saves_and_deletes(self):
+        self.submission.content = 'Dijkstra with a heap'
+        self.submission.save()
+        self.assertEqual(self.found(self.student, 'dijkstra'), [('submission', self.submission.pk)])
+        self.assertEqual(self.found(self.student, 'queue'), [])
+
+        self.assignment.delete()
+        self.assertEqual(self.found(self.lecturer, 'dijkstra'), [])
+        self.assertEqual(self.found(self.lecturer, 'traversal'), [])
+
+    def test_grading_saves_skip_the_index(self):
+        submission = Submission.objects.get(pk=self.submission.pk)
+        submission.marks = 80
+        with CaptureQueriesContext(connection) as context:
+            submission.save()
+            submission.feedback = 'Good'
+            submission.save(update_fields=['feedback'])
+        self.assertFalse(any(
+            'core_searchentry' in query['sql'] for query in context.captured_queries
+        ))
+        self.assertEqual(self.found(self.student, 'queue'), [('submission', self.submission.pk)])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.found(self.student, '"OR* NEAR('), [])
+        self.assertEqual(self.found(self.student, '  !! '), [])
+
+    def test_rebuild_and_view(self):
+        self.assertEqual(rebuild_search_index(batch_size=2), 6)
+        self.client.force_login(self.student)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('search'), {'q': 'graph'})
+        self.assertContains(response, reverse('assignments:submission_detail', args=[self.submission.pk]))
+        self.assertNotContains(response, 'Population graphs')
+
+class AdminChangelistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='admin', password='password')
+        school = School.objects.create(name='Science', code='SCI')
+        cls.department = Department.objects.create(name='Computing', code='CS', school=school)
+        cls.lecturer = User.objects.create_user(username='lecturer', user_type='lecturer', staff_number='S001')
+        cls.grow(1)
+
+    @classmethod
+    def grow(cls, size):
+        """
+        Bring the data up to `size` students enrolled in `size` courses of one
+        assignment each, every student submitting every assignment, through
+        bulk_create so no signals fire.
+        """
+        existing = Course.objects.count()
+        courses = Course.objects.bulk_create([
+            Course(code=f'C{index}', name=f'Course {index}', department=cls.department, lecturer=cls.lecturer)
+            for index in range(existing, size)
+        ])
+        students = User.objects.bulk_create([
+            User(username=f'student{index}', user_type='student', registration_number=f'R{index}',
+                 department=cls.department)
+            for index in range(existing, size)
+        ])
+        Assignment.objects.bulk_create([
+            Assignment(title=f'Assignment {course.code}', course=course, total_marks=100,
+                       due_date=timezone.now(), created_by=cls.lecturer)
+            for course in courses
+        ])
+        new_students = {student.pk for student in students}
+        new_courses = {course.pk for course in courses}
+        all_students = User.objects.filter(user_type='student').values_list('pk', flat=True)
+        all_courses = Course.objects.values_list('pk', flat=True)
+        all_assignments = Assignment.objects.values_list('pk', 'course_id')
+        Enrollment.objects.bulk_create([
+            Enrollment(student_id=student, course_id=course)
+            for student in all_students for course in all_courses
+            if student in new_students or course in new_courses
+        ])
+        Submission.objects.bulk_create([
+            Submission(student_id=student, assignment_id=assignment, marks=50)
+            for student in all_students for assignment, course in all_assignments
+            if student in new_students or course in new_courses
+        ])
+
+    def changelist_urls(self):
+        course = Course.objects.first()
+        student = User.objects.filter(user_type='student').first()
+        return [
+            reverse('admin:assignments_submission_changelist'),
+            reverse('admin:assignments_submission_changelist') + f'?assignment__course__id__exact={course.pk}',
+            reverse('admin:assignments_submission_changelist') + f'?student__id__exact={student.pk}',
+            reverse('admin:assignments_assignment_changelist'),
+            reverse('admin:courses_enrollment_changelist'),
+            reverse('admin:courses_enrollment_changelist') + f'?course__id__exact={course.pk}',
+            reverse('admin:courses_course_changelist'),
+            reverse('admin:accounts_user_changelist'),
+            reverse('admin:schools_department_changelist'),
+        ]
+
+    def query_counts(self):
+        counts = {}
+        for url in self.changelist_urls():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            counts[url.split('/admin/')[1]] = len(queries)
+        return counts
+
+    def test_query_counts_do_not_grow_with_rows(self):
+        self.client.force_login(self.admin)
+        small = self.query_counts()
+        self.grow(100)
+        self.assertEqual(Submission.objects.count(), 10000)
+        self.assertEqual(Enrollment.objects.count(), 10000)
+        self.assertEqual(self.query_counts(), small)
+
+    def test_autocomplete_filter_renders_only_the_selected_object(self):
+        self.grow(3)
+        course = Course.objects.last()
+        self.client.force_login(self.admin)
+        response = self.client.get(
+            reverse('admin:assignments_submission_changelist'),
+            {'assignment__course__id__exact': course.pk}
+        )
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertContains(response, f'<option value="{course.pk}" selected>{course}</option>', html=True)
+        self.assertNotContains(response, str(Course.objects.first()))
+        self.assertEqual(response.context['cl'].result_count, 3)
+
+    def test_estimated_count_uses_table_statistics(self):
+        self.grow(100)
+        unfiltered = Submission.objects.all()
+        filtered = Submission.objects.filter(student__username='student0')
+        self.assertEqual(EstimatedCountPaginator(unfiltered, 100).count, 10000)
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(EstimatedCountPaginator(unfiltered, 100).count, 10000)
+        self.assertNotIn('COUNT', queries[0]['sql'])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(EstimatedCountPaginator(filtered, 100).count, 100)
+        self.assertEqual(len(queries), 1)
+
+    def test_stale_estimate_is_clamped_to_the_last_page(self):
+        self.grow(100)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        Submission.objects.filter(pk__gt=Submission.objects.order_by('pk')[149].pk).delete()
+
+        paginator = EstimatedCountPaginator(Submission.objects.order_by('pk'), 100)
+        self.assertEqual(paginator.count, 10000)
+        page = paginator.page(50)
+        self.assertEqual((page.number, len(page)), (2, 50))
+        self.assertEqual((paginator.count, paginator.num_pages), (150, 2))
+
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('admin:assignments_submission_changelist'), {'p': 50})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['cl'].result_list), 50)
@@ -1,5 +1,9 @@
-from django.shortcuts import redirect
+from django.shortcuts import redirect, render
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from .middleware import request_stats
+from .search import search as search_entries
 
 @login_required
 def home(request):
@@ -10,3 +14,26 @@ def home(request):
         return redirect('accounts:student_dashboard')
     else:
         return redirect('accounts:lecturer_dashboard')
+
+@login_required
+def search(request):
+    """
+    Full-text search over the courses, assignments and submissions the
+    user may open, best matches first.
+    """
+    query = request.GET.get('q', '').strip()
+    results = search_entries(request.user, query) if query else []
+    return render(request, 'core/search.html', {
+        'query': query,
+        'results': results
+    })
+
+@staff_member_required
+def request_statistics(request):
+    """
+    Per-URL-name request duration and query count histograms collected by
+    RequestInstrumentationMiddleware in this process, slowest views first.
+    """
+    views = request_stats.snapshot()
+    ordered = sorted(views.items(), key=lambda item: item[1]['mean_queries'], reverse=True)
+    return JsonResponse({'views': dict(ordered)})
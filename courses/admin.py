@@ -1,17 +1,20 @@
 from django.contrib import admin
-from django.db.models import Count
+from core.admin import AutocompleteFilter, AutocompleteFilterMixin
+from core.pagination import EstimatedCountPaginator
 from .models import Course, Enrollment
 
 @admin.register(Course)
-class CourseAdmin(admin.ModelAdmin):
+class CourseAdmin(AutocompleteFilterMixin, admin.ModelAdmin):
     list_display = ('code', 'name', 'department', 'lecturer', 'student_count', 'is_active')
-    list_filter = ('department', 'is_active', 'created_at')
+    list_filter = (('department', AutocompleteFilter), 'is_active', 'created_at')
+    list_select_related = ('department__school', 'lecturer')
     search_fields = ('code', 'name', 'lecturer__username', 'department__name')
     ordering = ('department', 'code')
     
     def get_queryset(self, request):
-        qs = super().get_queryset(request)
-        return qs.annotate(student_count=Count('enrollments'))
+        # Read the enrollment count from CourseStats instead of grouping
+        # every course over its enrollments
+        return super().get_queryset(request).with_stats()
     
     def student_count(self, obj):
         return obj.student_count
@@ -24,11 +27,22 @@ class CourseAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
 
 @admin.register(Enrollment)
-class EnrollmentAdmin(admin.ModelAdmin):
+class EnrollmentAdmin(AutocompleteFilterMixin, admin.ModelAdmin):
     list_display = ('student', 'course', 'status', 'enrolled_at')
-    list_filter = ('status', 'enrolled_at', 'course__department')
+    list_filter = (
+        'status',
+        'enrolled_at',
+        ('course__department', AutocompleteFilter),
+        ('course', AutocompleteFilter),
+        ('student', AutocompleteFilter),
+    )
+    list_select_related = ('student', 'course')
     search_fields = ('student__username', 'course__code', 'course__name')
     ordering = ('-enrolled_at',)
+    raw_id_fields = ('student', 'course')
+    # The table is too large to COUNT(*) on every page load
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     def has_add_permission(self, request):
         # Only allow adding enrollments through the course interface
@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+COURSE_VERSION_KEY = 'course-version:{course_id}'
+
+def get_fragment_cache_alias():
+    return getattr(settings, 'FRAGMENT_CACHE_ALIAS', 'default')
+
+def course_version_key(course_id):
+    return COURSE_VERSION_KEY.format(course_id=course_id)
+
+def course_version(course_id):
+    """
+    Return the course's cache version, which is part of the key of every
+    cached fragment showing the course's data. A missing version starts
+    from the current time in nanoseconds, so it cannot repeat a version
+    that was evicted along with fragments still cached under it.
+    """
+    return caches[get_fragment_cache_alias()].get_or_set(
+        course_version_key(course_id), time.time_ns, None
+    )
+
+def bump_course_versions(course_ids):
+    """
+    Move the given courses to a new cache version once the current
+    transaction commits, so their cached fragments are no longer read and
+    expire on their own.
+
+    Bumping before the commit would let a concurrent request render the
+    old rows and cache them under the new version. Each bump writes a new
+    timestamp rather than incrementing, so concurrent bumps can't settle
+    on a version that was already read.
+    """
+    keys = {course_version_key(course_id) for course_id in course_ids if course_id is not None}
+    if keys:
+        transaction.on_commit(lambda: caches[get_fragment_cache_alias()].set_many(
+            dict.fromkeys(keys, time.time_ns()), None
+        ))
+
+def fragment_context(course_id):
+    """
+    Context for the {% cache %} blocks of the course and assignment pages.
+    """
+    return {
+        'fragment_cache': get_fragment_cache_alias(),
+        'fragment_timeout': getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 3600),
+        'course_version': course_version(course_id),
+    }
@@ -0,0 +1,162 @@
+from itertools import batched
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from accounts.cache import invalidate_dashboards
+from .cache import bump_course_versions
+from .models import Course, Enrollment
+from .stats import rebuild_course_stats
+
+def get_batch_size(batch_size=None):
+    return batch_size or getattr(settings, 'ENROLLMENT_BATCH_SIZE', 500)
+
+def department_student_ids(department_id):
+    """
+    Return a queryset of the ids of every student in a department.
+    """
+    return get_user_model().objects.filter(
+        department_id=department_id,
+        user_type='student'
+    ).values_list('pk', flat=True)
+
+def enroll_students(course, student_ids, batch_size=None):
+    """
+    Enroll the given students in a course with chunked bulk inserts.
+
+    Existing enrollments are left untouched (ignore_conflicts relies on the
+    student/course unique constraint), and the whole run happens in one
+    transaction. Returns the number of enrollments created.
+    """
+    batch_size = get_batch_size(batch_size)
+    if hasattr(student_ids, 'iterator'):
+        student_ids = student_ids.iterator(chunk_size=batch_size)
+
+    with transaction.atomic():
+        before = Enrollment.objects.filter(course=course).count()
+        for batch in batched(student_ids, batch_size):
+            Enrollment.objects.bulk_create(
+                [
+                    Enrollment(student_id=student_id, course=course, status='enrolled')
+                    for student_id in batch
+                ],
+                batch_size=batch_size,
+                ignore_conflicts=True
+            )
+            # bulk_create sends no signals, so evict the dashboards here
+            invalidate_dashboards([*batch, course.lecturer_id])
+        created = Enrollment.objects.filter(course=course).count() - before
+        if created:
+            rebuild_course_stats([course.pk])
+            bump_course_versions([course.pk])
+        return created
+
+def enroll_department_students(course, batch_size=None):
+    """
+    Enroll every student of the course's department in the course.
+    """
+    return enroll_students(course, department_student_ids(course.department_id), batch_size)
+
+class DepartmentCourses:
+    """
+    The course sets a department's students are reconciled against.
+
+    Students are enrolled in every active course of their department plus
+    the department's required courses. Enrollments are only removed from
+    courses outside that department entirely, so history in courses that
+    were later deactivated is kept.
+    """
+    def __init__(self, department_id):
+        rows = Course.objects.filter(
+            Q(department_id=department_id) | Q(required_by_departments=department_id)
+        ).order_by().values_list('pk', 'is_active', 'department_id', 'lecturer_id').distinct()
+
+        self.expected = set()
+        self.allowed = set()
+        self.lecturers = {}
+        required = set(Course.objects.filter(
+            required_by_departments=department_id
+        ).order_by().values_list('pk', flat=True))
+        for course_id, is_active, course_department_id, lecturer_id in rows:
+            self.allowed.add(course_id)
+            self.lecturers[course_id] = lecturer_id
+            if course_id in required or (is_active and course_department_id == department_id):
+                self.expected.add(course_id)
+
+def reconcile_students(students, batch_size=None):
+    """
+    Bring the enrollments of the given students in line with their
+    departments.
+
+    `students` is an iterable of (student_id, department_id) pairs and is
+    consumed in batches; each batch reads the current enrollments in one
+    query, diffs them against the expected course sets and applies the
+    result with one bulk insert and one bulk delete. Only 'enrolled' rows
+    are removed, and dropped rows are kept so students aren't enrolled in
+    courses they dropped again. Returns an (added, removed) tuple.
+    """
+    batch_size = get_batch_size(batch_size)
+    departments = {}
+    added = removed = 0
+
+    for batch in batched(students, batch_size):
+        department_ids = dict(batch)
+        current = {}
+        for pk, student_id, course_id, status in Enrollment.objects.filter(
+            student_id__in=department_ids
+        ).order_by().values_list('pk', 'student_id', 'course_id', 'status'):
+            current.setdefault(student_id, {})[course_id] = (pk, status)
+
+        to_add, to_remove, touched, courses_changed = [], [], set(), set()
+        for student_id, department_id in department_ids.items():
+            if department_id is None:
+                # Without a department there is nothing to reconcile against
+                continue
+            if department_id not in departments:
+                departments[department_id] = DepartmentCourses(department_id)
+            courses = departments[department_id]
+            enrolled = current.get(student_id, {})
+
+            for course_id in courses.expected - enrolled.keys():
+                to_add.append(Enrollment(student_id=student_id, course_id=course_id, status='enrolled'))
+                touched.update((student_id, courses.lecturers[course_id]))
+                courses_changed.add(course_id)
+            for course_id in enrolled.keys() - courses.allowed:
+                pk, status = enrolled[course_id]
+                if status == 'enrolled':
+                    to_remove.append(pk)
+                    courses_changed.add(course_id)
+
+        with transaction.atomic():
+            if to_add:
+                # Rows enrolled concurrently are skipped by the insert, so
+                # the rows actually added are counted around it
+                new_rows = Enrollment.objects.filter(
+                    student_id__in={enrollment.student_id for enrollment in to_add}
+                )
+                before = new_rows.count()
+                Enrollment.objects.bulk_create(to_add, ignore_conflicts=True)
+                added += new_rows.count() - before
+                invalidate_dashboards(touched)
+            if to_remove:
+                # Queryset delete sends post_delete, which evicts dashboards
+                Enrollment.objects.filter(pk__in=to_remove).delete()
+            if courses_changed:
+                rebuild_course_stats(courses_changed)
+                bump_course_versions(courses_changed)
+        removed += len(to_remove)
+
+    return added, removed
+
+def reconcile_student(student):
+    """
+    Reconcile a single student's enrollments with their department. A
+    user who is no longer a student or has no department loses every
+    current enrollment; completed and dropped rows are kept as history.
+    """
+    if not student.is_student() or student.department_id is None:
+        # Queryset delete sends post_delete, which updates stats and caches
+        removed, _ = Enrollment.objects.filter(student=student, status='enrolled').delete()
+        return 0, removed
+    return reconcile_students([(student.pk, student.department_id)])
@@ -0,0 +1,86 @@
+from decimal import Decimal
+from itertools import groupby
+from operator import itemgetter
+
+from assignments.models import Assignment, Submission
+from .models import Enrollment
+
+# Spreadsheets evaluate cells starting with these characters as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+def csv_safe(value):
+    """
+    Prefix text that a spreadsheet would run as a formula with a quote, so
+    names and titles entered by users are shown as plain text.
+    """
+    if value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+class Echo:
+    """
+    File-like object whose write() returns the value, so csv.writer can
+    produce lines for a streaming response.
+    """
+    def write(self, value):
+        return value
+
+def gradebook_rows(course, chunk_size=2000):
+    """
+    Yield the gradebook of a course as CSV rows: one row per enrolled
+    student and one column per assignment, filled in with the marks.
+
+    Enrollments and submissions are each read with a single streaming
+    query ordered by student, and merged student by student. Only one
+    student's marks are held in memory at a time, so memory use does not
+    grow with the size of the course.
+    """
+    assignments = list(Assignment.objects.filter(
+        course=course
+    ).order_by('due_date', 'pk').values_list('pk', 'title', 'total_marks'))
+
+    yield ['Registration Number', 'Student'] + [
+        csv_safe(f'{title} (/{total_marks})') for _, title, total_marks in assignments
+    ] + ['Total']
+
+    enrollments = Enrollment.objects.active().filter(
+        course=course
+    ).order_by('student_id').values_list(
+        'student_id',
+        'student__registration_number',
+        'student__first_name',
+        'student__last_name'
+    ).iterator(chunk_size=chunk_size)
+
+    submissions = Submission.objects.filter(
+        assignment__course=course
+    ).order_by('student_id').values_list(
+        'student_id', 'assignment_id', 'marks'
+    ).iterator(chunk_size=chunk_size)
+    by_student = groupby(submissions, key=itemgetter(0))
+    current = next(by_student, None)
+
+    for student_id, registration_number, first_name, last_name in enrollments:
+        # Skip submissions from students no longer enrolled
+        while current is not None and current[0] < student_id:
+            current = next(by_student, None)
+
+        marks = {}
+        if current is not None and current[0] == student_id:
+            marks = {assignment_id: mark for _, assignment_id, mark in current[1]}
+            current = next(by_student, None)
+
+        cells = []
+        for assignment_id, _, _ in assignments:
+            if assignment_id not in marks:
+                cells.append('')
+            elif marks[assignment_id] is None:
+                cells.append('ungraded')
+            else:
+                cells.append(marks[assignment_id])
+        total = sum((mark for mark in marks.values() if mark is not None), Decimal(0))
+
+        yield [
+            csv_safe(registration_number or ''),
+            csv_safe(f'{first_name} {last_name}'.strip())
+        ] + cells + [f'{total:.2f}']
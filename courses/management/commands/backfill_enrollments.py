@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from courses.enrollment import enroll_department_students, get_batch_size
+from courses.models import Course
+
+class Command(BaseCommand):
+    help = 'Enroll department students in every active course they are missing from.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course',
+            action='append',
+            dest='codes',
+            metavar='CODE',
+            help='Only backfill the given course code (may be repeated).'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Rows per bulk insert (defaults to ENROLLMENT_BATCH_SIZE).'
+        )
+
+    def handle(self, *args, **options):
+        courses = Course.objects.filter(is_active=True)
+        if options['codes']:
+            courses = courses.filter(code__in=[code.upper() for code in options['codes']])
+
+        batch_size = get_batch_size(options['batch_size'])
+        total = 0
+        for course in courses.iterator():
+            created = enroll_department_students(course, batch_size)
+            total += created
+            if created:
+                self.stdout.write(f'{course.code}: enrolled {created} students')
+
+        self.stdout.write(self.style.SUCCESS(f'Backfilled {total} enrollments.'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from courses.models import Course
+from courses.stats import rebuild_course_stats
+
+class Command(BaseCommand):
+    help = 'Recompute the CourseStats counters from the enrollment, assignment and submission tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course',
+            action='append',
+            dest='codes',
+            metavar='CODE',
+            help='Only rebuild the given course code (may be repeated).'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Courses recomputed per batch (default 500).'
+        )
+
+    def handle(self, *args, **options):
+        course_ids = None
+        if options['codes']:
+            course_ids = list(Course.objects.filter(
+                code__in=[code.upper() for code in options['codes']]
+            ).values_list('pk', flat=True))
+
+        rebuilt = rebuild_course_stats(course_ids, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt statistics for {rebuilt} courses.'))
@@ -0,0 +1,46 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from courses.enrollment import get_batch_size, reconcile_students
+from schools.models import School, Department
+
+class Command(BaseCommand):
+    help = "Reconcile students' enrollments with the courses of their department."
+
+    def add_arguments(self, parser):
+        scope = parser.add_mutually_exclusive_group()
+        scope.add_argument('--department', metavar='CODE', help='Only reconcile this department.')
+        scope.add_argument('--school', metavar='CODE', help='Only reconcile departments of this school.')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Students per batch (defaults to ENROLLMENT_BATCH_SIZE).'
+        )
+
+    def handle(self, *args, **options):
+        students = get_user_model().objects.filter(
+            user_type='student',
+            department__isnull=False
+        )
+        if options['department']:
+            try:
+                department = Department.objects.get(code=options['department'])
+            except Department.DoesNotExist:
+                raise CommandError(f"Department '{options['department']}' does not exist.")
+            students = students.filter(department=department)
+        elif options['school']:
+            try:
+                school = School.objects.get(code=options['school'])
+            except School.DoesNotExist:
+                raise CommandError(f"School '{options['school']}' does not exist.")
+            students = students.filter(department__school=school)
+
+        batch_size = get_batch_size(options['batch_size'])
+        # Stream students rather than loading the whole population at once
+        rows = students.order_by('pk').values_list('pk', 'department_id').iterator(
+            chunk_size=batch_size
+        )
+        added, removed = reconcile_students(rows, batch_size)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Reconciled enrollments: {added} added, {removed} removed.'
+        ))
@@ -0,0 +1,71 @@
+# Generated by Django 5.1.7 on 2026-10-17 05:52
+
+from itertools import batched
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_course_stats(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    CourseStats = apps.get_model('courses', 'CourseStats')
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    Assignment = apps.get_model('assignments', 'Assignment')
+    Submission = apps.get_model('assignments', 'Submission')
+
+    # Same grouped aggregates as courses.stats.rebuild_course_stats, which
+    # can't be imported here because it uses the current models
+    course_ids = Course.objects.order_by('pk').values_list('pk', flat=True)
+    for batch in batched(course_ids.iterator(), 500):
+        rows = {course_id: CourseStats(course_id=course_id) for course_id in batch}
+        grouped = [
+            Enrollment.objects.filter(
+                course__in=batch, status__in=['enrolled', 'completed']
+            ).values('course').annotate(student_count=models.Count('pk')),
+            Assignment.objects.filter(course__in=batch).values('course').annotate(
+                assignment_count=models.Count('pk')
+            ),
+            Submission.objects.filter(assignment__course__in=batch).values(
+                'assignment__course'
+            ).annotate(
+                submission_count=models.Count('pk'),
+                ungraded_count=models.Count('pk', filter=models.Q(marks__isnull=True)),
+                graded_count=models.Count('marks'),
+                marks_total=models.Sum('marks'),
+            ),
+        ]
+        for queryset in grouped:
+            for values in queryset.order_by():
+                course_id = values.pop('course', None) or values.pop('assignment__course')
+                for field, value in values.items():
+                    setattr(rows[course_id], field, value or 0)
+        CourseStats.objects.bulk_create(rows.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_alter_course_options_alter_enrollment_options_and_more'),
+        ('assignments', '0002_remove_assignment_is_active_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseStats',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='courses.course')),
+                ('student_count', models.IntegerField(default=0)),
+                ('assignment_count', models.IntegerField(default=0)),
+                ('submission_count', models.IntegerField(default=0)),
+                ('ungraded_count', models.IntegerField(default=0)),
+                ('graded_count', models.IntegerField(default=0)),
+                ('marks_total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Course statistics',
+                'verbose_name_plural': 'Course statistics',
+            },
+        ),
+        migrations.RunPython(populate_course_stats, migrations.RunPython.noop),
+    ]
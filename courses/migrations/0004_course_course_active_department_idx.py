@@ -0,0 +1,20 @@
+# Generated by Django 5.1.7 on 2026-10-17 05:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_coursestats'),
+        ('schools', '0002_department_required_courses'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['department', 'code'], name='course_active_department_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.15 on 2026-10-17 07:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_course_course_active_department_idx'),
+        ('schools', '0002_department_required_courses'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='course',
+            name='course_active_department_idx',
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['department'], name='course_active_department_idx'),
+        ),
+    ]
@@ -1,6 +1,20 @@
 from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models import Avg, Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+class CourseQuerySet(models.QuerySet):
+    def with_stats(self):
+        """
+        Annotate each course with the counters stored in its CourseStats row
+        (student_count, assignment_count, submission_count, ungraded_count),
+        read through a single join instead of aggregating the related tables.
+        """
+        return self.annotate(**{
+            field: Coalesce(F(f'stats__{field}'), 0)
+            for field in ['student_count', 'assignment_count', 'submission_count', 'ungraded_count']
+        })
 
 class Course(models.Model):
     code = models.CharField(max_length=10, unique=True)
@@ -26,9 +40,20 @@ class Course(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CourseQuerySet.as_manager()
+
     class Meta:
         ordering = ['department', 'code']
         unique_together = ['department', 'code']
+        indexes = [
+            # Active courses of a department; ordered lists use the unique
+            # (department, code) index instead
+            models.Index(
+                fields=['department'],
+                name='course_active_department_idx',
+                condition=models.Q(is_active=True)
+            ),
+        ]
 
     def __str__(self):
         return f"{self.code} - {self.name}"
@@ -49,42 +74,22 @@ class Course(models.Model):
     def auto_enroll_department_students(self):
         """
         Automatically enroll all students from the course's department.
+        Returns the number of students enrolled.
         """
-        from django.contrib.auth import get_user_model
-        User = get_user_model()
-        
-        # Get all students from the department
-        department_students = User.objects.filter(
-            department=self.department,
-            user_type='student'
-        )
-        
-        # Create enrollments
-        enrollments = []
-        for student in department_students:
-            enrollments.append(
-                Enrollment(
-                    student=student,
-                    course=self,
-                    status='enrolled'
-                )
-            )
-        
-        # Bulk create the enrollments
-        if enrollments:
-            Enrollment.objects.bulk_create(enrollments)
+        from .enrollment import enroll_department_students
+        return enroll_department_students(self)
 
     def get_enrolled_students(self):
         """
         Get all students enrolled in this course.
         """
-        return self.enrollments.select_related('student')
+        return self.enrollments.active().select_related('student')
 
     def get_student_count(self):
         """
         Get the number of enrolled students.
         """
-        return self.enrollments.count()
+        return self.enrollments.active().count()
 
     def get_assignment_count(self):
         """
@@ -92,12 +97,51 @@ class Course(models.Model):
         """
         return self.assignments.count()
 
+class EnrollmentQuerySet(models.QuerySet):
+    def active(self):
+        """
+        Exclude dropped enrollments, which are kept so reconciliation
+        doesn't enroll the student again.
+        """
+        return self.filter(status__in=Enrollment.ACTIVE_STATUSES)
+
+    def with_progress(self):
+        """
+        Annotate each enrollment with total_assignments, completed_assignments
+        and average_score using correlated subqueries, so progress for every
+        enrollment is computed in the same query that loads the rows.
+        """
+        from assignments.models import Assignment, Submission
+
+        course_assignments = Assignment.objects.filter(
+            course=OuterRef('course')
+        ).order_by().values('course').annotate(total=Count('pk')).values('total')
+
+        student_submissions = Submission.objects.filter(
+            student=OuterRef('student'),
+            assignment__course=OuterRef('course')
+        ).order_by().values('student')
+
+        return self.annotate(
+            total_assignments=Coalesce(Subquery(course_assignments), 0),
+            completed_assignments=Coalesce(
+                Subquery(student_submissions.annotate(total=Count('pk')).values('total')),
+                0
+            ),
+            average_score=Subquery(
+                student_submissions.filter(
+                    marks__isnull=False
+                ).annotate(avg=Avg('marks')).values('avg')
+            ),
+        )
+
 class Enrollment(models.Model):
     STATUS_CHOICES = [
         ('enrolled', 'Enrolled'),
         ('completed', 'Completed'),
         ('dropped', 'Dropped'),
     ]
+    ACTIVE_STATUSES = ['enrolled', 'completed']
 
     student = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -118,10 +162,20 @@ class Enrollment(models.Model):
     enrolled_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = EnrollmentQuerySet.as_manager()
+
     class Meta:
         unique_together = ['student', 'course']
         ordering = ['-enrolled_at']
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so CourseStats can count status changes
+        if 'status' in field_names:
+            instance._loaded_status = instance.status
+        return instance
+
     def __str__(self):
         return f"{self.student.username} - {self.course.code} ({self.get_status_display()})"
 
@@ -132,11 +186,18 @@ class Enrollment(models.Model):
         - completed_assignments: number of assignments submitted
         - total_assignments: total number of assignments
         - progress_percentage: percentage of completed assignments
+
+        Uses the values annotated by Enrollment.objects.with_progress() when
+        available.
         """
-        total_assignments = self.course.assignments.count()
-        completed_assignments = self.student.submissions.filter(
-            assignment__course=self.course
-        ).count()
+        if hasattr(self, 'total_assignments'):
+            total_assignments = self.total_assignments
+            completed_assignments = self.completed_assignments
+        else:
+            total_assignments = self.course.assignments.count()
+            completed_assignments = self.student.submissions.filter(
+                assignment__course=self.course
+            ).count()
         
         progress = {
             'completed_assignments': completed_assignments,
@@ -150,11 +211,50 @@ class Enrollment(models.Model):
         """
         Calculate the student's average score for graded assignments in this course.
         """
-        from django.db.models import Avg
-        
-        avg_score = self.student.submissions.filter(
-            assignment__course=self.course,
-            marks__isnull=False
-        ).aggregate(avg=Avg('marks'))['avg']
+        if hasattr(self, 'average_score'):
+            avg_score = self.average_score
+        else:
+            avg_score = self.student.submissions.filter(
+                assignment__course=self.course,
+                marks__isnull=False
+            ).aggregate(avg=Avg('marks'))['avg']
         
         return round(avg_score, 2) if avg_score is not None else None
+
+class CourseStats(models.Model):
+    """
+    Denormalized per-course counters read by the lecturer dashboards.
+
+    Rows are kept up to date incrementally by the signal handlers in
+    courses.signals and can be recomputed with the rebuild_course_stats
+    management command.
+    """
+    course = models.OneToOneField(
+        Course,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    student_count = models.IntegerField(default=0)
+    assignment_count = models.IntegerField(default=0)
+    submission_count = models.IntegerField(default=0)
+    ungraded_count = models.IntegerField(default=0)
+    graded_count = models.IntegerField(default=0)
+    marks_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Course statistics'
+        verbose_name_plural = 'Course statistics'
+
+    def __str__(self):
+        return f"Statistics for course {self.course_id}"
+
+    @property
+    def mean_score(self):
+        """
+        Mean marks across the course's graded submissions.
+        """
+        if not self.graded_count:
+            return None
+        return round(self.marks_total / self.graded_count, 2)
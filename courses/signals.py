@@ -0,0 +1,95 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .cache import bump_course_versions
+from .stats import apply_stats_delta, rebuild_course_stats
+
+def marks_deltas(marks, sign=1):
+    """
+    Counter deltas for adding (sign=1) or removing (sign=-1) a submission
+    with the given marks.
+    """
+    if marks is None:
+        return {'ungraded_count': sign}
+    return {'graded_count': sign, 'marks_total': sign * marks}
+
+def submission_course_id(submission):
+    from assignments.models import Assignment, Submission
+
+    if Submission.assignment.is_cached(submission):
+        return submission.assignment.course_id
+    return Assignment.objects.filter(
+        pk=submission.assignment_id
+    ).values_list('course_id', flat=True).first()
+
+@receiver(post_save, sender='courses.Course')
+def create_course_stats(sender, instance, created, **kwargs):
+    if created:
+        from .models import CourseStats
+        CourseStats.objects.get_or_create(course=instance)
+
+def is_active_enrollment(status):
+    from .models import Enrollment
+
+    return status in Enrollment.ACTIVE_STATUSES
+
+@receiver(post_save, sender='courses.Enrollment')
+def count_enrollment(sender, instance, created, **kwargs):
+    active = is_active_enrollment(instance.status)
+    if created:
+        apply_stats_delta(instance.course_id, student_count=int(active))
+    elif not hasattr(instance, '_loaded_status'):
+        # The previous status is unknown, so fall back to a recount
+        rebuild_course_stats([instance.course_id])
+    elif is_active_enrollment(instance._loaded_status) != active:
+        apply_stats_delta(instance.course_id, student_count=1 if active else -1)
+    instance._loaded_status = instance.status
+
+@receiver(post_delete, sender='courses.Enrollment')
+def uncount_enrollment(sender, instance, **kwargs):
+    if is_active_enrollment(instance.status):
+        apply_stats_delta(instance.course_id, student_count=-1)
+
+@receiver(post_save, sender='assignments.Assignment')
+def count_assignment(sender, instance, created, **kwargs):
+    if created:
+        apply_stats_delta(instance.course_id, assignment_count=1)
+
+@receiver(post_delete, sender='assignments.Assignment')
+def uncount_assignment(sender, instance, **kwargs):
+    apply_stats_delta(instance.course_id, assignment_count=-1)
+
+@receiver(post_save, sender='assignments.Submission')
+def count_submission(sender, instance, created, **kwargs):
+    course_id = submission_course_id(instance)
+    if created:
+        apply_stats_delta(course_id, submission_count=1, **marks_deltas(instance.marks))
+    elif not hasattr(instance, '_loaded_marks'):
+        # The previous marks are unknown, so fall back to a recount
+        rebuild_course_stats([course_id])
+    elif instance._loaded_marks != instance.marks:
+        deltas = marks_deltas(instance._loaded_marks, sign=-1)
+        for field, delta in marks_deltas(instance.marks).items():
+            deltas[field] = deltas.get(field, 0) + delta
+        apply_stats_delta(course_id, **deltas)
+    instance._loaded_marks = instance.marks
+
+@receiver(post_delete, sender='assignments.Submission')
+def uncount_submission(sender, instance, **kwargs):
+    apply_stats_delta(
+        submission_course_id(instance),
+        submission_count=-1,
+        **marks_deltas(instance.marks, sign=-1)
+    )
+
+@receiver([post_save, post_delete], sender='courses.Course')
+def bump_course_version(sender, instance, **kwargs):
+    bump_course_versions([instance.pk])
+
+@receiver([post_save, post_delete], sender='courses.Enrollment')
+@receiver([post_save, post_delete], sender='assignments.Assignment')
+def bump_related_course_version(sender, instance, **kwargs):
+    bump_course_versions([instance.course_id])
+
+@receiver([post_save, post_delete], sender='assignments.Submission')
+def bump_submission_course_version(sender, instance, **kwargs):
+    bump_course_versions([submission_course_id(instance)])
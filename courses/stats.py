@@ -0,0 +1,69 @@
+from itertools import batched
+
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+from .models import Course, CourseStats
+
+STAT_FIELDS = [
+    'student_count', 'assignment_count', 'submission_count',
+    'ungraded_count', 'graded_count', 'marks_total'
+]
+
+def apply_stats_delta(course_id, **deltas):
+    """
+    Add the given deltas to a course's CourseStats row with a single
+    UPDATE using F() expressions, so concurrent writers don't lose counts.
+    """
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if course_id is not None and changes:
+        CourseStats.objects.filter(course_id=course_id).update(
+            updated_at=timezone.now(),
+            **changes
+        )
+
+def rebuild_course_stats(course_ids=None, batch_size=500):
+    """
+    Recompute CourseStats from scratch for the given courses (or all
+    courses) and upsert the rows. Returns the number of courses rebuilt.
+    """
+    from assignments.models import Assignment, Submission
+    from .models import Enrollment
+
+    courses = Course.objects.order_by('pk')
+    if course_ids is not None:
+        courses = courses.filter(pk__in=course_ids)
+
+    rebuilt = 0
+    for batch in batched(courses.values_list('pk', flat=True).iterator(), batch_size):
+        # Each table is grouped separately to avoid multiplying joined rows
+        rows = {course_id: CourseStats(course_id=course_id) for course_id in batch}
+        grouped = [
+            Enrollment.objects.active().filter(course__in=batch).values('course').annotate(
+                student_count=Count('pk')
+            ),
+            Assignment.objects.filter(course__in=batch).values('course').annotate(
+                assignment_count=Count('pk')
+            ),
+            Submission.objects.filter(assignment__course__in=batch).values(
+                'assignment__course'
+            ).annotate(
+                submission_count=Count('pk'),
+                ungraded_count=Count('pk', filter=Q(marks__isnull=True)),
+                graded_count=Count('marks'),
+                marks_total=Sum('marks'),
+            ),
+        ]
+        for queryset in grouped:
+            for values in queryset.order_by():
+                course_id = values.pop('course', None) or values.pop('assignment__course')
+                for field, value in values.items():
+                    setattr(rows[course_id], field, value or 0)
+
+        CourseStats.objects.bulk_create(
+            rows.values(),
+            update_conflicts=True,
+            unique_fields=['course'],
+            update_fields=STAT_FIELDS + ['updated_at']
+        )
+        rebuilt += len(rows)
+    return rebuilt
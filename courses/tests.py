@@ -1,3 +1,443 @@
-from django.test import TestCase
+import csv
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from assignments.models import Assignment, Submission
+from schools.models import School, Department
+from .cache import bump_course_versions, course_version, get_fragment_cache_alias
+from .enrollment import (
+    DepartmentCourses, enroll_department_students, enroll_students, reconcile_student
+)
+from .models import Course, CourseStats, Enrollment
+from .stats import rebuild_course_stats
+
+
+class EnrollmentServiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='Science', code='SCI')
+        cls.department = Department.objects.create(
+            name='Computer Science', code='CS', school=school
+        )
+        cls.students = User.objects.bulk_create([
+            User(
+                username=f'student{index}', user_type='student',
+                registration_number=f'R{index:03}', department=cls.department
+            )
+            for index in range(12)
+        ])
+
+    def test_new_course_enrolls_department_once(self):
+        course = Course.objects.create(code='cs101', name='Programming', department=self.department)
+        self.assertEqual(course.enrollments.count(), 12)
+        self.assertEqual(enroll_department_students(course), 0)
+
+    @override_settings(ENROLLMENT_BATCH_SIZE=5)
+    def test_backfill_command_fills_missing_enrollments(self):
+        course = Course.objects.create(code='CS101', name='Programming', department=self.department)
+        inactive = Course.objects.create(
+            code='CS102', name='Archived', department=self.department, is_active=False
+        )
+        Enrollment.objects.filter(student__in=self.students[:7]).delete()
+
+        with self.assertNumQueries(13):
+            # Savepoint pair, two counts, the student ids, three insert batches
+            # and five for the course statistics rebuild
+            created = enroll_department_students(course)
+        self.assertEqual(created, 7)
+
+        Enrollment.objects.filter(course=course, student__in=self.students[:3]).delete()
+        out = StringIO()
+        call_command('backfill_enrollments', stdout=out)
+        self.assertIn('CS101: enrolled 3 students', out.getvalue())
+        self.assertEqual(course.enrollments.count(), 12)
+        self.assertEqual(inactive.enrollments.count(), 5)
+
+class EnrollmentReconcilerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.school = School.objects.create(name='Science', code='SCI')
+        cls.computing = Department.objects.create(name='Computing', code='CS', school=cls.school)
+        cls.maths = Department.objects.create(name='Mathematics', code='MA', school=cls.school)
+        cls.cs101 = Course.objects.create(code='CS101', name='Programming', department=cls.computing)
+        cls.cs102 = Course.objects.create(code='CS102', name='Data Structures', department=cls.computing)
+        cls.ma101 = Course.objects.create(code='MA101', name='Calculus', department=cls.maths)
+        cls.ma102 = Course.objects.create(code='MA102', name='Algebra', department=cls.maths)
+        cls.maths.required_courses.add(cls.cs101)
+
+    def create_student(self, username, department):
+        return User.objects.create_user(
+            username=username, user_type='student',
+            registration_number=username.upper(), department=department
+        )
+
+    def enrolled_codes(self, student):
+        return set(student.enrollments.values_list('course__code', flat=True))
+
+    def test_department_change_is_reconciled(self):
+        student = self.create_student('r001', self.computing)
+        enroll_department_students(self.cs101)
+        enroll_department_students(self.cs102)
+        Enrollment.objects.filter(student=student, course=self.cs102).update(status='completed')
+
+        student.department = self.maths
+        student.save()
+        out = StringIO()
+        call_command('reconcile_enrollments', department='MA', stdout=out)
+
+        # CS101 is required by Mathematics; completed CS102 history is kept
+        self.assertEqual(self.enrolled_codes(student), {'CS101', 'CS102', 'MA101', 'MA102'})
+        self.assertIn('2 added, 0 removed', out.getvalue())
+
+        student.department = self.computing
+        student.save()
+        call_command('reconcile_enrollments', school='SCI', stdout=StringIO())
+        self.assertEqual(self.enrolled_codes(student), {'CS101', 'CS102'})
+
+    def test_batches_use_bulk_writes(self):
+        students = [self.create_student(f'r{index:03}', self.maths) for index in range(6)]
+        out = StringIO()
+        # Per batch of three: enrollment read, savepoints, one bulk insert
+        # counted before and after, and the course statistics rebuild; plus
+        # two course-set queries for the department and the student stream
+        with self.assertNumQueries(25):
+            call_command('reconcile_enrollments', batch_size=3, stdout=out)
+        self.assertIn('18 added, 0 removed', out.getvalue())
+        for student in students:
+            self.assertEqual(self.enrolled_codes(student), {'CS101', 'MA101', 'MA102'})
+
+    def test_dropped_courses_are_not_re_enrolled(self):
+        student = self.create_student('r001', self.computing)
+        enroll_department_students(self.cs102)
+        self.client.force_login(student)
+        self.client.post(reverse('courses:drop_course', args=[self.cs102.pk]))
+
+        enrollment = Enrollment.objects.get(student=student, course=self.cs102)
+        self.assertEqual(enrollment.status, 'dropped')
+        self.assertEqual(CourseStats.objects.get(course=self.cs102).student_count, 0)
+        call_command('reconcile_enrollments', stdout=StringIO())
+        self.assertFalse(Enrollment.objects.active().filter(student=student, course=self.cs102).exists())
+
+        self.client.post(reverse('courses:enroll_course', args=[self.cs102.pk]))
+        enrollment.refresh_from_db()
+        self.assertEqual(enrollment.status, 'enrolled')
+        self.assertEqual(CourseStats.objects.get(course=self.cs102).student_count, 1)
+
+    def test_former_students_lose_their_enrollments(self):
+        student = self.create_student('r001', self.maths)
+        reconcile_student(student)
+        self.assertEqual(self.enrolled_codes(student), {'CS101', 'MA101', 'MA102'})
+
+        student.department = None
+        self.assertEqual(reconcile_student(student), (0, 3))
+        self.assertEqual(self.enrolled_codes(student), set())
+        self.assertEqual(CourseStats.objects.get(course=self.ma101).student_count, 0)
+
+        student.department = self.maths
+        reconcile_student(student)
+        Enrollment.objects.filter(student=student, course=self.ma101).update(status='completed')
+        student.user_type = 'lecturer'
+        self.assertEqual(reconcile_student(student), (0, 2))
+        self.assertEqual(self.enrolled_codes(student), {'MA101'})
+
+    def test_concurrently_enrolled_rows_are_not_counted(self):
+        student = self.create_student('r001', self.maths)
+
+        def enrolled_meanwhile(department_id):
+            # Another request enrolls the student after their rows were read
+            Enrollment.objects.create(student=student, course=self.ma101)
+            return DepartmentCourses(department_id)
+
+        with mock.patch('courses.enrollment.DepartmentCourses', side_effect=enrolled_meanwhile):
+            self.assertEqual(reconcile_student(student), (2, 0))
+        self.assertEqual(self.enrolled_codes(student), {'CS101', 'MA101', 'MA102'})
+
+    def test_registration_enrolls_in_department_courses(self):
+        from accounts.forms import UserRegistrationForm
+
+        form = UserRegistrationForm(data={
+            'username': 'newstudent', 'email': 'new@example.com',
+            'first_name': 'New', 'last_name': 'Student', 'user_type': 'student',
+            'department': self.computing.pk, 'registration_number': 'R999',
+            'password1': 'a-Strong-passw0rd', 'password2': 'a-Strong-passw0rd',
+        })
+        self.assertTrue(form.is_valid(), form.errors)
+        student = form.save()
+        self.assertEqual(self.enrolled_codes(student), {'CS101', 'CS102'})
+
+class GradebookExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='Science', code='SCI')
+        department = Department.objects.create(name='Computing', code='CS', school=school)
+        cls.lecturer = User.objects.create_user(
+            username='lecturer', user_type='lecturer', staff_number='S001'
+        )
+        cls.students = [
+            User.objects.create_user(
+                username=f'student{index}', user_type='student', first_name='Student',
+                last_name=str(index), registration_number=f'R{index:03}', department=department
+            )
+            for index in range(4)
+        ]
+        cls.course = Course.objects.create(
+            code='CS101', name='Programming', department=department, lecturer=cls.lecturer
+        )
+        cls.essay, cls.exam = [
+            Assignment.objects.create(
+                title=title, course=cls.course, description='', total_marks=total,
+                due_date=timezone.now() + timedelta(days=days), created_by=cls.lecturer
+            )
+            for title, total, days in [('Essay', 20, 1), ('Exam', 80, 2)]
+        ]
+        Submission.objects.create(assignment=cls.essay, student=cls.students[0], marks=15)
+        Submission.objects.create(assignment=cls.exam, student=cls.students[0], marks=60)
+        Submission.objects.create(assignment=cls.exam, student=cls.students[2])
+        # A dropped student's submission must be skipped by the merge
+        Submission.objects.create(assignment=cls.essay, student=cls.students[1], marks=10)
+        Enrollment.objects.filter(student=cls.students[1]).delete()
+
+    def test_gradebook_streams_marks_matrix(self):
+        self.client.force_login(self.lecturer)
+        url = reverse('courses:export_gradebook', args=[self.course.pk])
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response['Content-Disposition'], 'attachment; filename="CS101-gradebook.csv"'
+        )
+        with self.assertNumQueries(3):
+            # Assignments, enrollments and submissions
+            content = b''.join(response.streaming_content).decode()
+
+        rows = list(csv.reader(StringIO(content)))
+        self.assertEqual(rows[0], [
+            'Registration Number', 'Student', 'Essay (/20.00)', 'Exam (/80.00)', 'Total'
+        ])
+        self.assertEqual(rows[1:], [
+            ['R000', 'Student 0', '15.00', '60.00', '75.00'],
+            ['R002', 'Student 2', '', 'ungraded', '0.00'],
+            ['R003', 'Student 3', '', '', '0.00'],
+        ])
+
+    def test_formulas_are_exported_as_text(self):
+        User.objects.filter(pk=self.students[3].pk).update(first_name='=HYPERLINK("x")', last_name='')
+        Assignment.objects.filter(pk=self.exam.pk).update(title='@SUM(A1)')
+        self.client.force_login(self.lecturer)
+        response = self.client.get(reverse('courses:export_gradebook', args=[self.course.pk]))
+        rows = list(csv.reader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][3], "'@SUM(A1) (/80.00)")
+        self.assertEqual(rows[3][:2], ['R003', '\'=HYPERLINK("x")'])
+
+    def test_only_course_lecturer_can_export(self):
+        self.client.force_login(self.students[0])
+        response = self.client.get(reverse('courses:export_gradebook', args=[self.course.pk]))
+        self.assertRedirects(
+            response, reverse('courses:course_detail', args=[self.course.pk]),
+            fetch_redirect_response=False
+        )
+
+class CourseStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='Science', code='SCI')
+        cls.department = Department.objects.create(name='Computing', code='CS', school=school)
+        cls.lecturer = User.objects.create_user(
+            username='lecturer', user_type='lecturer', staff_number='S001'
+        )
+        cls.students = [
+            User.objects.create_user(
+                username=f'student{index}', user_type='student',
+                registration_number=f'R{index:03}', department=cls.department
+            )
+            for index in range(3)
+        ]
+
+    def create_assignment(self, course):
+        return Assignment.objects.create(
+            title='Essay', course=course, description='', total_marks=100,
+            due_date=timezone.now(), created_by=self.lecturer
+        )
+
+    def assertStats(self, course, **expected):
+        stats = CourseStats.objects.get(course=course)
+        self.assertEqual(
+            {field: getattr(stats, field) for field in expected}, expected
+        )
+
+    def test_counters_follow_model_changes(self):
+        course = Course.objects.create(
+            code='CS101', name='Programming', department=self.department, lecturer=self.lecturer
+        )
+        self.assertStats(course, student_count=3, assignment_count=0)
+
+        assignment = self.create_assignment(course)
+        first = Submission.objects.create(assignment=assignment, student=self.students[0])
+        Submission.objects.create(assignment=assignment, student=self.students[1], marks=80)
+        self.assertStats(
+            course, assignment_count=1, submission_count=2, ungraded_count=1, graded_count=1
+        )
+
+        first = Submission.objects.get(pk=first.pk)
+        first.marks = 60
+        first.save()
+        self.assertStats(course, ungraded_count=0, graded_count=2, mean_score=70)
+
+        first.delete()
+        Enrollment.objects.get(course=course, student=self.students[2]).delete()
+        self.assertStats(course, student_count=2, submission_count=1, mean_score=80)
+
+        assignment.delete()
+        self.assertStats(course, assignment_count=0, submission_count=0, graded_count=0)
+
+    def test_rebuild_command_recomputes_counters(self):
+        course = Course.objects.create(code='CS101', name='Programming', department=self.department)
+        assignment = self.create_assignment(course)
+        Submission.objects.bulk_create([
+            Submission(assignment=assignment, student=student, marks=50)
+            for student in self.students
+        ])
+        CourseStats.objects.filter(course=course).update(student_count=0, submission_count=0)
+
+        out = StringIO()
+        call_command('rebuild_course_stats', stdout=out)
+        self.assertIn('Rebuilt statistics for 1 courses.', out.getvalue())
+        self.assertStats(
+            course, student_count=3, assignment_count=1, submission_count=3,
+            graded_count=3, mean_score=50
+        )
+
+    def test_dashboards_read_stats_table(self):
+        course = Course.objects.create(
+            code='CS101', name='Programming', department=self.department, lecturer=self.lecturer
+        )
+        self.create_assignment(course)
+        CourseStats.objects.filter(course=course).update(student_count=42)
+
+        self.client.force_login(self.lecturer)
+        response = self.client.get(reverse('courses:teaching_courses'))
+        self.assertEqual(response.context['courses'][0].student_count, 42)
+        response = self.client.get(reverse('accounts:lecturer_dashboard'))
+        self.assertEqual(response.context['stats']['total_students'], 42)
+        self.assertEqual(response.context['stats']['total_assignments'], 1)
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+})
+class CourseDetailCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='Science', code='SCI')
+        cls.department = Department.objects.create(name='Computing', code='CS', school=school)
+        cls.lecturer = User.objects.create_user(
+            username='lecturer', user_type='lecturer', staff_number='S001'
+        )
+        cls.student = User.objects.create_user(
+            username='student', user_type='student',
+            registration_number='R000', department=cls.department
+        )
+        cls.course = Course.objects.create(
+            code='CS101', name='Programming', department=cls.department, lecturer=cls.lecturer
+        )
+
+    def setUp(self):
+        caches[get_fragment_cache_alias()].clear()
+
+    def add_rows(self, count):
+        students = User.objects.bulk_create([
+            User(username=f'extra{index}', user_type='student', registration_number=f'X{index:03}')
+            for index in range(count)
+        ])
+        Enrollment.objects.bulk_create([
+            Enrollment(student=student, course=self.course) for student in students
+        ])
+        Assignment.objects.bulk_create([
+            Assignment(
+                title=f'Essay {index}', course=self.course, description='', total_marks=100,
+                due_date=timezone.now(), created_by=self.lecturer
+            )
+            for index in range(count)
+        ])
+        rebuild_course_stats([self.course.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_course_versions([self.course.pk])
+
+    def load(self, user):
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('courses:course_detail', args=[self.course.pk]))
+        self.assertEqual(response.status_code, 200)
+        return response, len(context.captured_queries)
+
+    def assertConstantMissQueries(self, user):
+        _, small = self.load(user)
+        self.add_rows(20)
+        response, large = self.load(user)
+        self.assertEqual(small, large)
+        self.assertContains(response, 'Essay 19')
+
+    def test_lecturer_cache_miss_runs_constant_queries(self):
+        self.assertConstantMissQueries(self.lecturer)
+
+    def test_student_cache_miss_runs_constant_queries(self):
+        Submission.objects.create(
+            assignment=Assignment.objects.create(
+                title='Report', course=self.course, description='', total_marks=100,
+                due_date=timezone.now(), created_by=self.lecturer
+            ),
+            student=self.student
+        )
+        self.assertConstantMissQueries(self.student)
+
+    def test_cache_hit_skips_related_queries(self):
+        self.add_rows(5)
+        _, miss = self.load(self.student)
+        response, hit = self.load(self.student)
+        self.assertLess(hit, miss)
+        self.assertContains(response, 'Essay 4')
+        self.assertContains(response, 'X004')
+
+    def test_versions_are_bumped_after_commit(self):
+        version = course_version(self.course.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Assignment.objects.create(
+                title='Report', course=self.course, description='', total_marks=100,
+                due_date=timezone.now(), created_by=self.lecturer
+            )
+            self.assertEqual(course_version(self.course.pk), version)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(course_version(self.course.pk), version)
+
+    def test_writes_refresh_cached_fragments(self):
+        assignment = Assignment.objects.create(
+            title='Report', course=self.course, description='', total_marks=100,
+            due_date=timezone.now(), created_by=self.lecturer
+        )
+        self.load(self.student)
+        with self.captureOnCommitCallbacks(execute=True):
+            submission = Submission.objects.create(assignment=assignment, student=self.student)
+        response, _ = self.load(self.student)
+        self.assertContains(response, reverse('assignments:submission_detail', args=[submission.pk]))
+
+        self.load(self.lecturer)
+        student = User.objects.create_user(
+            username='late', user_type='student', registration_number='R999'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            enroll_students(self.course, [student.pk])
+        response, _ = self.load(self.lecturer)
+        self.assertContains(response, 'R999')
+
+        self.add_rows(1)
+        response, _ = self.load(self.lecturer)
+        self.assertContains(response, 'Essay 0')
@@ -9,6 +9,7 @@ urlpatterns = [
     path('<int:pk>/', views.course_detail, name='course_detail'),
     path('<int:pk>/edit/', views.edit_course, name='edit_course'),
     path('<int:pk>/delete/', views.delete_course, name='delete_course'),
+    path('<int:pk>/gradebook/', views.export_gradebook, name='export_gradebook'),
     path('<int:course_id>/enroll/', views.enroll_course, name='enroll_course'),
     path('<int:course_id>/drop/', views.drop_course, name='drop_course'),
     path('my-courses/', views.my_courses, name='my_courses'),
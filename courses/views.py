@@ -1,11 +1,20 @@
+import csv
+
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Count, Avg
+from django.db.models import Count, Avg, OuterRef, Subquery
 from .models import Course, Enrollment
+from .cache import fragment_context
 from .forms import CourseForm
+from .gradebook import Echo, gradebook_rows
+from assignments.models import Submission
+from core.pagination import paginate_keyset
+from core.routers import read_from_replica
 
 @login_required
+@read_from_replica
 def course_list(request):
     if request.user.is_student():
         # Show all courses from student's department
@@ -14,37 +23,57 @@ def course_list(request):
             is_active=True
         ).select_related('department', 'lecturer')
         
+        page = paginate_keyset(request, courses)
+        
         # Get the IDs of courses the student is already enrolled in
-        enrolled_course_ids = Enrollment.objects.filter(
-            student=request.user
-        ).values_list('course_id', flat=True)
+        enrolled_course_ids = set(Enrollment.objects.active().filter(
+            student=request.user,
+            course__in=[course.pk for course in page]
+        ).values_list('course_id', flat=True))
         
         # Mark courses as enrolled or not
-        for course in courses:
+        for course in page:
             course.is_enrolled = course.id in enrolled_course_ids
     else:
         courses = Course.objects.filter(is_active=True).select_related('department', 'lecturer')
+        page = paginate_keyset(request, courses)
     
-    return render(request, 'courses/course_list.html', {'courses': courses})
+    return render(request, 'courses/course_list.html', {'courses': page, 'page_obj': page})
 
 @login_required
 def course_detail(request, pk):
     course = get_object_or_404(
-        Course.objects.select_related('department', 'lecturer'),
+        Course.objects.with_stats().select_related('department__school', 'lecturer'),
         pk=pk
     )
     
+    # Evaluated by the template only when its cached fragments miss
+    assignments = course.assignments.all()
+    submission_owner = None
+    if request.user.is_student():
+        # The assignment list links to the student's own submissions
+        submission_owner = request.user.pk
+        assignments = assignments.annotate(submission_id=Subquery(
+            Submission.objects.filter(
+                assignment=OuterRef('pk'), student=request.user
+            ).values('pk')[:1]
+        ))
+    
     context = {
         'course': course,
         'is_enrolled': False,
-        'enrollment_count': course.enrollments.count(),
-        'assignment_count': course.assignments.count(),
+        'enrollment_count': course.student_count,
+        'assignment_count': course.assignment_count,
+        'assignments': assignments,
+        'submission_owner': submission_owner,
+        'enrollments': course.enrollments.active().select_related('student'),
+        **fragment_context(course.pk),
     }
     
     if request.user.is_student():
-        context['is_enrolled'] = course.enrollments.filter(student=request.user).exists()
-        if context['is_enrolled']:
-            enrollment = course.enrollments.get(student=request.user)
+        enrollment = course.enrollments.active().filter(student=request.user).first()
+        if enrollment is not None:
+            context['is_enrolled'] = True
             context['enrollment'] = enrollment
     
     return render(request, 'courses/course_detail.html', context)
@@ -63,19 +92,8 @@ def create_course(request):
             course.save()
             messages.success(request, 'Course created successfully.')
             
-            # Automatically enroll all students from the department
-            department_students = course.department.user_set.filter(user_type='student')
-            enrolled_count = 0
-            
-            for student in department_students:
-                enrollment, created = Enrollment.objects.get_or_create(
-                    student=student,
-                    course=course,
-                    defaults={'status': 'enrolled'}
-                )
-                if created:
-                    enrolled_count += 1
-            
+            # Department students are enrolled by Course.save()
+            enrolled_count = course.get_student_count()
             if enrolled_count > 0:
                 messages.info(request, f'Automatically enrolled {enrolled_count} students from {course.department}')
             
@@ -141,6 +159,10 @@ def enroll_course(request, course_id):
     
     if created:
         messages.success(request, f'Successfully enrolled in {course.name}.')
+    elif enrollment.status == 'dropped':
+        enrollment.status = 'enrolled'
+        enrollment.save(update_fields=['status', 'updated_at'])
+        messages.success(request, f'Successfully enrolled in {course.name}.')
     else:
         messages.info(request, 'You are already enrolled in this course.')
     
@@ -153,7 +175,7 @@ def drop_course(request, course_id):
         return redirect('courses:course_list')
     
     enrollment = get_object_or_404(
-        Enrollment,
+        Enrollment.objects.active(),
         student=request.user,
         course_id=course_id
     )
@@ -163,24 +185,27 @@ def drop_course(request, course_id):
         messages.error(request, 'You cannot drop required courses for your department.')
         return redirect('courses:course_detail', pk=course_id)
     
-    enrollment.delete()
+    # The row is kept as dropped so reconciliation doesn't enroll them again
+    enrollment.status = 'dropped'
+    enrollment.save(update_fields=['status', 'updated_at'])
     messages.success(request, f'Successfully dropped {enrollment.course.name}.')
     
     return redirect('courses:my_courses')
 
 @login_required
+@read_from_replica
 def my_courses(request):
     if not request.user.is_student():
         messages.error(request, 'Only students can view their courses.')
         return redirect('courses:course_list')
     
-    enrollments = Enrollment.objects.filter(
+    enrollments = Enrollment.objects.active().filter(
         student=request.user
     ).select_related(
         'course',
         'course__lecturer',
-        'course__department'
-    )
+        'course__department__school'
+    ).with_progress()
     
     # Get available courses from student's department that they're not enrolled in
     enrolled_course_ids = enrollments.values_list('course_id', flat=True)
@@ -199,6 +224,7 @@ def my_courses(request):
     return render(request, 'courses/my_courses.html', context)
 
 @login_required
+@read_from_replica
 def teaching_courses(request):
     if not request.user.is_lecturer():
         messages.error(request, 'Only lecturers can view their teaching courses.')
@@ -206,9 +232,22 @@ def teaching_courses(request):
     
     courses = Course.objects.filter(
         lecturer=request.user
-    ).select_related('department').annotate(
-        student_count=Count('enrollments'),
-        assignment_count=Count('assignments')
-    )
+    ).select_related('department__school').with_stats()
     
     return render(request, 'courses/teaching_courses.html', {'courses': courses})
+
+@login_required
+def export_gradebook(request, pk):
+    course = get_object_or_404(Course, pk=pk)
+    if request.user != course.lecturer:
+        messages.error(request, 'You can only export the gradebook of your own courses.')
+        return redirect('courses:course_detail', pk=pk)
+    
+    # Rows are generated lazily so large courses stream in constant memory
+    writer = csv.writer(Echo())
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in gradebook_rows(course)),
+        content_type='text/csv'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{course.code}-gradebook.csv"'
+    return response
@@ -11,5 +11,10 @@ class SchoolAdmin(admin.ModelAdmin):
 class DepartmentAdmin(admin.ModelAdmin):
     list_display = ('name', 'code', 'school', 'created_at', 'updated_at')
     list_filter = ('school',)
+    list_select_related = ('school',)
     search_fields = ('name', 'code', 'school__name')
     ordering = ('school', 'name')
+
+    def get_queryset(self, request):
+        # Also used by autocomplete filters, where __str__ reads the school
+        return super().get_queryset(request).select_related('school')
@@ -1,11 +1,14 @@
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from .models import School, Department
+from core.pagination import paginate_keyset
+from core.routers import read_from_replica
 
 @login_required
+@read_from_replica
 def school_list(request):
-    schools = School.objects.all()
-    return render(request, 'schools/school_list.html', {'schools': schools})
+    page = paginate_keyset(request, School.objects.all())
+    return render(request, 'schools/school_list.html', {'schools': page, 'page_obj': page})
 
 @login_required
 def school_detail(request, pk):
@@ -17,9 +20,10 @@ def school_detail(request, pk):
     })
 
 @login_required
+@read_from_replica
 def department_list(request):
-    departments = Department.objects.select_related('school')
-    return render(request, 'schools/department_list.html', {'departments': departments})
+    page = paginate_keyset(request, Department.objects.select_related('school'))
+    return render(request, 'schools/department_list.html', {'departments': page, 'page_obj': page})
 
 @login_required
 def department_detail(request, pk):
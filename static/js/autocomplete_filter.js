@@ -0,0 +1,11 @@
+'use strict';
+{
+    // Reload the changelist when an AutocompleteFilter's selection changes
+    django.jQuery(document).on('change', 'select.autocomplete-filter', function() {
+        const params = new URLSearchParams(this.dataset.queryString);
+        if (this.value) {
+            params.set(this.name, this.value);
+        }
+        window.location.search = params.toString();
+    });
+}
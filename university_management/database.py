@@ -0,0 +1,83 @@
+"""
+Environment-driven database configuration.
+
+DB_ENGINE selects 'sqlite' (default) or 'postgresql'. The remaining
+DB_* variables (NAME, USER, PASSWORD, HOST, PORT, CONN_MAX_AGE, POOL,
+POOL_MIN_SIZE, POOL_MAX_SIZE) fill in the connection. A read replica is
+configured by setting DB_REPLICA_NAME; any other DB_REPLICA_* variable
+overrides the primary's value, so a second SQLite file only needs
+DB_REPLICA_NAME=/path/to/replica.sqlite3.
+"""
+import os
+
+ENGINES = {
+    'sqlite': 'django.db.backends.sqlite3',
+    'postgresql': 'django.db.backends.postgresql',
+}
+
+def get_env(environ, prefix, name, default=None):
+    """
+    Read PREFIX_NAME, falling back to DB_NAME for replica prefixes.
+    """
+    value = environ.get(f'{prefix}_{name}')
+    if value is None and prefix != 'DB':
+        value = environ.get(f'DB_{name}')
+    return default if value is None else value
+
+def is_enabled(value):
+    return str(value).lower() in ('1', 'true', 'yes')
+
+def database_from_env(prefix='DB', default_name=None, environ=None):
+    """
+    Build a DATABASES entry from the environment variables starting with
+    `prefix`.
+    """
+    environ = os.environ if environ is None else environ
+    engine = get_env(environ, prefix, 'ENGINE', 'sqlite')
+    if engine not in ENGINES:
+        raise ValueError(f"{prefix}_ENGINE must be one of {', '.join(ENGINES)}, not {engine!r}.")
+
+    config = {
+        'ENGINE': ENGINES[engine],
+        'NAME': get_env(environ, prefix, 'NAME', default_name),
+        # Keep connections open between requests and check them before reuse
+        'CONN_MAX_AGE': int(get_env(environ, prefix, 'CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+    }
+
+    if engine == 'sqlite':
+        config['OPTIONS'] = {
+            # Take the write lock when a transaction starts, so concurrent
+            # writers queue on busy_timeout instead of failing on lock upgrade
+            'transaction_mode': 'IMMEDIATE',
+        }
+        return config
+
+    config.update({
+        'USER': get_env(environ, prefix, 'USER', ''),
+        'PASSWORD': get_env(environ, prefix, 'PASSWORD', ''),
+        'HOST': get_env(environ, prefix, 'HOST', ''),
+        'PORT': get_env(environ, prefix, 'PORT', ''),
+        'OPTIONS': {},
+    })
+    if is_enabled(get_env(environ, prefix, 'POOL', '')):
+        # Django's native psycopg pool replaces persistent connections
+        config['CONN_MAX_AGE'] = 0
+        config['OPTIONS']['pool'] = {
+            'min_size': int(get_env(environ, prefix, 'POOL_MIN_SIZE', 2)),
+            'max_size': int(get_env(environ, prefix, 'POOL_MAX_SIZE', 10)),
+        }
+    return config
+
+def databases_from_env(default_name=None, environ=None):
+    """
+    Return the DATABASES setting: 'default' plus 'replica' when
+    DB_REPLICA_NAME is set.
+    """
+    environ = os.environ if environ is None else environ
+    databases = {'default': database_from_env('DB', default_name, environ)}
+    if environ.get('DB_REPLICA_NAME'):
+        databases['replica'] = database_from_env('DB_REPLICA', environ=environ)
+        # Tests read the replica through the default test database
+        databases['replica']['TEST'] = {'MIRROR': 'default'}
+    return databases
@@ -5,6 +5,8 @@ Django settings for university_management project.
 from pathlib import Path
 import os
 
+from .database import databases_from_env
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -35,6 +37,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,14 +68,80 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'university_management.wsgi.application'
 
-# Database
-DATABASES = {
+# Database (configured from DB_* environment variables, see database.py)
+DATABASES = databases_from_env(default_name=BASE_DIR / 'db.sqlite3')
+
+# Reads in the list views go to the replica when one is configured
+REPLICA_DATABASE = 'replica' if 'replica' in DATABASES else None
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Tests read from the primary and cache in memory (see core.test_runner)
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
+# Pragmas applied to every new SQLite connection (see core.signals)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -65536,  # 64 MB
+    'mmap_size': 268435456,  # 256 MB
+    'busy_timeout': 20000,  # 20 seconds
+}
+
+# Cache
+# Shared by every worker process, so signal evictions and course version
+# bumps made in one are seen by all of them
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
     }
 }
 
+# Dashboard contexts are cached per user and evicted by model signals
+DASHBOARD_CACHE_ALIAS = 'default'
+DASHBOARD_CACHE_TIMEOUT = 300  # 5 minutes
+
+# Course and assignment page fragments are cached under a per-course
+# version that model signals bump; the version must live in a cache shared
+# by every worker process. The timeout bounds how long changes the signals
+# don't track (such as a student's name) can stay stale
+FRAGMENT_CACHE_ALIAS = 'default'
+FRAGMENT_CACHE_TIMEOUT = 3600  # 1 hour
+
+# Rows per bulk insert when auto-enrolling students into courses
+ENROLLMENT_BATCH_SIZE = 500
+
+# Page size for the keyset-paginated list views
+PAGINATE_BY = 25
+
+# Per-request SQL and timing instrumentation (Server-Timing header, JSON log
+# lines on the 'core.requests' logger and histograms at /stats/requests/)
+REQUEST_INSTRUMENTATION = os.environ.get('REQUEST_INSTRUMENTATION', '').lower() in ('1', 'true', 'yes')
+
+# Logging
+# The instrumentation lines are already JSON, so they are written to stderr
+# as-is, one per request, for the log collector to pick up
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'requests': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'core.requests': {
+            'handlers': ['requests'],
+            'level': os.environ.get('REQUEST_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -112,10 +181,36 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Submission files are stored once per distinct content under MEDIA_ROOT/blobs
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    'submissions': {
+        'BACKEND': 'assignments.storage.ContentAddressedStorage',
+    },
+}
+
+# Submission blobs stored or reused this recently are never deleted, which
+# covers uploads that reused a blob but haven't committed their row yet;
+# older unreferenced blobs are removed by sweep_submission_blobs
+SUBMISSION_BLOB_GRACE_PERIOD = 600  # 10 minutes
+
 # File upload settings
-FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
+# Larger uploads are streamed to a temporary file in chunks instead of being
+# held in memory
+FILE_UPLOAD_MAX_MEMORY_SIZE = 262144  # 256KB
 CONTENT_TYPES = ['application/pdf']
 MAX_UPLOAD_SIZE = 5242880  # 5MB
 
+# Hand submission downloads to the web server once permissions are checked:
+# 'nginx' (X-Accel-Redirect to SENDFILE_URL, an internal location aliased to
+# MEDIA_ROOT) or 'apache' (X-Sendfile). Empty streams them from Django.
+SENDFILE_BACKEND = os.environ.get('SENDFILE_BACKEND', '')
+SENDFILE_URL = '/protected-media/'
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -6,10 +6,12 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import RedirectView
-from core.views import home
+from core.views import home, request_statistics, search
 
 urlpatterns = [
     path('', home, name='home'),
+    path('search/', search, name='search'),
+    path('stats/requests/', request_statistics, name='request_statistics'),
     path('admin/', admin.site.urls),
     path('accounts/', include('accounts.urls')),
     path('schools/', include('schools.urls')),